@@ -0,0 +1,215 @@
+# backend/admission.py
+import asyncio
+import math
+import time
+from collections import OrderedDict, deque
+from contextlib import asynccontextmanager
+from typing import Deque, Dict, Optional, Tuple
+from .limits import TokenBucket
+from .metrics import ADMISSION_REJECTIONS, ADMISSION_WAIT
+from .config import (
+    MODEL_GEMINI_PRO,
+    MODEL_GEMINI_FLASH,
+    ADMISSION_MAX_CONCURRENT_TURNS,
+    ADMISSION_MAX_QUEUED_TURNS,
+    ADMISSION_QUEUE_TIMEOUT_SECONDS,
+    ADMISSION_USER_TURNS_PER_MINUTE,
+    ADMISSION_USER_BURST,
+    ADMISSION_PRO_CALLS_PER_SECOND,
+    ADMISSION_PRO_BURST,
+    ADMISSION_FLASH_CALLS_PER_SECOND,
+    ADMISSION_FLASH_BURST,
+    ADMISSION_MODEL_WAIT_SECONDS,
+    ADMISSION_MAX_TRACKED_USERS
+)
+
+class AdmissionRejected(Exception):
+    """Raised when a turn or model call is shed; surfaced to clients as 429 with Retry-After."""
+
+    def __init__(self, reason: str, detail: str, retry_after: float):
+        super().__init__(detail)
+        self.reason = reason
+        self.detail = detail
+        self.retry_after = retry_after
+
+    @property
+    def retry_after_header(self) -> str:
+        return str(max(1, math.ceil(self.retry_after)))
+
+class ConcurrencyGate:
+    """
+    Bounded concurrency with a short FIFO wait queue. A released slot is handed
+    straight to the oldest waiter, so queued turns cannot be overtaken by new ones.
+    """
+
+    def __init__(self, limit: int, max_waiting: int):
+        self.limit = limit
+        self.max_waiting = max_waiting
+        self.active = 0
+        self._waiters: Deque[asyncio.Future] = deque()
+
+    @property
+    def waiting(self) -> int:
+        return len(self._waiters)
+
+    def is_full(self) -> bool:
+        """True when a new turn would be rejected without waiting."""
+        return self.active >= self.limit and len(self._waiters) >= self.max_waiting
+
+    async def acquire(self, timeout: float) -> bool:
+        """Takes a slot, waiting up to `timeout` seconds. Returns False when the queue is full or the wait timed out."""
+        if self.active < self.limit and not self._waiters:
+            self.active += 1
+            return True
+        if len(self._waiters) >= self.max_waiting:
+            return False
+        waiter = asyncio.get_running_loop().create_future()
+        self._waiters.append(waiter)
+        try:
+            await asyncio.wait_for(waiter, timeout)
+            return True
+        except asyncio.TimeoutError:
+            return False
+        except asyncio.CancelledError:
+            if waiter.done() and not waiter.cancelled():
+                # The slot was handed over just as the turn was cancelled; pass it on
+                self.release()
+            raise
+        finally:
+            if waiter in self._waiters:
+                self._waiters.remove(waiter)
+
+    def release(self):
+        while self._waiters:
+            waiter = self._waiters.popleft()
+            if not waiter.done():
+                waiter.set_result(None)
+                return
+        self.active -= 1
+
+class AdmissionController:
+    """
+    Protects the Gemini quota and tail latency under bursts:
+    - a token bucket per user caps how often each user can start a turn,
+    - a global gate bounds concurrent turns, with a short wait queue,
+    - a token bucket per model tier paces Gemini calls from agents and tools.
+    Anything that cannot be admitted quickly is rejected with a retry hint
+    instead of queueing until it times out.
+    """
+
+    def __init__(
+        self,
+        max_concurrent_turns: int,
+        max_queued_turns: int,
+        queue_timeout: float,
+        user_turns_per_minute: float,
+        user_burst: int,
+        tier_limits: Dict[str, Tuple[float, int]],
+        model_wait: float,
+        max_tracked_users: int
+    ):
+        self._gate = ConcurrencyGate(max_concurrent_turns, max_queued_turns)
+        self._queue_timeout = queue_timeout
+        self._user_rate = user_turns_per_minute / 60
+        self._user_burst = user_burst
+        self._user_buckets: "OrderedDict[str, TokenBucket]" = OrderedDict()
+        self._max_tracked_users = max_tracked_users
+        self._tier_buckets = {
+            model: TokenBucket(rate=rate, capacity=burst)
+            for model, (rate, burst) in tier_limits.items() if rate > 0
+        }
+        self._model_wait = model_wait
+
+    # --- Per-user rate ---
+    def _user_bucket(self, user_id: str) -> TokenBucket:
+        bucket = self._user_buckets.get(user_id)
+        if bucket is None:
+            bucket = self._user_buckets[user_id] = TokenBucket(rate=self._user_rate, capacity=self._user_burst)
+            while len(self._user_buckets) > self._max_tracked_users:
+                self._user_buckets.popitem(last=False)
+        else:
+            self._user_buckets.move_to_end(user_id)
+        return bucket
+
+    def check_user(self, user_id: str):
+        """Takes one turn from the user's bucket or raises AdmissionRejected."""
+        if self._user_rate <= 0:
+            return
+        bucket = self._user_bucket(user_id)
+        if not bucket.try_acquire():
+            ADMISSION_REJECTIONS.inc("user_rate")
+            raise AdmissionRejected(
+                "user_rate",
+                "Too many requests, please slow down.",
+                bucket.time_until_available()
+            )
+
+    # --- Global concurrency ---
+    def check_capacity(self):
+        """Raises AdmissionRejected when the wait queue is already full, without taking a slot."""
+        if self._gate.is_full():
+            ADMISSION_REJECTIONS.inc("overloaded")
+            raise AdmissionRejected("overloaded", "Server is busy, please retry shortly.", self._queue_timeout)
+
+    @asynccontextmanager
+    async def turn_slot(self):
+        """Holds one of the global turn slots for the duration of a turn."""
+        started = time.perf_counter()
+        if not await self._gate.acquire(self._queue_timeout):
+            ADMISSION_REJECTIONS.inc("overloaded")
+            raise AdmissionRejected("overloaded", "Server is busy, please retry shortly.", self._queue_timeout)
+        ADMISSION_WAIT.observe(time.perf_counter() - started, "turn")
+        try:
+            yield
+        finally:
+            self._gate.release()
+
+    # --- Model tiers ---
+    async def pace_model_call(self, model_name: Optional[str]):
+        """Waits for a token from the model tier's bucket; sheds the call if that takes longer than allowed."""
+        bucket = self._tier_buckets.get(model_name)
+        if bucket is None:
+            return
+        started = time.perf_counter()
+        try:
+            # The outer timeout also bounds the wait behind earlier callers queued on the bucket
+            acquired = await asyncio.wait_for(bucket.acquire(timeout=self._model_wait), self._model_wait)
+        except asyncio.TimeoutError:
+            acquired = False
+        if not acquired:
+            ADMISSION_REJECTIONS.inc(f"model_capacity:{model_name}")
+            raise AdmissionRejected(
+                "model_capacity",
+                f"{model_name} capacity is exhausted, please retry shortly.",
+                bucket.time_until_available()
+            )
+        ADMISSION_WAIT.observe(time.perf_counter() - started, model_name)
+
+    def model_wait_estimate(self, model_name: Optional[str]) -> float:
+        """Seconds until the model tier's bucket has a token (0 when unlimited or available now)."""
+        bucket = self._tier_buckets.get(model_name)
+        return bucket.time_until_available() if bucket is not None else 0.0
+
+    def try_model_call(self, model_name: Optional[str]) -> bool:
+        """Takes a tier token only if one is free right now; used for optional extra calls such as hedges."""
+        bucket = self._tier_buckets.get(model_name)
+        return bucket is None or bucket.try_acquire()
+
+admission = AdmissionController(
+    max_concurrent_turns=ADMISSION_MAX_CONCURRENT_TURNS,
+    max_queued_turns=ADMISSION_MAX_QUEUED_TURNS,
+    queue_timeout=ADMISSION_QUEUE_TIMEOUT_SECONDS,
+    user_turns_per_minute=ADMISSION_USER_TURNS_PER_MINUTE,
+    user_burst=ADMISSION_USER_BURST,
+    tier_limits={
+        MODEL_GEMINI_PRO: (ADMISSION_PRO_CALLS_PER_SECOND, ADMISSION_PRO_BURST),
+        MODEL_GEMINI_FLASH: (ADMISSION_FLASH_CALLS_PER_SECOND, ADMISSION_FLASH_BURST),
+    },
+    model_wait=ADMISSION_MODEL_WAIT_SECONDS,
+    max_tracked_users=ADMISSION_MAX_TRACKED_USERS
+)
+
+# --- ADK callback ---
+async def pace_model_call(callback_context, llm_request):
+    """Before-model callback: paces agent LLM calls by model tier."""
+    await admission.pace_model_call(llm_request.model)
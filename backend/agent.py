@@ -1,7 +1,8 @@
 # backend/agent.py
 from google.adk.agents import Agent
-from .agents import ALL_SUB_AGENTS
+from .agents import ALL_SUB_AGENTS, AGENT_CALLBACKS
 from .config import MODEL_GEMINI_PRO
+from .clients import agent_model
 import os
 import google.generativeai as genai
 from dotenv import load_dotenv
@@ -12,7 +13,7 @@ load_dotenv()
 # --- Main Coordinator Agent (root_agent) ---
 root_agent = Agent(
     name="VentureCoordinatorAgent",
-    model=MODEL_GEMINI_PRO,
+    model=agent_model(MODEL_GEMINI_PRO),
     instruction="You are a versatile assistant for startups and venture capital. Your main task is to understand user requests related to startup ideas, their development, and promotion, and effectively delegate these tasks to the most suitable specialized agent on your team. "
                 "If the user wants to evaluate or validate an idea, delegate to the 'IdeaValidatorAgent'. "
                 "For requests related to market or competitor research, use the 'MarketResearcherAgent'. "
@@ -24,4 +25,5 @@ root_agent = Agent(
     description="The main coordinator of all Venture Assist AI operations, delegating requests to specialized agents.",
     tools=[],
     sub_agents=ALL_SUB_AGENTS,
+    **AGENT_CALLBACKS,
 )
\ No newline at end of file
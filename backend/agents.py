@@ -4,25 +4,59 @@ from .tools import (
     get_validator,
     get_research,
     get_pitch,
+    get_pitch_slides,
     get_summary,
     get_saver,
     get_logo,
-    get_meeting
+    get_meeting,
+    prefetch_next_step
 )
 from .config import (
     MODEL_GEMINI_FLASH,
     MODEL_GEMINI_PRO
 )
+from .metrics import (
+    track_agent_start,
+    track_agent_end,
+    track_model_start,
+    track_model_end,
+    track_tool_start,
+    track_tool_end
+)
+from .tracing import (
+    trace_agent_start,
+    trace_agent_end,
+    trace_model_start,
+    trace_model_end,
+    trace_tool_start,
+    trace_tool_end
+)
+from .compaction import compact_history
+from .admission import pace_model_call
+from .tiering import select_model, observe_model_end
+from .clients import agent_model
+
+# Shared by the coordinator and every sub-agent. Compaction, model selection and
+# rate-limit waits run before the model call is timed, in that order.
+AGENT_CALLBACKS = dict(
+    before_agent_callback=[track_agent_start, trace_agent_start],
+    after_agent_callback=[track_agent_end, trace_agent_end],
+    before_model_callback=[compact_history, select_model, pace_model_call, track_model_start, trace_model_start],
+    after_model_callback=[observe_model_end, track_model_end, trace_model_end],
+    before_tool_callback=[track_tool_start, trace_tool_start],
+    after_tool_callback=[track_tool_end, trace_tool_end, prefetch_next_step]
+)
 
 # --- Specialized Agent Definitions ---
 idea_validator_agent = None
 try:
     idea_validator_agent = Agent(
         name="IdeaValidatorAgent",
-        model=MODEL_GEMINI_FLASH,
+        model=agent_model(MODEL_GEMINI_FLASH),
         instruction="You are an expert in startup idea validation. Your task is to thoroughly analyze provided ideas and give constructive feedback, pointing out potential problems and areas for improvement. Use only the 'get_validator' tool to check ideas.",
         description="An agent specializing in validating new startup ideas and providing feedback.",
-        tools=[get_validator]
+        tools=[get_validator],
+        **AGENT_CALLBACKS
     )
     print(f"✅ Sub-Agent '{idea_validator_agent.name}' redefined.")
 except Exception as e:
@@ -32,10 +66,11 @@ market_researcher_agent = None
 try:
     market_researcher_agent = Agent(
         name="MarketResearcherAgent",
-        model=MODEL_GEMINI_PRO,
+        model=agent_model(MODEL_GEMINI_PRO),
         instruction="You are an expert in market research and competitor analysis. Use only the 'get_research' tool to gather and analyze information. Answer questions about market size, trends, and competitors.",
         description="An agent for conducting general market research and competitor analysis.",
-        tools=[get_research]
+        tools=[get_research],
+        **AGENT_CALLBACKS
     )
     print(f"✅ Sub-Agent '{market_researcher_agent.name}' redefined.")
 except Exception as e:
@@ -45,10 +80,11 @@ pitch_deck_generator_agent = None
 try:
     pitch_deck_generator_agent = Agent(
         name="PitchDeckGeneratorAgent",
-        model=MODEL_GEMINI_FLASH,
-        instruction="You are an expert in creating compelling pitch decks. Use only the 'get_pitch' tool to write pitch deck content. Your task is to help the user create a draft of a complete pitch deck.",
-        description="An agent for generating pitch deck drafts and sections.",
-        tools=[get_pitch]
+        model=agent_model(MODEL_GEMINI_FLASH),
+        instruction="You are an expert in creating compelling pitch decks. Use only the 'get_pitch' tool to write pitch deck content. Your task is to help the user create a draft of a complete pitch deck. If the user wants the deck as slides or in Google Slides, use the 'get_pitch_slides' tool.",
+        description="An agent for generating pitch deck drafts and sections, and exporting them to Google Slides.",
+        tools=[get_pitch, get_pitch_slides],
+        **AGENT_CALLBACKS
     )
     print(f"✅ Sub-Agent '{pitch_deck_generator_agent.name}' redefined.")
 except Exception as e:
@@ -58,7 +94,7 @@ summary_saver_agent = None
 try:
     summary_saver_agent = Agent(
         name="SummarySaverAgent",
-        model=MODEL_GEMINI_FLASH,
+        model=agent_model(MODEL_GEMINI_FLASH),
         instruction=(
             "You are an agent responsible for summarizing text content and saving it to Google Drive. "
             "Use the 'get_summary' tool to generate concise summaries. "
@@ -70,7 +106,8 @@ try:
             "Always confirm with the user after completing a task."
         ),
         description="An agent for summarizing and saving content with memory of the last summary.",
-        tools=[get_summary, get_saver]
+        tools=[get_summary, get_saver],
+        **AGENT_CALLBACKS
     )
     print(f"✅ Sub-Agent '{summary_saver_agent.name}' redefined.")
 except Exception as e:
@@ -80,10 +117,11 @@ logo_creator_agent = None
 try:
     logo_creator_agent = Agent(
         name="LogoCreatorAgent",
-        model=MODEL_GEMINI_PRO,
+        model=agent_model(MODEL_GEMINI_PRO),
         instruction="You are a creative agent specializing in logo concept creation. Use only the 'get_logo' tool to generate logo ideas and images. Respond by providing the logo concept and its URL.",
         description="An agent for creating project logos.",
-        tools=[get_logo]
+        tools=[get_logo],
+        **AGENT_CALLBACKS
     )
     print(f"✅ Sub-Agent '{logo_creator_agent.name}' redefined.")
 except Exception as e:
@@ -93,10 +131,11 @@ meet_maker_agent = None
 try:
     meet_maker_agent = Agent(
         name="MeetMakerAgent",
-        model=MODEL_GEMINI_PRO,
+        model=agent_model(MODEL_GEMINI_PRO),
         instruction="You are an assistant agent for meeting scheduling. Use only the 'get_meeting' tool to organize meetings with participants. Help users schedule meetings with investors or their team.",
         description="An agent for scheduling meetings with investors.",
-        tools=[get_meeting]
+        tools=[get_meeting],
+        **AGENT_CALLBACKS
     )
     print(f"✅ Sub-Agent '{meet_maker_agent.name}' redefined.")
 except Exception as e:
@@ -0,0 +1,143 @@
+# backend/auth.py
+import base64
+import hashlib
+import hmac
+import secrets
+import time
+from typing import Optional, Tuple
+from fastapi import HTTPException, Request, Response, status
+from .config import (
+    AUTH_SECRET_KEY,
+    AUTH_SESSION_MAX_AGE_SECONDS,
+    AUTH_COOKIE_SECURE,
+    AUTH_COOKIE_SAMESITE,
+    AUTH_ADMIN_TOKEN
+)
+
+SESSION_COOKIE = "va_session"
+OAUTH_NONCE_COOKIE = "va_oauth_nonce"
+# Time the user has to get through Google's consent page
+OAUTH_STATE_MAX_AGE_SECONDS = 600
+
+def _b64encode(data: bytes) -> str:
+    return base64.urlsafe_b64encode(data).rstrip(b"=").decode("ascii")
+
+def _b64decode(value: str) -> bytes:
+    return base64.urlsafe_b64decode(value + "=" * (-len(value) % 4))
+
+class Signer:
+    """
+    Signs short values with HMAC-SHA256 and their issue time, so values handed
+    to the browser (session cookie, OAuth state) can be trusted when they come
+    back. Signed form: `<base64 value>.<issued at>.<base64 signature>`.
+    """
+
+    def __init__(self, secret: bytes):
+        self._secret = secret
+
+    def _signature(self, message: str) -> str:
+        return _b64encode(hmac.new(self._secret, message.encode("utf-8"), hashlib.sha256).digest())
+
+    def sign(self, value: str, now: Optional[float] = None) -> str:
+        issued_at = int(time.time() if now is None else now)
+        message = f"{_b64encode(value.encode('utf-8'))}.{issued_at}"
+        return f"{message}.{self._signature(message)}"
+
+    def unsign(self, signed: str, max_age: float, now: Optional[float] = None) -> Optional[str]:
+        """Returns the signed value, or None if the signature does not match or it is older than `max_age` seconds."""
+        try:
+            encoded, issued_at, signature = signed.split(".")
+            issued = int(issued_at)
+            value = _b64decode(encoded).decode("utf-8")
+        except (ValueError, UnicodeDecodeError):
+            return None
+        if not hmac.compare_digest(signature.encode("utf-8"), self._signature(f"{encoded}.{issued_at}").encode("utf-8")):
+            return None
+        if not 0 <= (time.time() if now is None else now) - issued <= max_age:
+            return None
+        return value
+
+def _load_secret() -> bytes:
+    if AUTH_SECRET_KEY:
+        return AUTH_SECRET_KEY.encode("utf-8")
+    print("⚠️ AUTH_SECRET_KEY is not set: using a random key, so sessions end on restart and are not shared between workers.")
+    return secrets.token_bytes(32)
+
+signer = Signer(_load_secret())
+
+def _set_cookie(response: Response, name: str, value: str, max_age: int):
+    response.set_cookie(
+        name, value,
+        max_age=max_age,
+        httponly=True,
+        secure=AUTH_COOKIE_SECURE,
+        samesite=AUTH_COOKIE_SAMESITE
+    )
+
+# --- Browser sessions ---
+def session_user(request: Request) -> Optional[str]:
+    """Returns the user ID of the request's signed session cookie, or None."""
+    cookie = request.cookies.get(SESSION_COOKIE)
+    return signer.unsign(cookie, AUTH_SESSION_MAX_AGE_SECONDS) if cookie else None
+
+def resolve_user(request: Request) -> Tuple[str, bool]:
+    """
+    Returns (user_id, is_new): the user of the request's session, or a new
+    anonymous user when it has none. New users need `start_session()` on the response.
+    """
+    user_id = session_user(request)
+    if user_id:
+        return user_id, False
+    return f"user_{secrets.token_urlsafe(16)}", True
+
+def start_session(response: Response, user_id: str):
+    _set_cookie(response, SESSION_COOKIE, signer.sign(user_id), AUTH_SESSION_MAX_AGE_SECONDS)
+
+# --- Operator endpoints ---
+def is_admin(request: Request) -> bool:
+    """True when the request carries `Authorization: Bearer <AUTH_ADMIN_TOKEN>`; always False while no token is set."""
+    scheme, _, token = request.headers.get("authorization", "").partition(" ")
+    if not AUTH_ADMIN_TOKEN or scheme.lower() != "bearer":
+        return False
+    return hmac.compare_digest(token.strip().encode("utf-8"), AUTH_ADMIN_TOKEN.encode("utf-8"))
+
+def require_admin(request: Request):
+    """FastAPI dependency for operator endpoints: 403 while they are disabled, 401 without the admin token."""
+    if not AUTH_ADMIN_TOKEN:
+        raise HTTPException(status_code=status.HTTP_403_FORBIDDEN, detail="Admin endpoints are disabled.")
+    if not is_admin(request):
+        raise HTTPException(
+            status_code=status.HTTP_401_UNAUTHORIZED,
+            detail="Admin token required.",
+            headers={"WWW-Authenticate": "Bearer"}
+        )
+
+# --- OAuth state ---
+def begin_oauth(user_id: str) -> Tuple[str, str]:
+    """
+    Returns (state, nonce) for a consent flow started by `user_id`. The state
+    signs a random nonce that `set_oauth_nonce()` also sets as a cookie, tying
+    the flow to the browser that started it.
+    """
+    nonce = secrets.token_urlsafe(24)
+    return signer.sign(f"{nonce}:{user_id}"), nonce
+
+def set_oauth_nonce(response: Response, nonce: str):
+    _set_cookie(response, OAUTH_NONCE_COOKIE, nonce, OAUTH_STATE_MAX_AGE_SECONDS)
+
+def finish_oauth(request: Request, state: Optional[str]) -> Optional[str]:
+    """
+    Returns the user who started the consent flow, or None if `state` is forged,
+    expired, or comes back to a browser other than the one that started it.
+    """
+    nonce = request.cookies.get(OAUTH_NONCE_COOKIE)
+    value = signer.unsign(state, OAUTH_STATE_MAX_AGE_SECONDS) if state else None
+    if value is None or not nonce:
+        return None
+    state_nonce, _, user_id = value.partition(":")
+    if not hmac.compare_digest(state_nonce.encode("utf-8"), nonce.encode("utf-8")):
+        return None
+    return user_id or None
+
+def end_oauth(response: Response):
+    response.delete_cookie(OAUTH_NONCE_COOKIE, httponly=True, secure=AUTH_COOKIE_SECURE, samesite=AUTH_COOKIE_SAMESITE)
@@ -0,0 +1,111 @@
+# backend/availability.py
+import time
+from collections import OrderedDict
+from datetime import datetime, timezone
+from typing import Dict, List, Optional, Sequence, Tuple
+from .clients import get_http_client
+from .config import GOOGLE_API_BASE_URL, FREEBUSY_CACHE_SECONDS, FREEBUSY_CACHE_MAX_USERS
+
+GOOGLE_FREEBUSY_API_ENDPOINT = f"{GOOGLE_API_BASE_URL}/calendar/v3/freeBusy"
+
+Interval = Tuple[datetime, datetime]
+
+def _parse_time(value: str) -> datetime:
+    return datetime.fromisoformat(value.replace("Z", "+00:00")).astimezone(timezone.utc)
+
+def _format_time(value: datetime) -> str:
+    return value.astimezone(timezone.utc).strftime("%Y-%m-%dT%H:%M:%SZ")
+
+class FreeBusyCache:
+    """
+    Short-lived per-user cache of busy intervals, so follow-up scheduling
+    requests in the same conversation reuse one free/busy query.
+    An entry covers a time range and set of calendars; any query inside it is served from the entry.
+    At most `max_users` users are kept (least recently used dropped first) with
+    `max_entries_per_user` entries each; users without live entries are dropped.
+    """
+
+    def __init__(self, ttl_seconds: int, max_users: int, max_entries_per_user: int = 8):
+        self._ttl_seconds = ttl_seconds
+        self._max_users = max_users
+        self._max_entries_per_user = max_entries_per_user
+        self._entries: "OrderedDict[str, List[dict]]" = OrderedDict()
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def _live_entries(self, user_id: str) -> List[dict]:
+        now = time.monotonic()
+        entries = [entry for entry in self._entries.get(user_id, []) if entry["expires_at"] > now]
+        if entries:
+            self._entries[user_id] = entries
+            self._entries.move_to_end(user_id)
+        else:
+            self._entries.pop(user_id, None)
+        return entries
+
+    def get(self, user_id: str, time_min: datetime, time_max: datetime, calendars: Sequence[str]) -> Optional[List[Interval]]:
+        for entry in self._live_entries(user_id):
+            if entry["time_min"] <= time_min and entry["time_max"] >= time_max and set(calendars) <= entry["calendars"]:
+                return entry["busy"]
+        return None
+
+    def set(self, user_id: str, time_min: datetime, time_max: datetime, calendars: Sequence[str], busy: List[Interval]):
+        entries = self._live_entries(user_id)
+        entries.append({
+            "time_min": time_min,
+            "time_max": time_max,
+            "calendars": set(calendars),
+            "busy": busy,
+            "expires_at": time.monotonic() + self._ttl_seconds,
+        })
+        self._entries[user_id] = entries[-self._max_entries_per_user:]
+        self._entries.move_to_end(user_id)
+        while len(self._entries) > self._max_users:
+            self._entries.popitem(last=False)
+
+    def add_busy(self, user_id: str, interval: Interval):
+        """Marks a newly booked interval as busy in the user's cached entries."""
+        for entry in self._entries.get(user_id, []):
+            entry["busy"].append(interval)
+
+freebusy_cache = FreeBusyCache(FREEBUSY_CACHE_SECONDS, FREEBUSY_CACHE_MAX_USERS)
+
+async def query_busy_intervals(user_id: str, access_token: str, calendars: Sequence[str], time_min: datetime, time_max: datetime) -> List[Interval]:
+    """
+    Returns the busy intervals of all `calendars` between `time_min` and `time_max`
+    using a single Calendar free/busy request. Calendars that cannot be read
+    (e.g. an external attendee's) are skipped.
+    """
+    cached = freebusy_cache.get(user_id, time_min, time_max, calendars)
+    if cached is not None:
+        print(f"--- Tool: Using cached free/busy for user '{user_id}' ---")
+        return cached
+
+    body = {
+        "timeMin": _format_time(time_min),
+        "timeMax": _format_time(time_max),
+        "items": [{"id": calendar_id} for calendar_id in calendars],
+    }
+    response = await get_http_client().post(
+        GOOGLE_FREEBUSY_API_ENDPOINT,
+        headers={"Authorization": f"Bearer {access_token}"},
+        json=body
+    )
+    response.raise_for_status()
+
+    busy = []
+    for calendar_id, calendar in response.json().get("calendars", {}).items():
+        if calendar.get("errors"):
+            print(f"--- Tool: Free/busy unavailable for '{calendar_id}': {calendar['errors']} ---")
+            continue
+        busy.extend((_parse_time(period["start"]), _parse_time(period["end"])) for period in calendar.get("busy", []))
+
+    freebusy_cache.set(user_id, time_min, time_max, calendars, busy)
+    return busy
+
+def first_free_slot(slots: Sequence[Interval], busy: Sequence[Interval]) -> Optional[Interval]:
+    for start, end in slots:
+        if not any(busy_start < end and start < busy_end for busy_start, busy_end in busy):
+            return start, end
+    return None
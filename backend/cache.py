@@ -0,0 +1,228 @@
+# backend/cache.py
+import hashlib
+import json
+import os
+import re
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Dict, Optional
+from .clients import run_blocking
+from .config import (
+    LLM_CACHE_ENABLED,
+    LLM_CACHE_DB_PATH,
+    LLM_CACHE_MEMORY_ENTRIES,
+    LLM_CACHE_DISK_ENTRIES,
+    LLM_CACHE_TTL_SECONDS
+)
+
+def normalize_input(value: str) -> str:
+    """Lowercases and collapses whitespace so trivially different inputs share a cache entry."""
+    return re.sub(r"\s+", " ", value).strip().lower()
+
+# Access times of disk hits are buffered and written in batches, not on every read
+ACCESS_FLUSH_BATCH = 64
+# Expired rows are deleted at most this often (and whenever the table is trimmed)
+EXPIRY_SWEEP_SECONDS = 3600
+
+class LLMCache:
+    """
+    Two-tier cache for LLM tool responses: an in-process LRU in front of an
+    on-disk SQLite table. Both tiers honour the TTL and a maximum entry count
+    (least recently used entries are evicted first).
+    Values must be JSON-serializable.
+
+    Disk I/O runs on the blocking I/O pool. Reads never write: access times
+    of disk hits are written in batches, and the table is only trimmed once it
+    is a tenth over `max_disk_entries`, so it may briefly hold a few more rows.
+    """
+
+    def __init__(self, db_path: str, max_memory_entries: int, max_disk_entries: int, ttl_seconds: int, enabled: bool = True):
+        self.enabled = enabled
+        self._db_path = db_path
+        self._max_memory_entries = max_memory_entries
+        self._max_disk_entries = max_disk_entries
+        self._eviction_slack = max(1, max_disk_entries // 10)
+        self._ttl_seconds = ttl_seconds
+        # Touched on the event loop only
+        self._memory = OrderedDict()  # key -> (namespace, expires_at, value)
+        self._touched: Dict[str, float] = {}  # key -> access time not yet written to disk
+        # Guards the connection and the disk bookkeeping below, used from pool threads
+        self._lock = threading.Lock()
+        self._conn = None
+        self._disk_rows: Optional[int] = None  # upper bound on the row count, exact after each trim
+        self._next_expiry_sweep = 0.0
+
+    @staticmethod
+    def make_key(namespace: str, model_name: str, prompt_version: str, value: str) -> str:
+        raw = "\x1f".join([namespace, model_name, prompt_version, normalize_input(value)])
+        return hashlib.sha256(raw.encode("utf-8")).hexdigest()
+
+    def _get_conn(self) -> sqlite3.Connection:
+        # Opened lazily so importing the module never touches the filesystem
+        if self._conn is None:
+            directory = os.path.dirname(self._db_path)
+            if directory:
+                os.makedirs(directory, exist_ok=True)
+            conn = sqlite3.connect(self._db_path, check_same_thread=False)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            conn.execute(
+                "CREATE TABLE IF NOT EXISTS llm_cache ("
+                "key TEXT PRIMARY KEY, namespace TEXT NOT NULL, value TEXT NOT NULL, "
+                "expires_at REAL NOT NULL, accessed_at REAL NOT NULL)"
+            )
+            conn.execute("CREATE INDEX IF NOT EXISTS idx_llm_cache_namespace ON llm_cache (namespace)")
+            conn.execute("CREATE INDEX IF NOT EXISTS idx_llm_cache_accessed_at ON llm_cache (accessed_at)")
+            conn.execute("CREATE INDEX IF NOT EXISTS idx_llm_cache_expires_at ON llm_cache (expires_at)")
+            conn.commit()
+            self._conn = conn
+        return self._conn
+
+    def _remember(self, key: str, namespace: str, expires_at: float, value: Any):
+        self._memory[key] = (namespace, expires_at, value)
+        self._memory.move_to_end(key)
+        while len(self._memory) > self._max_memory_entries:
+            self._memory.popitem(last=False)
+
+    def _take_touched(self) -> Dict[str, float]:
+        touched, self._touched = self._touched, {}
+        return touched
+
+    # --- Disk tier (runs on the blocking I/O pool) ---
+    def _disk_get(self, key: str, now: float):
+        with self._lock:
+            conn = self._get_conn()
+            row = conn.execute("SELECT namespace, value, expires_at FROM llm_cache WHERE key = ?", (key,)).fetchone()
+            if row is not None and row[2] <= now:
+                conn.execute("DELETE FROM llm_cache WHERE key = ?", (key,))
+                conn.commit()
+                return None
+            return row
+
+    def _write_access_times(self, conn: sqlite3.Connection, touched: Dict[str, float]):
+        if touched:
+            conn.executemany(
+                "UPDATE llm_cache SET accessed_at = ? WHERE key = ?",
+                [(accessed_at, key) for key, accessed_at in touched.items()]
+            )
+
+    def _disk_touch(self, touched: Dict[str, float]):
+        with self._lock:
+            conn = self._get_conn()
+            self._write_access_times(conn, touched)
+            conn.commit()
+
+    def _disk_set(self, key: str, namespace: str, value_json: str, expires_at: float, now: float, touched: Dict[str, float]):
+        with self._lock:
+            conn = self._get_conn()
+            self._write_access_times(conn, touched)
+            conn.execute(
+                "INSERT OR REPLACE INTO llm_cache (key, namespace, value, expires_at, accessed_at) VALUES (?, ?, ?, ?, ?)",
+                (key, namespace, value_json, expires_at, now)
+            )
+            if self._disk_rows is None:
+                self._disk_rows = conn.execute("SELECT COUNT(*) FROM llm_cache").fetchone()[0]
+            else:
+                # Counts replacements too; the next trim corrects it
+                self._disk_rows += 1
+            if self._disk_rows > self._max_disk_entries + self._eviction_slack or now >= self._next_expiry_sweep:
+                self._trim(conn, now)
+            conn.commit()
+
+    def _trim(self, conn: sqlite3.Connection, now: float):
+        conn.execute("DELETE FROM llm_cache WHERE expires_at <= ?", (now,))
+        rows = conn.execute("SELECT COUNT(*) FROM llm_cache").fetchone()[0]
+        excess = rows - self._max_disk_entries
+        if excess > 0:
+            conn.execute(
+                "DELETE FROM llm_cache WHERE key IN (SELECT key FROM llm_cache ORDER BY accessed_at LIMIT ?)",
+                (excess,)
+            )
+            rows -= excess
+        self._disk_rows = rows
+        self._next_expiry_sweep = now + EXPIRY_SWEEP_SECONDS
+
+    def _disk_invalidate(self, namespace: Optional[str], key: Optional[str]) -> int:
+        with self._lock:
+            conn = self._get_conn()
+            if key is not None:
+                cursor = conn.execute("DELETE FROM llm_cache WHERE key = ?", (key,))
+            elif namespace is not None:
+                cursor = conn.execute("DELETE FROM llm_cache WHERE namespace = ?", (namespace,))
+            else:
+                cursor = conn.execute("DELETE FROM llm_cache")
+            conn.commit()
+            self._disk_rows = None
+            return cursor.rowcount
+
+    # --- Public API ---
+    async def get(self, key: str) -> Optional[Any]:
+        if not self.enabled:
+            return None
+        now = time.time()
+        entry = self._memory.get(key)
+        if entry is not None:
+            _, expires_at, value = entry
+            if expires_at > now:
+                self._memory.move_to_end(key)
+                return value
+            del self._memory[key]
+
+        try:
+            row = await run_blocking(self._disk_get, key, now)
+            if row is None:
+                return None
+            self._touched[key] = now
+            if len(self._touched) >= ACCESS_FLUSH_BATCH:
+                await run_blocking(self._disk_touch, self._take_touched())
+        except sqlite3.Error as e:
+            print(f"--- Cache ERROR: Failed to read from disk cache. Error: {e} ---")
+            return None
+
+        namespace, value_json, expires_at = row
+        value = json.loads(value_json)
+        self._remember(key, namespace, expires_at, value)
+        return value
+
+    async def set(self, key: str, namespace: str, value: Any):
+        if not self.enabled:
+            return
+        now = time.time()
+        expires_at = now + self._ttl_seconds
+        self._remember(key, namespace, expires_at, value)
+        try:
+            await run_blocking(self._disk_set, key, namespace, json.dumps(value), expires_at, now, self._take_touched())
+        except sqlite3.Error as e:
+            print(f"--- Cache ERROR: Failed to write to disk cache. Error: {e} ---")
+
+    async def invalidate(self, namespace: Optional[str] = None, key: Optional[str] = None) -> int:
+        """
+        Removes cached entries. With no arguments the whole cache is cleared;
+        otherwise only the given key and/or namespace. Returns the number of disk rows removed.
+        """
+        if key is not None:
+            self._memory.pop(key, None)
+        elif namespace is not None:
+            for cached_key in [k for k, entry in self._memory.items() if entry[0] == namespace]:
+                del self._memory[cached_key]
+        else:
+            self._memory.clear()
+
+        try:
+            removed = await run_blocking(self._disk_invalidate, namespace, key)
+        except sqlite3.Error as e:
+            print(f"--- Cache ERROR: Failed to invalidate disk cache. Error: {e} ---")
+            return 0
+
+        print(f"--- Cache: invalidated {removed} entries (namespace={namespace}, key={key}) ---")
+        return removed
+
+llm_cache = LLMCache(
+    db_path=LLM_CACHE_DB_PATH,
+    max_memory_entries=LLM_CACHE_MEMORY_ENTRIES,
+    max_disk_entries=LLM_CACHE_DISK_ENTRIES,
+    ttl_seconds=LLM_CACHE_TTL_SECONDS,
+    enabled=LLM_CACHE_ENABLED
+)
@@ -0,0 +1,213 @@
+# backend/clients.py
+import asyncio
+import time
+from concurrent.futures import ThreadPoolExecutor
+from functools import cached_property, partial
+from typing import Dict, Optional, Tuple, Union
+import httpx
+import httplib2
+from google import genai
+from google.genai import types
+from google.adk.models import Gemini
+from google_auth_httplib2 import AuthorizedHttp
+from googleapiclient.discovery import build
+from .config import (
+    GEMINI_API_BASE_URL,
+    GOOGLE_API_BASE_URL,
+    DEFAULT_GOOGLE_API_BASE_URL,
+    HTTP_MAX_CONNECTIONS,
+    HTTP_MAX_KEEPALIVE_CONNECTIONS,
+    HTTP_TIMEOUT_SECONDS,
+    BLOCKING_IO_POOL_SIZE
+)
+from .metrics import (
+    GEMINI_DURATION,
+    GEMINI_ERRORS,
+    UPSTREAM_DURATION,
+    UPSTREAM_ERRORS,
+    upstream_api,
+    record_tokens
+)
+from .admission import admission
+from .resilience import gemini_calls
+from .tracing import tracer, KIND_CLIENT
+
+# --- Shared keep-alive HTTP client for Google REST endpoints ---
+class _InstrumentedTransport(httpx.AsyncHTTPTransport):
+    """Records latency and failures of every request sent through the shared client."""
+
+    async def handle_async_request(self, request: httpx.Request) -> httpx.Response:
+        api = upstream_api(request.url.path)
+        start = time.perf_counter()
+        with tracer.span(f"HTTP {request.method} {api}", kind=KIND_CLIENT, api=api, method=request.method, path=request.url.path) as span:
+            if span is not None:
+                request.headers["traceparent"] = span.traceparent
+            try:
+                response = await super().handle_async_request(request)
+            except Exception as e:
+                UPSTREAM_ERRORS.inc(api, request.method, type(e).__name__)
+                raise
+            finally:
+                UPSTREAM_DURATION.observe(time.perf_counter() - start, api, request.method)
+            if span is not None:
+                span.set(status_code=response.status_code)
+            # 308 is the normal "keep going" reply of resumable uploads
+            if response.status_code >= 400:
+                UPSTREAM_ERRORS.inc(api, request.method, str(response.status_code))
+                if span is not None:
+                    span.error = f"HTTP {response.status_code}"
+        return response
+
+_http_client: Optional[httpx.AsyncClient] = None
+
+def get_http_client() -> httpx.AsyncClient:
+    """
+    Returns the process-wide async HTTP client.
+    Connections are pooled and kept alive across tool calls instead of
+    opening a fresh connection for every request.
+    """
+    global _http_client
+    if _http_client is None or _http_client.is_closed:
+        _http_client = httpx.AsyncClient(
+            timeout=HTTP_TIMEOUT_SECONDS,
+            transport=_InstrumentedTransport(
+                limits=httpx.Limits(
+                    max_connections=HTTP_MAX_CONNECTIONS,
+                    max_keepalive_connections=HTTP_MAX_KEEPALIVE_CONNECTIONS
+                )
+            )
+        )
+    return _http_client
+
+async def close_http_client():
+    global _http_client
+    if _http_client is not None:
+        await _http_client.aclose()
+        _http_client = None
+
+# --- Bounded thread pool for blocking client libraries ---
+_blocking_executor = ThreadPoolExecutor(max_workers=BLOCKING_IO_POOL_SIZE, thread_name_prefix="blocking-io")
+
+async def run_blocking(func, *args, **kwargs):
+    """
+    Runs a blocking call (e.g. googleapiclient `.execute()`) on the bounded
+    thread pool so it does not stall the event loop.
+    """
+    loop = asyncio.get_running_loop()
+    return await loop.run_in_executor(_blocking_executor, partial(func, *args, **kwargs))
+
+def shutdown_blocking_pool():
+    _blocking_executor.shutdown(wait=False, cancel_futures=True)
+
+# --- Shared Gemini client ---
+# Tools use the same google-genai SDK as the ADK agents. Unlike the legacy
+# google.generativeai async client (gRPC only), it can be pointed at a plain
+# HTTP stand-in with GEMINI_API_BASE_URL.
+_genai_client: Optional[genai.Client] = None
+_JSON_CONFIG = types.GenerateContentConfig(response_mime_type="application/json")
+
+def _gemini_http_options(headers: Optional[dict] = None) -> types.HttpOptions:
+    return types.HttpOptions(headers=headers, base_url=GEMINI_API_BASE_URL or None)
+
+def get_genai_client() -> genai.Client:
+    """Returns the process-wide Gemini client, built on first use."""
+    global _genai_client
+    if _genai_client is None:
+        _genai_client = genai.Client(http_options=_gemini_http_options())
+    return _genai_client
+
+class _ConfiguredGemini(Gemini):
+    """ADK Gemini model that honours GEMINI_API_BASE_URL."""
+
+    @cached_property
+    def api_client(self) -> genai.Client:
+        return genai.Client(http_options=_gemini_http_options(self._tracking_headers))
+
+def agent_model(model_name: str) -> Union[str, Gemini]:
+    """Model for an ADK agent: the plain model name unless Gemini calls are redirected."""
+    if GEMINI_API_BASE_URL:
+        return _ConfiguredGemini(model=model_name)
+    return model_name
+
+async def generate_content(model_name: str, contents, json_output: bool = False):
+    """
+    Sends `contents` to Gemini using the shared client.
+    Tool-side LLM calls go through here so latency, errors and token usage
+    are recorded in one place, so they share the model tier's rate limit
+    with the agents, and so every call gets deadlines, retries, hedging and
+    the model's circuit breaker (see resilience.py).
+    """
+    async def send(hedge: bool = False):
+        return await _generate_once(model_name, contents, json_output, hedge)
+
+    # A hedge takes a spare token from the tier's bucket instead (see `can_hedge`)
+    return await gemini_calls.call(model_name, send, pace=admission.pace_model_call)
+
+async def _generate_once(model_name: str, contents, json_output: bool, hedge: bool):
+    start = time.perf_counter()
+    with tracer.span(f"gemini {model_name}", kind=KIND_CLIENT, model=model_name, hedge=hedge) as span:
+        try:
+            response = await get_genai_client().aio.models.generate_content(
+                model=model_name,
+                contents=contents,
+                config=_JSON_CONFIG if json_output else None
+            )
+        except Exception as e:
+            GEMINI_ERRORS.inc(model_name, type(e).__name__)
+            raise
+        finally:
+            GEMINI_DURATION.observe(time.perf_counter() - start, model_name)
+        usage = getattr(response, "usage_metadata", None)
+        record_tokens("tools", model_name, usage)
+        if span is not None and usage is not None:
+            span.set(input_tokens=usage.prompt_token_count or 0, output_tokens=usage.candidates_token_count or 0)
+    return response
+
+# --- Shared Google API service objects ---
+# Services are built once without credentials; each request is executed with
+# the calling user's credentials via `authorized_http()`.
+_services: Dict[Tuple[str, str], object] = {}
+
+def get_google_service(api_name: str, api_version: str):
+    key = (api_name, api_version)
+    service = _services.get(key)
+    if service is None:
+        # Discovery documents ship with the library; only the endpoint changes for a stand-in
+        client_options = None if GOOGLE_API_BASE_URL == DEFAULT_GOOGLE_API_BASE_URL else {"api_endpoint": GOOGLE_API_BASE_URL}
+        service = build(
+            api_name, api_version,
+            http=httplib2.Http(timeout=HTTP_TIMEOUT_SECONDS),
+            cache_discovery=False,
+            client_options=client_options
+        )
+        _services[key] = service
+    return service
+
+def authorized_http(credentials) -> AuthorizedHttp:
+    """
+    Returns an HTTP transport bound to a user's credentials, for
+    `request.execute(http=...)`. httplib2 is not thread-safe, so each call gets its own.
+    """
+    return AuthorizedHttp(credentials, http=httplib2.Http(timeout=HTTP_TIMEOUT_SECONDS))
+
+async def execute_google_request(api_name: str, request, credentials):
+    """
+    Executes a googleapiclient request with the user's credentials on the
+    blocking pool, recording its latency and failures.
+    """
+    start = time.perf_counter()
+    with tracer.span(f"HTTP {request.method} {api_name}", kind=KIND_CLIENT, api=api_name, method=request.method):
+        try:
+            return await run_blocking(request.execute, http=authorized_http(credentials))
+        except Exception as e:
+            status = getattr(getattr(e, "resp", None), "status", None)
+            UPSTREAM_ERRORS.inc(api_name, request.method, str(status or type(e).__name__))
+            raise
+        finally:
+            UPSTREAM_DURATION.observe(time.perf_counter() - start, api_name, request.method)
+
+def warm_clients():
+    """Builds the Gemini client and Google API services used by the tools ahead of the first request."""
+    get_genai_client()
+    get_google_service('slides', 'v1')
+    print("✅ Gemini client and Google API services warmed up.")
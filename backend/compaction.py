@@ -0,0 +1,137 @@
+# backend/compaction.py
+import json
+from typing import List, Optional
+from google.adk.agents.callback_context import CallbackContext
+from google.adk.models import LlmRequest, LlmResponse
+from google.genai.types import Content, Part, FunctionResponse
+from .clients import generate_content
+from .config import (
+    MODEL_GEMINI_FLASH,
+    COMPACTION_ENABLED,
+    COMPACTION_TOKEN_BUDGET,
+    COMPACTION_MAX_CONTENTS,
+    COMPACTION_KEEP_RECENT,
+    COMPACTION_TOOL_PAYLOAD_MAX_CHARS
+)
+
+# Session state key holding the rolling summary of compacted history
+SUMMARY_STATE_KEY = "compaction_summary"
+PREVIEW_CHARS = 300
+# How ADK renders another agent's tool result when replaying it as context
+FOREIGN_TOOL_RESULT_MARKER = "tool returned result:"
+
+def estimate_tokens(contents: List[Content]) -> int:
+    """Rough token estimate (~4 characters per token) of the replayed history."""
+    return sum(len(_render_part(part)) for content in contents for part in (content.parts or [])) // 4
+
+def _render_part(part: Part) -> str:
+    if part.text:
+        return part.text
+    if part.function_call:
+        return f"[called tool {part.function_call.name} with {json.dumps(part.function_call.args, default=str)}]"
+    if part.function_response:
+        return f"[tool {part.function_response.name} returned {json.dumps(part.function_response.response, default=str)}]"
+    return ""
+
+def _strip_tool_payloads(contents: List[Content]):
+    """
+    Replaces large tool payloads (research reports, pitch decks, ...) with a
+    reference to the originating call and a short preview. The full payload
+    stays in the session's event log.
+    """
+    for content in contents:
+        for index, part in enumerate(content.parts or []):
+            if part.function_response:
+                payload = json.dumps(part.function_response.response, default=str)
+                if len(payload) > COMPACTION_TOOL_PAYLOAD_MAX_CHARS:
+                    content.parts[index] = Part(function_response=FunctionResponse(
+                        id=part.function_response.id,
+                        name=part.function_response.name,
+                        response={
+                            "omitted": True,
+                            "ref": f"tool_call:{part.function_response.id or part.function_response.name}",
+                            "preview": payload[:PREVIEW_CHARS],
+                        }
+                    ))
+            elif part.text and FOREIGN_TOOL_RESULT_MARKER in part.text and len(part.text) > COMPACTION_TOOL_PAYLOAD_MAX_CHARS:
+                content.parts[index] = Part(text=part.text[:PREVIEW_CHARS] + " ... [tool payload omitted from history]")
+
+def _find_split(contents: List[Content]) -> int:
+    """
+    Returns the index where verbatim history starts: at most COMPACTION_KEEP_RECENT
+    contents from the end, moved back to a plain user message so a function
+    response is never separated from its call.
+    """
+    split = max(0, len(contents) - COMPACTION_KEEP_RECENT)
+    while split > 0:
+        content = contents[split]
+        if content.role == "user" and not any(part.function_response for part in (content.parts or [])):
+            break
+        split -= 1
+    return split
+
+async def _summarize(previous_summary: Optional[str], contents: List[Content]) -> str:
+    transcript = "\n".join(
+        f"{content.role}: {' '.join(_render_part(part) for part in (content.parts or []))}"
+        for content in contents
+    )
+    prompt = (
+        "Summarize the following conversation between a user and a startup assistant so it can replace the original history. "
+        "Keep the user's startup ideas, decisions, names, emails, dates, file or slide links and any open requests. "
+        "Mention which tools were used and their key conclusions, but not their full output. "
+        "Be concise and factual.\n\n"
+    )
+    if previous_summary:
+        prompt += f"Summary of the conversation so far:\n{previous_summary}\n\n"
+    prompt += f"New conversation to fold into the summary:\n{transcript}"
+
+    response = await generate_content(MODEL_GEMINI_FLASH, prompt)
+    return response.text.strip()
+
+async def compact_history(callback_context: CallbackContext, llm_request: LlmRequest) -> Optional[LlmResponse]:
+    """
+    before_model_callback that bounds the history replayed to Gemini.
+    Older tool payloads are always replaced by references. Once the history
+    passes the token or content budget, everything before the recent window is
+    folded into a rolling summary stored in session state and reused on later calls.
+    """
+    if not COMPACTION_ENABLED or not llm_request.contents:
+        return None
+
+    contents = llm_request.contents
+    split = _find_split(contents)
+    older, recent = contents[:split], contents[split:]
+    _strip_tool_payloads(older)
+
+    # Every agent in the session replays the same event log, so the summary is shared between them
+    cached = callback_context.state.get(SUMMARY_STATE_KEY) or {}
+    covered = cached.get("covered", 0)
+    summary = cached.get("summary") if covered else None
+    if covered > len(older):
+        # History was rebuilt differently (e.g. a new branch); start over
+        covered, summary = 0, None
+
+    uncovered = older[covered:]
+    replayed = uncovered + recent
+    over_budget = (
+        len(replayed) > COMPACTION_MAX_CONTENTS
+        or estimate_tokens(replayed) > COMPACTION_TOKEN_BUDGET
+    )
+
+    if over_budget and uncovered:
+        try:
+            summary = await _summarize(summary, uncovered)
+            covered = len(older)
+            callback_context.state[SUMMARY_STATE_KEY] = {"covered": covered, "summary": summary}
+            print(f"--- Compaction: summarized {covered} history contents for '{callback_context.agent_name}' ---")
+        except Exception as e:
+            print(f"--- Compaction ERROR: Failed to summarize history, sending it uncompacted. Error: {e} ---")
+            llm_request.contents = older + recent
+            return None
+
+    if summary:
+        summary_content = Content(role="user", parts=[Part(text=f"Summary of the earlier conversation:\n{summary}")])
+        llm_request.contents = [summary_content] + older[covered:] + recent
+    else:
+        llm_request.contents = older + recent
+    return None
@@ -1,5 +1,188 @@
 # backend/config.py
+import os
 
 # --- Constants for LLM models ---
 MODEL_GEMINI_PRO = "gemini-2.5-pro"
-MODEL_GEMINI_FLASH = "gemini-2.5-flash"
\ No newline at end of file
+MODEL_GEMINI_FLASH = "gemini-2.5-flash"
+# Override to send Gemini calls (agents and tools) to a local stand-in, e.g. the benchmark stub server
+GEMINI_API_BASE_URL = os.getenv("GEMINI_API_BASE_URL", "")
+
+# --- Tool concurrency limits ---
+# Maximum number of pitch deck sections generated in parallel by get_pitch
+PITCH_SECTION_CONCURRENCY = int(os.getenv("PITCH_SECTION_CONCURRENCY", "4"))
+
+# --- Shared HTTP client and blocking I/O pool ---
+# Keep-alive connection pool used for Google REST endpoints (Drive, Calendar)
+HTTP_MAX_CONNECTIONS = int(os.getenv("HTTP_MAX_CONNECTIONS", "100"))
+HTTP_MAX_KEEPALIVE_CONNECTIONS = int(os.getenv("HTTP_MAX_KEEPALIVE_CONNECTIONS", "20"))
+HTTP_TIMEOUT_SECONDS = float(os.getenv("HTTP_TIMEOUT_SECONDS", "30"))
+# Worker threads for blocking client libraries (e.g. googleapiclient .execute())
+BLOCKING_IO_POOL_SIZE = int(os.getenv("BLOCKING_IO_POOL_SIZE", "16"))
+
+# --- LLM response cache (get_research, get_validator) ---
+LLM_CACHE_ENABLED = os.getenv("LLM_CACHE_ENABLED", "true").lower() == "true"
+LLM_CACHE_DB_PATH = os.getenv("LLM_CACHE_DB_PATH", os.path.join(".cache", "llm_cache.sqlite3"))
+LLM_CACHE_MEMORY_ENTRIES = int(os.getenv("LLM_CACHE_MEMORY_ENTRIES", "256"))
+LLM_CACHE_DISK_ENTRIES = int(os.getenv("LLM_CACHE_DISK_ENTRIES", "5000"))
+LLM_CACHE_TTL_SECONDS = int(os.getenv("LLM_CACHE_TTL_SECONDS", str(7 * 24 * 3600)))
+
+# --- Local intent routing in front of the coordinator ---
+# When enabled, confidently classified queries skip the coordinator's LLM call
+LOCAL_ROUTER_ENABLED = os.getenv("LOCAL_ROUTER_ENABLED", "false").lower() == "true"
+LOCAL_ROUTER_MIN_CONFIDENCE = float(os.getenv("LOCAL_ROUTER_MIN_CONFIDENCE", "0.75"))
+
+# --- Session history compaction ---
+COMPACTION_ENABLED = os.getenv("COMPACTION_ENABLED", "true").lower() == "true"
+# Summarize older history once the replayed context passes either budget
+COMPACTION_TOKEN_BUDGET = int(os.getenv("COMPACTION_TOKEN_BUDGET", "24000"))
+COMPACTION_MAX_CONTENTS = int(os.getenv("COMPACTION_MAX_CONTENTS", "40"))
+# Most recent contents that are always replayed verbatim
+COMPACTION_KEEP_RECENT = int(os.getenv("COMPACTION_KEEP_RECENT", "8"))
+# Older tool payloads above this size are replaced by a reference and a short preview
+COMPACTION_TOOL_PAYLOAD_MAX_CHARS = int(os.getenv("COMPACTION_TOOL_PAYLOAD_MAX_CHARS", "2000"))
+
+# --- Persistent state backend (sessions, session state, OAuth tokens) ---
+# "memory" keeps everything in-process (single worker only); "sqlite" persists to STATE_DB_PATH
+STATE_BACKEND = os.getenv("STATE_BACKEND", "memory").lower()
+STATE_DB_PATH = os.getenv("STATE_DB_PATH", os.path.join(".data", "venture_assist.sqlite3"))
+SQLITE_POOL_SIZE = int(os.getenv("SQLITE_POOL_SIZE", "8"))
+
+# --- Authentication (browser sessions and the Google OAuth flow) ---
+# Signs session cookies and the OAuth `state`; use the same value on every worker. A random key is used when unset.
+AUTH_SECRET_KEY = os.getenv("AUTH_SECRET_KEY", "")
+AUTH_SESSION_MAX_AGE_SECONDS = int(os.getenv("AUTH_SESSION_MAX_AGE_SECONDS", str(30 * 24 * 3600)))
+# The frontend calls the backend cross-site, which needs SameSite=None cookies (and those must be Secure)
+AUTH_COOKIE_SECURE = os.getenv("AUTH_COOKIE_SECURE", "true").lower() == "true"
+AUTH_COOKIE_SAMESITE = os.getenv("AUTH_COOKIE_SAMESITE", "none").lower()
+# Bearer token for operator endpoints (DELETE /cache, ...); they are disabled while it is unset
+AUTH_ADMIN_TOKEN = os.getenv("AUTH_ADMIN_TOKEN", "")
+
+# --- OAuth credential refresh ---
+# Access tokens are refreshed in the background this long before they expire
+CREDENTIAL_REFRESH_MARGIN_SECONDS = int(os.getenv("CREDENTIAL_REFRESH_MARGIN_SECONDS", "300"))
+CREDENTIAL_REFRESH_CHECK_SECONDS = int(os.getenv("CREDENTIAL_REFRESH_CHECK_SECONDS", "30"))
+# Users who have not used their credentials for this long are dropped from memory (tokens stay in the store)
+CREDENTIAL_IDLE_SECONDS = int(os.getenv("CREDENTIAL_IDLE_SECONDS", "3600"))
+
+# --- Chunked (map-reduce) summarization in get_summary ---
+# Inputs longer than the threshold are split into chunks summarized in parallel
+SUMMARY_CHUNK_THRESHOLD_CHARS = int(os.getenv("SUMMARY_CHUNK_THRESHOLD_CHARS", "20000"))
+SUMMARY_CHUNK_CHARS = int(os.getenv("SUMMARY_CHUNK_CHARS", "12000"))
+SUMMARY_CHUNK_CONCURRENCY = int(os.getenv("SUMMARY_CHUNK_CONCURRENCY", "4"))
+# Rounds of re-summarizing partial summaries before they are cut to fit the final merge
+SUMMARY_MAX_REDUCE_ROUNDS = int(os.getenv("SUMMARY_MAX_REDUCE_ROUNDS", "3"))
+
+# --- Background jobs for long-running agent turns ---
+JOB_WORKERS = int(os.getenv("JOB_WORKERS", "4"))
+JOB_QUEUE_SIZE = int(os.getenv("JOB_QUEUE_SIZE", "100"))
+# Finished jobs (and their results) are kept this long for clients to collect
+JOB_RETENTION_SECONDS = int(os.getenv("JOB_RETENTION_SECONDS", "3600"))
+JOB_MAX_PROGRESS_EVENTS = int(os.getenv("JOB_MAX_PROGRESS_EVENTS", "200"))
+
+# --- Batch idea screening (/validate/batch) ---
+BATCH_VALIDATE_MAX_IDEAS = int(os.getenv("BATCH_VALIDATE_MAX_IDEAS", "500"))
+BATCH_VALIDATE_CONCURRENCY = int(os.getenv("BATCH_VALIDATE_CONCURRENCY", "8"))
+# Sustained validator calls per second across all batches (bursts up to the concurrency limit)
+BATCH_VALIDATE_RATE_PER_SECOND = float(os.getenv("BATCH_VALIDATE_RATE_PER_SECOND", "2"))
+if BATCH_VALIDATE_CONCURRENCY < 1 or BATCH_VALIDATE_RATE_PER_SECOND <= 0:
+    # The batch token bucket would never refill (or never hold a token) and batches would hang
+    raise ValueError("BATCH_VALIDATE_CONCURRENCY must be at least 1 and BATCH_VALIDATE_RATE_PER_SECOND greater than 0.")
+
+# --- Meeting scheduling ---
+# Time zone assumed when the user's phrase does not name one
+MEETING_DEFAULT_TIMEZONE = os.getenv("MEETING_DEFAULT_TIMEZONE", "UTC")
+MEETING_BUSINESS_HOURS_START = int(os.getenv("MEETING_BUSINESS_HOURS_START", "9"))
+MEETING_BUSINESS_HOURS_END = int(os.getenv("MEETING_BUSINESS_HOURS_END", "17"))
+# Candidate slots checked against free/busy before booking
+MEETING_CANDIDATE_SLOTS = int(os.getenv("MEETING_CANDIDATE_SLOTS", "8"))
+FREEBUSY_CACHE_SECONDS = int(os.getenv("FREEBUSY_CACHE_SECONDS", "60"))
+FREEBUSY_CACHE_MAX_USERS = int(os.getenv("FREEBUSY_CACHE_MAX_USERS", "1000"))
+
+# --- Google REST endpoints ---
+# Override to point Drive/Calendar/Slides calls at a local stand-in
+DEFAULT_GOOGLE_API_BASE_URL = "https://www.googleapis.com"
+GOOGLE_API_BASE_URL = os.getenv("GOOGLE_API_BASE_URL", DEFAULT_GOOGLE_API_BASE_URL).rstrip("/")
+
+# --- Drive uploads ---
+# Content larger than this is sent with a resumable upload in chunks (multiples of 256 KiB)
+DRIVE_RESUMABLE_THRESHOLD_BYTES = int(os.getenv("DRIVE_RESUMABLE_THRESHOLD_BYTES", str(5 * 1024 * 1024)))
+DRIVE_RESUMABLE_CHUNK_BYTES = int(os.getenv("DRIVE_RESUMABLE_CHUNK_BYTES", str(8 * 256 * 1024)))
+DRIVE_OUTBOX_POLL_SECONDS = int(os.getenv("DRIVE_OUTBOX_POLL_SECONDS", "15"))
+DRIVE_OUTBOX_BASE_DELAY_SECONDS = int(os.getenv("DRIVE_OUTBOX_BASE_DELAY_SECONDS", "10"))
+DRIVE_OUTBOX_MAX_DELAY_SECONDS = int(os.getenv("DRIVE_OUTBOX_MAX_DELAY_SECONDS", "900"))
+DRIVE_OUTBOX_MAX_ATTEMPTS = int(os.getenv("DRIVE_OUTBOX_MAX_ATTEMPTS", "8"))
+
+# --- Tracing ---
+# Fraction of turns traced (head-based sampling); 0 disables tracing
+TRACING_SAMPLE_RATE = float(os.getenv("TRACING_SAMPLE_RATE", "0.1"))
+# "none" keeps traces in memory for /traces only; "json" appends them to a file; "otlp" posts OTLP/JSON to a collector
+TRACING_EXPORTER = os.getenv("TRACING_EXPORTER", "none").lower()
+TRACING_JSON_PATH = os.getenv("TRACING_JSON_PATH", ".data/traces.jsonl")
+TRACING_OTLP_ENDPOINT = os.getenv("TRACING_OTLP_ENDPOINT", "http://localhost:4318/v1/traces")
+TRACING_MAX_TRACES = int(os.getenv("TRACING_MAX_TRACES", "200"))
+TRACING_MAX_SPANS_PER_TRACE = int(os.getenv("TRACING_MAX_SPANS_PER_TRACE", "2000"))
+
+# --- Admission control ---
+# Turns (/chat, /chat/stream) running at once; further turns wait in a short queue
+ADMISSION_MAX_CONCURRENT_TURNS = int(os.getenv("ADMISSION_MAX_CONCURRENT_TURNS", "32"))
+# Turns allowed to wait for a slot; beyond this, requests are rejected with 429 right away
+ADMISSION_MAX_QUEUED_TURNS = int(os.getenv("ADMISSION_MAX_QUEUED_TURNS", "64"))
+ADMISSION_QUEUE_TIMEOUT_SECONDS = float(os.getenv("ADMISSION_QUEUE_TIMEOUT_SECONDS", "5"))
+# Per-user turn rate (chat, stream and jobs together), with bursts up to ADMISSION_USER_BURST
+ADMISSION_USER_TURNS_PER_MINUTE = float(os.getenv("ADMISSION_USER_TURNS_PER_MINUTE", "20"))
+ADMISSION_USER_BURST = int(os.getenv("ADMISSION_USER_BURST", "5"))
+# Gemini calls per second per model tier, shared by agents and tools; 0 disables the limit
+ADMISSION_PRO_CALLS_PER_SECOND = float(os.getenv("ADMISSION_PRO_CALLS_PER_SECOND", "2"))
+ADMISSION_PRO_BURST = int(os.getenv("ADMISSION_PRO_BURST", "10"))
+ADMISSION_FLASH_CALLS_PER_SECOND = float(os.getenv("ADMISSION_FLASH_CALLS_PER_SECOND", "15"))
+ADMISSION_FLASH_BURST = int(os.getenv("ADMISSION_FLASH_BURST", "30"))
+# Longest a model call waits for its tier's bucket before the turn is shed
+ADMISSION_MODEL_WAIT_SECONDS = float(os.getenv("ADMISSION_MODEL_WAIT_SECONDS", "10"))
+# Users whose rate-limit buckets are kept in memory (least recently seen are dropped first)
+ADMISSION_MAX_TRACKED_USERS = int(os.getenv("ADMISSION_MAX_TRACKED_USERS", "10000"))
+
+# --- Resilient Gemini calls (tools) ---
+# Each attempt is abandoned after this long; the whole call, retries included, after the deadline
+GEMINI_ATTEMPT_TIMEOUT_SECONDS = float(os.getenv("GEMINI_ATTEMPT_TIMEOUT_SECONDS", "60"))
+GEMINI_CALL_DEADLINE_SECONDS = float(os.getenv("GEMINI_CALL_DEADLINE_SECONDS", "120"))
+GEMINI_MAX_ATTEMPTS = int(os.getenv("GEMINI_MAX_ATTEMPTS", "3"))
+# Full-jitter exponential backoff between attempts
+GEMINI_RETRY_BASE_DELAY_SECONDS = float(os.getenv("GEMINI_RETRY_BASE_DELAY_SECONDS", "0.5"))
+GEMINI_RETRY_MAX_DELAY_SECONDS = float(os.getenv("GEMINI_RETRY_MAX_DELAY_SECONDS", "8"))
+# A second request is sent when the first is slower than this quantile of recent latencies
+GEMINI_HEDGING_ENABLED = os.getenv("GEMINI_HEDGING_ENABLED", "true").lower() == "true"
+GEMINI_HEDGE_QUANTILE = float(os.getenv("GEMINI_HEDGE_QUANTILE", "0.95"))
+GEMINI_HEDGE_MIN_SAMPLES = int(os.getenv("GEMINI_HEDGE_MIN_SAMPLES", "20"))
+GEMINI_HEDGE_MIN_DELAY_SECONDS = float(os.getenv("GEMINI_HEDGE_MIN_DELAY_SECONDS", "0.5"))
+GEMINI_LATENCY_WINDOW = int(os.getenv("GEMINI_LATENCY_WINDOW", "200"))
+# Consecutive retryable failures that open a model's circuit, and how long it stays open
+GEMINI_BREAKER_FAILURE_THRESHOLD = int(os.getenv("GEMINI_BREAKER_FAILURE_THRESHOLD", "5"))
+GEMINI_BREAKER_COOLDOWN_SECONDS = float(os.getenv("GEMINI_BREAKER_COOLDOWN_SECONDS", "30"))
+
+# --- Adaptive model tiering (agents) ---
+# Lets agents configured for Pro fall back to Flash per call; Flash agents are never upgraded
+TIERING_ENABLED = os.getenv("TIERING_ENABLED", "true").lower() == "true"
+# Turn latency budget applied when the request does not pass one; 0 means no budget
+TIERING_DEFAULT_LATENCY_BUDGET_MS = int(os.getenv("TIERING_DEFAULT_LATENCY_BUDGET_MS", "0"))
+# Prompts larger than this (estimated tokens) go to Flash
+TIERING_MAX_PRO_INPUT_TOKENS = int(os.getenv("TIERING_MAX_PRO_INPUT_TOKENS", "32000"))
+# Pro counts as saturated when its rate-limit wait or recent error rate exceeds these
+TIERING_PRO_MAX_WAIT_SECONDS = float(os.getenv("TIERING_PRO_MAX_WAIT_SECONDS", "2"))
+TIERING_PRO_MAX_ERROR_RATE = float(os.getenv("TIERING_PRO_MAX_ERROR_RATE", "0.2"))
+# Weight of the newest observation in the per-model latency and error averages
+TIERING_EWMA_ALPHA = float(os.getenv("TIERING_EWMA_ALPHA", "0.2"))
+TIERING_MIN_SAMPLES = int(os.getenv("TIERING_MIN_SAMPLES", "5"))
+
+# --- Speculative prefetch (validator -> research -> pitch) ---
+PREFETCH_ENABLED = os.getenv("PREFETCH_ENABLED", "false").lower() == "true"
+# Prefetched results are served for this long, and dropped (in flight or not) once the session is idle this long
+PREFETCH_TTL_SECONDS = int(os.getenv("PREFETCH_TTL_SECONDS", "300"))
+PREFETCH_IDLE_SECONDS = int(os.getenv("PREFETCH_IDLE_SECONDS", "120"))
+# Budget: prefetches per session, running at once, and started per minute across all sessions
+PREFETCH_MAX_PER_SESSION = int(os.getenv("PREFETCH_MAX_PER_SESSION", "4"))
+PREFETCH_MAX_CONCURRENT = int(os.getenv("PREFETCH_MAX_CONCURRENT", "2"))
+PREFETCH_RATE_PER_MINUTE = float(os.getenv("PREFETCH_RATE_PER_MINUTE", "30"))
+# Head start left to the current turn before a prefetch begins
+PREFETCH_DELAY_SECONDS = float(os.getenv("PREFETCH_DELAY_SECONDS", "1"))
+# Word overlap (Jaccard) needed between the prefetched and the requested idea/topic
+PREFETCH_MATCH_THRESHOLD = float(os.getenv("PREFETCH_MATCH_THRESHOLD", "0.6"))
@@ -0,0 +1,210 @@
+# backend/credentials.py
+import asyncio
+import heapq
+import time
+from datetime import datetime, timedelta
+from typing import Dict, List, Optional, Tuple
+from google.auth.exceptions import RefreshError
+from google.auth.transport.requests import Request as GoogleAuthRequest
+from google.oauth2.credentials import Credentials
+from .clients import run_blocking
+from .config import CREDENTIAL_REFRESH_MARGIN_SECONDS, CREDENTIAL_REFRESH_CHECK_SECONDS, CREDENTIAL_IDLE_SECONDS
+from .state import user_tokens_store
+
+def credentials_to_dict(credentials: Credentials) -> dict:
+    return {
+        "token": credentials.token,
+        "refresh_token": credentials.refresh_token,
+        "token_uri": credentials.token_uri,
+        "client_id": credentials.client_id,
+        "client_secret": credentials.client_secret,
+        "scopes": credentials.scopes,
+        "expiry": credentials.expiry.isoformat() if credentials.expiry else None
+    }
+
+def credentials_from_dict(tokens: dict) -> Credentials:
+    expiry = tokens.get("expiry")
+    return Credentials(
+        token=tokens.get("token"),
+        refresh_token=tokens.get("refresh_token"),
+        token_uri=tokens.get("token_uri"),
+        client_id=tokens.get("client_id"),
+        client_secret=tokens.get("client_secret"),
+        scopes=tokens.get("scopes"),
+        # google-auth compares expiry against naive UTC datetimes
+        expiry=datetime.fromisoformat(expiry).replace(tzinfo=None) if expiry else None
+    )
+
+class CredentialManager:
+    """
+    Keeps one `Credentials` object per user, indexed by expiry, and refreshes
+    access tokens in the background shortly before they lapse using the stored
+    refresh token. Concurrent refreshes for the same user share one request.
+    Refreshed tokens are written back to `user_tokens_store`.
+
+    The store is shared with other workers, so it is re-read before each
+    refresh, and tokens are only deleted if they still hold the refresh token
+    that was rejected. Users idle for `idle_seconds` are dropped from memory
+    and reloaded from the store on their next request.
+    """
+
+    def __init__(self, token_store, refresh_margin_seconds: int, check_interval_seconds: int, idle_seconds: int):
+        self._token_store = token_store
+        self._refresh_margin = timedelta(seconds=refresh_margin_seconds)
+        self._check_interval = check_interval_seconds
+        self._idle_seconds = idle_seconds
+        self._credentials: Dict[str, Credentials] = {}
+        self._last_used: Dict[str, float] = {}
+        self._expiry_heap: List[Tuple[datetime, str]] = []
+        self._refreshing: Dict[str, asyncio.Task] = {}
+        self._refresh_task: Optional[asyncio.Task] = None
+
+    def _track(self, user_id: str, credentials: Credentials):
+        self._credentials[user_id] = credentials
+        self._last_used.setdefault(user_id, time.monotonic())
+        if credentials.expiry and credentials.refresh_token:
+            heapq.heappush(self._expiry_heap, (credentials.expiry, user_id))
+
+    def _untrack(self, user_id: str):
+        # Heap entries of untracked users are skipped when they come due
+        self._credentials.pop(user_id, None)
+        self._last_used.pop(user_id, None)
+
+    def _sweep_idle(self):
+        cutoff = time.monotonic() - self._idle_seconds
+        for user_id in [user_id for user_id, last_used in self._last_used.items() if last_used < cutoff]:
+            self._untrack(user_id)
+
+    def _needs_refresh(self, credentials: Credentials) -> bool:
+        if not credentials.token:
+            return True
+        if credentials.expiry is None:
+            return False
+        return credentials.expiry - self._refresh_margin <= datetime.utcnow()
+
+    async def store(self, user_id: str, credentials: Credentials):
+        """Saves freshly issued credentials (e.g. from the OAuth callback)."""
+        await self._token_store.save(user_id, credentials_to_dict(credentials))
+        self._track(user_id, credentials)
+        self._last_used[user_id] = time.monotonic()
+
+    async def forget(self, user_id: str):
+        self._untrack(user_id)
+        await self._token_store.discard(user_id)
+
+    async def get_credentials(self, user_id: str) -> Optional[Credentials]:
+        """
+        Returns valid credentials for the user, or None if the user has not
+        authorized (or authorization was revoked).
+        """
+        credentials = self._credentials.get(user_id)
+        if credentials is None:
+            tokens = await self._token_store.load(user_id)
+            if not tokens or "token" not in tokens:
+                return None
+            credentials = credentials_from_dict(tokens)
+            self._track(user_id, credentials)
+        self._last_used[user_id] = time.monotonic()
+
+        if self._needs_refresh(credentials):
+            if not credentials.refresh_token:
+                return credentials if credentials.valid else None
+            return await self.refresh(user_id)
+        return credentials
+
+    async def get_token(self, user_id: str) -> Optional[str]:
+        credentials = await self.get_credentials(user_id)
+        return credentials.token if credentials else None
+
+    async def refresh(self, user_id: str) -> Optional[Credentials]:
+        task = self._refreshing.get(user_id)
+        if task is None:
+            task = asyncio.ensure_future(self._refresh(user_id))
+            self._refreshing[user_id] = task
+            task.add_done_callback(lambda _: self._refreshing.pop(user_id, None))
+        return await asyncio.shield(task)
+
+    async def _reload(self, user_id: str) -> Optional[Credentials]:
+        """Replaces the user's cached credentials with the stored ones (None if there are none)."""
+        tokens = await self._token_store.load(user_id)
+        if not tokens or "token" not in tokens:
+            self._untrack(user_id)
+            return None
+        credentials = credentials_from_dict(tokens)
+        self._track(user_id, credentials)
+        return credentials
+
+    async def _refresh(self, user_id: str) -> Optional[Credentials]:
+        if user_id not in self._credentials:
+            return None
+        # Another worker may have refreshed the tokens, or the user re-authorized, since they were loaded
+        credentials = await self._reload(user_id)
+        if credentials is None:
+            return None
+        if not self._needs_refresh(credentials):
+            return credentials
+        if not credentials.refresh_token:
+            return credentials if credentials.valid else None
+
+        failed_refresh_token = credentials.refresh_token
+        try:
+            await run_blocking(credentials.refresh, GoogleAuthRequest())
+        except RefreshError as e:
+            # The refresh token was revoked or expired: the user has to authorize again,
+            # unless new tokens were stored in the meantime
+            if await self._token_store.discard(user_id, refresh_token=failed_refresh_token):
+                print(f"--- Credentials: refresh rejected for user '{user_id}', forgetting tokens. Error: {e} ---")
+                self._untrack(user_id)
+                return None
+            print(f"--- Credentials: refresh rejected for user '{user_id}', but newer tokens were stored. Reloading. ---")
+            credentials = await self._reload(user_id)
+            return credentials if credentials is not None and credentials.valid else None
+        except Exception as e:
+            print(f"--- Credentials ERROR: Failed to refresh token for user '{user_id}'. Error: {e} ---")
+            return credentials if credentials.valid else None
+
+        print(f"--- Credentials: refreshed token for user '{user_id}', valid until {credentials.expiry} ---")
+        await self._token_store.save(user_id, credentials_to_dict(credentials))
+        self._track(user_id, credentials)
+        return credentials
+
+    async def _refresh_due(self):
+        self._sweep_idle()
+        now = datetime.utcnow()
+        due = []
+        while self._expiry_heap and self._expiry_heap[0][0] - self._refresh_margin <= now:
+            expiry, user_id = heapq.heappop(self._expiry_heap)
+            credentials = self._credentials.get(user_id)
+            # Skip stale heap entries left behind by an earlier refresh
+            if credentials is not None and credentials.expiry == expiry and user_id not in due:
+                due.append(user_id)
+        if due:
+            await asyncio.gather(*(self.refresh(user_id) for user_id in due), return_exceptions=True)
+
+    async def _refresh_loop(self):
+        while True:
+            try:
+                await self._refresh_due()
+            except Exception as e:
+                print(f"--- Credentials ERROR: Background refresh failed. Error: {e} ---")
+            await asyncio.sleep(self._check_interval)
+
+    def start(self):
+        if self._refresh_task is None:
+            self._refresh_task = asyncio.create_task(self._refresh_loop())
+
+    async def stop(self):
+        if self._refresh_task is not None:
+            self._refresh_task.cancel()
+            try:
+                await self._refresh_task
+            except asyncio.CancelledError:
+                pass
+            self._refresh_task = None
+
+credential_manager = CredentialManager(
+    user_tokens_store,
+    refresh_margin_seconds=CREDENTIAL_REFRESH_MARGIN_SECONDS,
+    check_interval_seconds=CREDENTIAL_REFRESH_CHECK_SECONDS,
+    idle_seconds=CREDENTIAL_IDLE_SECONDS
+)
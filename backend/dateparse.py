@@ -0,0 +1,212 @@
+# backend/dateparse.py
+import re
+from datetime import date, datetime, time, timedelta, timezone
+from typing import List, Optional, Tuple
+from zoneinfo import ZoneInfo, ZoneInfoNotFoundError
+from .config import (
+    MEETING_DEFAULT_TIMEZONE,
+    MEETING_BUSINESS_HOURS_START,
+    MEETING_BUSINESS_HOURS_END
+)
+
+Slot = Tuple[datetime, datetime]
+
+SLOT_DURATION = timedelta(hours=1)
+
+WEEKDAYS = ["monday", "tuesday", "wednesday", "thursday", "friday", "saturday", "sunday"]
+MONTHS = [
+    "january", "february", "march", "april", "may", "june",
+    "july", "august", "september", "october", "november", "december"
+]
+MONTH_PATTERN = r"(jan(?:uary)?|feb(?:ruary)?|mar(?:ch)?|apr(?:il)?|may|jun(?:e)?|jul(?:y)?|aug(?:ust)?|sep(?:t(?:ember)?)?|oct(?:ober)?|nov(?:ember)?|dec(?:ember)?)"
+WEEKDAY_PATTERN = r"(mon(?:day)?|tue(?:s(?:day)?)?|wed(?:nesday)?|thu(?:rs(?:day)?)?|fri(?:day)?|sat(?:urday)?|sun(?:day)?)"
+
+TIMEZONE_ABBREVIATIONS = {
+    "utc": "UTC", "gmt": "UTC", "z": "UTC",
+    "et": "America/New_York", "est": "America/New_York", "edt": "America/New_York",
+    "ct": "America/Chicago", "cst": "America/Chicago", "cdt": "America/Chicago",
+    "mt": "America/Denver", "mst": "America/Denver", "mdt": "America/Denver",
+    "pt": "America/Los_Angeles", "pst": "America/Los_Angeles", "pdt": "America/Los_Angeles",
+    "bst": "Europe/London", "cet": "Europe/Berlin", "cest": "Europe/Berlin",
+    "eet": "Europe/Helsinki", "eest": "Europe/Helsinki", "msk": "Europe/Moscow",
+    "ist": "Asia/Kolkata", "sgt": "Asia/Singapore", "jst": "Asia/Tokyo",
+    "aest": "Australia/Sydney", "aedt": "Australia/Sydney",
+}
+
+# Parts of the day as [start hour, end hour)
+DAY_PARTS = {
+    "morning": (9, 12),
+    "noon": (12, 13),
+    "midday": (12, 13),
+    "lunch": (12, 14),
+    "afternoon": (13, 17),
+    "evening": (17, 20),
+    "tonight": (18, 21),
+}
+
+def _resolve_timezone(text: str, original: str) -> ZoneInfo:
+    match = re.search(r"\b([A-Z][A-Za-z_]+/[A-Z][A-Za-z_]+(?:/[A-Za-z_]+)?)\b", original)
+    if match:
+        try:
+            return ZoneInfo(match.group(1))
+        except (ZoneInfoNotFoundError, ValueError):
+            pass
+    for token in re.findall(r"[a-z]+", text):
+        if token in TIMEZONE_ABBREVIATIONS and token != "z":
+            return ZoneInfo(TIMEZONE_ABBREVIATIONS[token])
+    return ZoneInfo(MEETING_DEFAULT_TIMEZONE)
+
+def _weekday_index(name: str) -> int:
+    return next(i for i, weekday in enumerate(WEEKDAYS) if weekday.startswith(name[:3]))
+
+def _month_index(name: str) -> int:
+    return next(i for i, month in enumerate(MONTHS) if month.startswith(name[:3])) + 1
+
+def _business_days(start: date, end: date) -> List[date]:
+    days = []
+    day = start
+    while day <= end:
+        if day.weekday() < 5:
+            days.append(day)
+        day += timedelta(days=1)
+    return days
+
+def _resolve_dates(text: str, today: date) -> Optional[List[date]]:
+    """Returns the candidate days named by the phrase, or None if no date is recognized."""
+    if "day after tomorrow" in text:
+        return [today + timedelta(days=2)]
+    if re.search(r"\b(today|tonight)\b", text):
+        return [today]
+    if re.search(r"\btomorrow\b", text):
+        return [today + timedelta(days=1)]
+
+    match = re.search(r"\bin (\d+|a|an|one|two|three) (day|week)s?\b", text)
+    if match:
+        amount = {"a": 1, "an": 1, "one": 1, "two": 2, "three": 3}.get(match.group(1))
+        amount = amount if amount is not None else int(match.group(1))
+        days = amount * (7 if match.group(2) == "week" else 1)
+        return [today + timedelta(days=days)]
+
+    match = re.search(r"\b(\d{4})-(\d{2})-(\d{2})\b", text)
+    if match:
+        try:
+            return [date(int(match.group(1)), int(match.group(2)), int(match.group(3)))]
+        except ValueError:
+            return None
+
+    match = (
+        re.search(rf"\b{MONTH_PATTERN}\.? (\d{{1,2}})(?:st|nd|rd|th)?(?:,? (\d{{4}}))?\b", text)
+        or re.search(rf"\b(\d{{1,2}})(?:st|nd|rd|th)?(?: of)? {MONTH_PATTERN}\.?(?:,? (\d{{4}}))?\b", text)
+    )
+    if match:
+        groups = match.groups()
+        month_name, day_number = (groups[0], groups[1]) if not groups[0].isdigit() else (groups[1], groups[0])
+        month, day_number = _month_index(month_name), int(day_number)
+        if groups[2]:
+            try:
+                return [date(int(groups[2]), month, day_number)]
+            except ValueError:
+                return None
+        # Without a year: the next time the date comes round (Feb 29 can be up to 8 years away)
+        for year in range(today.year, today.year + 9):
+            try:
+                resolved = date(year, month, day_number)
+            except ValueError:
+                continue
+            if resolved >= today:
+                return [resolved]
+        return None
+
+    match = re.search(rf"\b(next|this|coming)? ?{WEEKDAY_PATTERN}\b", text)
+    if match:
+        target = _weekday_index(match.group(2))
+        days_ahead = (target - today.weekday()) % 7
+        if days_ahead == 0 and match.group(1) != "next":
+            # Today's weekday: later today if the time has not passed yet, otherwise a week from today
+            return [today, today + timedelta(days=7)]
+        resolved = today + timedelta(days=days_ahead or 7)
+        # "next Tuesday" said early in the week means Tuesday of the following week
+        if match.group(1) == "next" and resolved.isocalendar()[1] == today.isocalendar()[1]:
+            resolved += timedelta(days=7)
+        return [resolved]
+
+    if re.search(r"\bnext week\b", text):
+        next_monday = today + timedelta(days=7 - today.weekday())
+        return _business_days(next_monday, next_monday + timedelta(days=4))
+    if re.search(r"\bthis week\b", text):
+        return _business_days(today, today + timedelta(days=6 - today.weekday()))
+
+    return None
+
+def _resolve_time(text: str) -> Tuple[Optional[time], Optional[Tuple[int, int]]]:
+    """Returns (exact start time, None) or (None, (start hour, end hour)) window; (None, None) if unspecified."""
+    match = re.search(r"\b(\d{1,2})(?::(\d{2}))? ?(am|pm|a\.m\.|p\.m\.)", text)
+    if match:
+        hour = int(match.group(1)) % 12
+        if match.group(3).startswith("p"):
+            hour += 12
+        minute = int(match.group(2) or 0)
+        if hour < 24 and minute < 60:
+            return time(hour, minute), None
+
+    match = re.search(r"\b(?:at )?([01]?\d|2[0-3]):([0-5]\d)\b", text)
+    if match:
+        return time(int(match.group(1)), int(match.group(2))), None
+
+    match = re.search(r"\bat (\d{1,2})\b(?!:)", text)
+    if match and 1 <= int(match.group(1)) <= 12:
+        hour = int(match.group(1))
+        # Bare "at 3" means business hours: 1-7 are afternoon times
+        return time(hour + 12 if hour < 8 else hour, 0), None
+
+    for part, window in DAY_PARTS.items():
+        if re.search(rf"\b{part}\b", text):
+            return None, window
+
+    return None, None
+
+def parse_meeting_slots(phrase: str, now: Optional[datetime] = None, max_slots: int = 3) -> Optional[List[Slot]]:
+    """
+    Turns a natural-language date phrase ("next Tuesday afternoon", "June 15th at 3pm PST",
+    "tomorrow") into up to `max_slots` one-hour slots in UTC, all in the future.
+    Without an explicit time, slots are placed within business hours.
+    Returns None when the phrase cannot be resolved locally.
+    """
+    original = phrase.strip()
+    text = original.lower()
+    now = now or datetime.now(timezone.utc)
+    tz = _resolve_timezone(text, original)
+    local_now = now.astimezone(tz)
+
+    exact_time, window = _resolve_time(text)
+    days = _resolve_dates(text, local_now.date())
+    if days is None:
+        if exact_time is None and window is None:
+            return None
+        # Only a time was given: the next day on which it is still in the future
+        days = [local_now.date(), local_now.date() + timedelta(days=1)]
+
+    if window is None:
+        window = (MEETING_BUSINESS_HOURS_START, MEETING_BUSINESS_HOURS_END)
+
+    slots: List[Slot] = []
+    for day in days:
+        if exact_time is not None:
+            starts = [datetime.combine(day, exact_time, tzinfo=tz)]
+        else:
+            starts = [datetime.combine(day, time(hour), tzinfo=tz) for hour in range(window[0], window[1])]
+        for start in starts:
+            if start <= local_now:
+                continue
+            start_utc = start.astimezone(timezone.utc)
+            slots.append((start_utc, start_utc + SLOT_DURATION))
+            if len(slots) >= max_slots:
+                return slots
+        if exact_time is not None and slots:
+            break
+
+    return slots or None
+
+def format_slot(slot: Slot) -> str:
+    start, end = slot
+    return f"{start.strftime('%Y-%m-%dT%H:%M:%SZ')} to {end.strftime('%Y-%m-%dT%H:%M:%SZ')}"
@@ -0,0 +1,414 @@
+# backend/drive.py
+import asyncio
+import hashlib
+import json
+import random
+import time
+from typing import Awaitable, Callable, Optional
+import httpx
+from .clients import get_http_client, run_blocking
+from .credentials import credential_manager
+from .storage import SQLiteConnectionPool, get_state_pool
+from .singleflight import SingleFlight
+from .config import (
+    GOOGLE_API_BASE_URL,
+    DRIVE_RESUMABLE_THRESHOLD_BYTES,
+    DRIVE_RESUMABLE_CHUNK_BYTES,
+    DRIVE_OUTBOX_POLL_SECONDS,
+    DRIVE_OUTBOX_BASE_DELAY_SECONDS,
+    DRIVE_OUTBOX_MAX_DELAY_SECONDS,
+    DRIVE_OUTBOX_MAX_ATTEMPTS
+)
+
+GOOGLE_DRIVE_FILES_ENDPOINT = f"{GOOGLE_API_BASE_URL}/drive/v3/files"
+GOOGLE_DRIVE_UPLOAD_ENDPOINT = f"{GOOGLE_API_BASE_URL}/upload/drive/v3/files"
+
+# In-request retries of a single resumable chunk before the upload goes to the outbox
+CHUNK_RETRIES = 3
+# Drive requires every chunk except the last to be a multiple of 256 KiB
+CHUNK_GRANULARITY = 256 * 1024
+
+RETRYABLE_STATUS_CODES = {401, 408, 429, 500, 502, 503, 504}
+
+# An outbox entry claimed by a worker becomes due again after this long if the worker stops mid-upload
+OUTBOX_CLAIM_SECONDS = 600
+
+def content_hash(data: bytes, mime_type: str) -> str:
+    return hashlib.sha256(mime_type.encode("utf-8") + b"\x00" + data).hexdigest()
+
+def is_retryable(error: Exception) -> bool:
+    """Network failures, throttling, server errors and expired tokens are worth retrying later."""
+    if isinstance(error, httpx.TransportError):
+        return True
+    if isinstance(error, httpx.HTTPStatusError):
+        return error.response.status_code in RETRYABLE_STATUS_CODES
+    return False
+
+def _range_end(response: httpx.Response) -> int:
+    """Returns the next byte offset to send, from a 308 response's `Range: bytes=0-N` header."""
+    header = response.headers.get("Range")
+    if not header:
+        return 0
+    return int(header.rsplit("-", 1)[1]) + 1
+
+class ResumableSessionExpired(Exception):
+    pass
+
+class DriveUploader:
+    """
+    Uploads files to Google Drive for a user.
+    - Identical content saved by the same user reuses the existing file
+      (sha256 of the content → file ID index in SQLite).
+    - Content above `resumable_threshold` is sent as a resumable upload in chunks,
+      resuming from the last acknowledged byte after a network error.
+    - Uploads that still fail with a retryable error are written to an outbox
+      that a background worker flushes with exponential backoff. Workers claim
+      entries before uploading them, so each entry is sent by one worker at a time.
+    Concurrent saves of the same content by the same user share one upload.
+    SQLite work runs on the blocking I/O pool.
+    """
+
+    def __init__(
+        self,
+        pool_factory: Callable[[], SQLiteConnectionPool],
+        resumable_threshold: int,
+        chunk_bytes: int,
+        poll_seconds: int,
+        base_delay_seconds: int,
+        max_delay_seconds: int,
+        max_attempts: int
+    ):
+        self._pool_factory = pool_factory
+        self._pool = None
+        self._resumable_threshold = resumable_threshold
+        self._chunk_bytes = max(CHUNK_GRANULARITY, chunk_bytes // CHUNK_GRANULARITY * CHUNK_GRANULARITY)
+        self._poll_seconds = poll_seconds
+        self._base_delay = base_delay_seconds
+        self._max_delay = max_delay_seconds
+        self._max_attempts = max_attempts
+        self._schema_ready = False
+        self._flights = SingleFlight()
+        self._flush_task: Optional[asyncio.Task] = None
+
+    def _connection(self):
+        # Opened lazily so importing the module never touches the filesystem
+        if self._pool is None:
+            self._pool = self._pool_factory()
+        if not self._schema_ready:
+            with self._pool.connection() as conn:
+                conn.execute(
+                    "CREATE TABLE IF NOT EXISTS drive_files ("
+                    "user_id TEXT NOT NULL, content_hash TEXT NOT NULL, file_id TEXT NOT NULL, "
+                    "file_name TEXT NOT NULL, created_at REAL NOT NULL, "
+                    "PRIMARY KEY (user_id, content_hash))"
+                )
+                conn.execute(
+                    "CREATE TABLE IF NOT EXISTS drive_outbox ("
+                    "id INTEGER PRIMARY KEY AUTOINCREMENT, user_id TEXT NOT NULL, content_hash TEXT NOT NULL, "
+                    "file_name TEXT NOT NULL, mime_type TEXT NOT NULL, content BLOB NOT NULL, "
+                    "session_uri TEXT, attempts INTEGER NOT NULL DEFAULT 0, next_attempt_at REAL NOT NULL, "
+                    "last_error TEXT, created_at REAL NOT NULL, UNIQUE (user_id, content_hash))"
+                )
+                conn.execute("CREATE INDEX IF NOT EXISTS idx_drive_outbox_due ON drive_outbox (next_attempt_at)")
+            self._schema_ready = True
+        return self._pool.connection()
+
+    # --- Dedup index ---
+    def _lookup(self, user_id: str, digest: str) -> Optional[str]:
+        with self._connection() as conn:
+            row = conn.execute(
+                "SELECT file_id FROM drive_files WHERE user_id = ? AND content_hash = ?", (user_id, digest)
+            ).fetchone()
+        return row[0] if row else None
+
+    def _remember(self, user_id: str, digest: str, file_id: str, file_name: str):
+        with self._connection() as conn:
+            conn.execute(
+                "INSERT OR REPLACE INTO drive_files (user_id, content_hash, file_id, file_name, created_at) "
+                "VALUES (?, ?, ?, ?, ?)",
+                (user_id, digest, file_id, file_name, time.time())
+            )
+
+    def _forget(self, user_id: str, digest: str):
+        with self._connection() as conn:
+            conn.execute("DELETE FROM drive_files WHERE user_id = ? AND content_hash = ?", (user_id, digest))
+
+    async def _file_exists(self, access_token: str, file_id: str) -> bool:
+        """Checks that an indexed file is still there; on doubt, assumes it is."""
+        try:
+            response = await get_http_client().get(
+                f"{GOOGLE_DRIVE_FILES_ENDPOINT}/{file_id}",
+                headers={"Authorization": f"Bearer {access_token}"},
+                params={"fields": "id,trashed"}
+            )
+        except httpx.TransportError:
+            return True
+        if response.status_code == 404:
+            return False
+        if response.is_success:
+            return not response.json().get("trashed", False)
+        return True
+
+    # --- Upload protocols ---
+    async def _upload_multipart(self, access_token: str, file_name: str, data: bytes, mime_type: str) -> str:
+        files = {
+            'metadata': ('metadata', json.dumps({'name': file_name, 'mimeType': mime_type}), 'application/json'),
+            'file': (file_name, data, mime_type)
+        }
+        response = await get_http_client().post(
+            f"{GOOGLE_DRIVE_UPLOAD_ENDPOINT}?uploadType=multipart",
+            headers={'Authorization': f'Bearer {access_token}'},
+            files=files
+        )
+        response.raise_for_status()
+        return response.json().get('id')
+
+    async def _start_resumable(self, access_token: str, file_name: str, size: int, mime_type: str) -> str:
+        response = await get_http_client().post(
+            f"{GOOGLE_DRIVE_UPLOAD_ENDPOINT}?uploadType=resumable",
+            headers={
+                "Authorization": f"Bearer {access_token}",
+                "X-Upload-Content-Type": mime_type,
+                "X-Upload-Content-Length": str(size)
+            },
+            json={"name": file_name, "mimeType": mime_type}
+        )
+        response.raise_for_status()
+        return response.headers["Location"]
+
+    async def _resumable_status(self, access_token: str, session_uri: str, size: int):
+        """Asks Drive how much of the upload it has. Returns (next_offset, file_id)."""
+        response = await get_http_client().put(
+            session_uri,
+            headers={"Authorization": f"Bearer {access_token}", "Content-Range": f"bytes */{size}"}
+        )
+        if response.status_code in (404, 410):
+            raise ResumableSessionExpired(session_uri)
+        if response.status_code == 308:
+            return _range_end(response), None
+        response.raise_for_status()
+        return size, response.json().get("id")
+
+    async def _upload_resumable(
+        self,
+        access_token: str,
+        file_name: str,
+        data: bytes,
+        mime_type: str,
+        session_uri: Optional[str] = None,
+        on_session: Optional[Callable[[str], Awaitable[None]]] = None
+    ) -> str:
+        size = len(data)
+        offset = 0
+        if session_uri:
+            try:
+                offset, file_id = await self._resumable_status(access_token, session_uri, size)
+                if file_id:
+                    return file_id
+                print(f"--- Drive: Resuming upload of '{file_name}' at byte {offset}/{size} ---")
+            except ResumableSessionExpired:
+                session_uri = None
+        if not session_uri:
+            session_uri = await self._start_resumable(access_token, file_name, size, mime_type)
+            if on_session:
+                await on_session(session_uri)
+
+        failures = 0
+        while True:
+            chunk = data[offset:offset + self._chunk_bytes]
+            headers = {
+                "Authorization": f"Bearer {access_token}",
+                "Content-Range": f"bytes {offset}-{offset + len(chunk) - 1}/{size}"
+            }
+            try:
+                response = await get_http_client().put(session_uri, headers=headers, content=chunk)
+                if response.status_code >= 500:
+                    response.raise_for_status()
+            except (httpx.TransportError, httpx.HTTPStatusError) as e:
+                failures += 1
+                if failures > CHUNK_RETRIES:
+                    raise
+                print(f"--- Drive: Chunk at byte {offset} failed ({e}), resuming ---")
+                await asyncio.sleep(min(2 ** failures, 10) * random.uniform(0.5, 1.0))
+                offset, file_id = await self._resumable_status(access_token, session_uri, size)
+                if file_id:
+                    return file_id
+                continue
+
+            if response.status_code == 308:
+                offset = _range_end(response)
+                continue
+            response.raise_for_status()
+            return response.json().get("id")
+
+    async def _upload(self, access_token: str, file_name: str, data: bytes, mime_type: str, session_uri=None, on_session=None) -> str:
+        if len(data) > self._resumable_threshold or session_uri:
+            return await self._upload_resumable(access_token, file_name, data, mime_type, session_uri, on_session)
+        return await self._upload_multipart(access_token, file_name, data, mime_type)
+
+    # --- Public API ---
+    async def save(self, user_id: str, access_token: str, file_name: str, content: str, mime_type: str = "text/plain") -> dict:
+        """
+        Saves `content` to the user's Drive.
+        Returns {"status": "existing" | "uploaded" | "queued", "file_id": ...}.
+        Non-retryable errors are raised to the caller.
+        """
+        data = content.encode("utf-8")
+        digest = content_hash(data, mime_type)
+        # Without this, two saves of the same content could both miss the index and upload twice
+        return await self._flights.do(
+            f"{digest}:{user_id}",
+            lambda: self._save(user_id, access_token, file_name, data, mime_type, digest)
+        )
+
+    async def _save(self, user_id: str, access_token: str, file_name: str, data: bytes, mime_type: str, digest: str) -> dict:
+        file_id = await run_blocking(self._lookup, user_id, digest)
+        if file_id:
+            if await self._file_exists(access_token, file_id):
+                print(f"--- Drive: Identical content already saved as {file_id}, skipping upload ---")
+                return {"status": "existing", "file_id": file_id}
+            await run_blocking(self._forget, user_id, digest)
+
+        session = {}
+
+        async def on_session(uri: str):
+            session["uri"] = uri
+
+        try:
+            file_id = await self._upload(access_token, file_name, data, mime_type, on_session=on_session)
+        except Exception as e:
+            if not is_retryable(e):
+                raise
+            print(f"--- Drive: Upload of '{file_name}' failed ({e}), moving it to the outbox ---")
+            await run_blocking(self._enqueue, user_id, digest, file_name, mime_type, data, session.get("uri"), str(e))
+            return {"status": "queued", "file_id": None}
+
+        if file_id:
+            await run_blocking(self._remember, user_id, digest, file_id, file_name)
+        return {"status": "uploaded", "file_id": file_id}
+
+    # --- Outbox ---
+    def _backoff(self, attempts: int) -> float:
+        delay = min(self._max_delay, self._base_delay * (2 ** max(0, attempts - 1)))
+        return delay * random.uniform(0.5, 1.0)
+
+    def _enqueue(self, user_id: str, digest: str, file_name: str, mime_type: str, data: bytes, session_uri: Optional[str], error: str):
+        now = time.time()
+        with self._connection() as conn:
+            conn.execute(
+                "INSERT INTO drive_outbox (user_id, content_hash, file_name, mime_type, content, session_uri, "
+                "attempts, next_attempt_at, last_error, created_at) VALUES (?, ?, ?, ?, ?, ?, 1, ?, ?, ?) "
+                "ON CONFLICT(user_id, content_hash) DO UPDATE SET "
+                "session_uri = COALESCE(excluded.session_uri, drive_outbox.session_uri), last_error = excluded.last_error",
+                (user_id, digest, file_name, mime_type, data, session_uri, now + self._backoff(1), error, now)
+            )
+
+    def _pending(self, user_id: Optional[str]) -> int:
+        with self._connection() as conn:
+            if user_id is None:
+                return conn.execute("SELECT COUNT(*) FROM drive_outbox").fetchone()[0]
+            return conn.execute("SELECT COUNT(*) FROM drive_outbox WHERE user_id = ?", (user_id,)).fetchone()[0]
+
+    async def pending(self, user_id: Optional[str] = None) -> int:
+        return await run_blocking(self._pending, user_id)
+
+    def _due_ids(self, now: float):
+        with self._connection() as conn:
+            rows = conn.execute(
+                "SELECT id FROM drive_outbox WHERE next_attempt_at <= ? ORDER BY next_attempt_at LIMIT 20", (now,)
+            ).fetchall()
+        return [row[0] for row in rows]
+
+    def _claim(self, entry_id: int, now: float):
+        """Pushes a due entry's next attempt past the claim window; returns the entry, or None if another worker got it first."""
+        with self._connection() as conn:
+            cursor = conn.execute(
+                "UPDATE drive_outbox SET next_attempt_at = ? WHERE id = ? AND next_attempt_at <= ?",
+                (now + OUTBOX_CLAIM_SECONDS, entry_id, now)
+            )
+            if cursor.rowcount != 1:
+                return None
+            return conn.execute(
+                "SELECT id, user_id, content_hash, file_name, mime_type, content, session_uri, attempts "
+                "FROM drive_outbox WHERE id = ?", (entry_id,)
+            ).fetchone()
+
+    def _set_session(self, entry_id: int, uri: str):
+        with self._connection() as conn:
+            conn.execute("UPDATE drive_outbox SET session_uri = ? WHERE id = ?", (uri, entry_id))
+
+    def _record_failure(self, entry_id: int, attempts: int, give_up: bool, error: str):
+        with self._connection() as conn:
+            if give_up:
+                conn.execute("DELETE FROM drive_outbox WHERE id = ?", (entry_id,))
+            else:
+                conn.execute(
+                    "UPDATE drive_outbox SET attempts = ?, next_attempt_at = ?, last_error = ? WHERE id = ?",
+                    (attempts, time.time() + self._backoff(attempts), error, entry_id)
+                )
+
+    def _complete(self, entry_id: int, user_id: str, digest: str, file_id: Optional[str], file_name: str):
+        with self._connection() as conn:
+            conn.execute("DELETE FROM drive_outbox WHERE id = ?", (entry_id,))
+        if file_id:
+            self._remember(user_id, digest, file_id, file_name)
+
+    async def _flush_entry(self, row):
+        entry_id, user_id, digest, file_name, mime_type, data, session_uri, attempts = row
+
+        async def set_session(uri: str):
+            await run_blocking(self._set_session, entry_id, uri)
+
+        try:
+            access_token = await credential_manager.get_token(user_id)
+            if not access_token:
+                raise RuntimeError("no valid Google access token")
+            file_id = await self._upload(access_token, file_name, bytes(data), mime_type, session_uri, set_session)
+        except Exception as e:
+            attempts += 1
+            give_up = attempts >= self._max_attempts or (isinstance(e, httpx.HTTPStatusError) and not is_retryable(e))
+            await run_blocking(self._record_failure, entry_id, attempts, give_up, str(e))
+            if give_up:
+                print(f"❌ Drive outbox: Giving up on '{file_name}' for user '{user_id}' after {attempts} attempts: {e}")
+            return
+
+        await run_blocking(self._complete, entry_id, user_id, digest, file_id, file_name)
+        print(f"✅ Drive outbox: Uploaded '{file_name}' for user '{user_id}' as {file_id}")
+
+    async def flush_due(self):
+        for entry_id in await run_blocking(self._due_ids, time.time()):
+            # Claimed one at a time, right before its upload, so other workers can take the rest
+            row = await run_blocking(self._claim, entry_id, time.time())
+            if row is not None:
+                await self._flush_entry(row)
+
+    async def _flush_loop(self):
+        while True:
+            try:
+                await self.flush_due()
+            except Exception as e:
+                print(f"--- Drive ERROR: Outbox flush failed. Error: {e} ---")
+            await asyncio.sleep(self._poll_seconds)
+
+    def start(self):
+        if self._flush_task is None:
+            self._flush_task = asyncio.create_task(self._flush_loop())
+
+    async def stop(self):
+        if self._flush_task is not None:
+            self._flush_task.cancel()
+            try:
+                await self._flush_task
+            except asyncio.CancelledError:
+                pass
+            self._flush_task = None
+
+drive_uploader = DriveUploader(
+    get_state_pool,
+    resumable_threshold=DRIVE_RESUMABLE_THRESHOLD_BYTES,
+    chunk_bytes=DRIVE_RESUMABLE_CHUNK_BYTES,
+    poll_seconds=DRIVE_OUTBOX_POLL_SECONDS,
+    base_delay_seconds=DRIVE_OUTBOX_BASE_DELAY_SECONDS,
+    max_delay_seconds=DRIVE_OUTBOX_MAX_DELAY_SECONDS,
+    max_attempts=DRIVE_OUTBOX_MAX_ATTEMPTS
+)
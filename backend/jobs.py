@@ -0,0 +1,206 @@
+# backend/jobs.py
+import asyncio
+import time
+import uuid
+from dataclasses import dataclass, field, fields
+from typing import Any, AsyncContextManager, AsyncIterator, Callable, Dict, List, Optional, Tuple
+from .admission import AdmissionRejected
+
+JOB_QUEUED = "queued"
+JOB_RUNNING = "running"
+JOB_SUCCEEDED = "succeeded"
+JOB_FAILED = "failed"
+
+SWEEP_INTERVAL_SECONDS = 60
+# Unfinished jobs not heartbeated for this long belong to a worker that stopped
+JOB_STALE_SECONDS = 3 * SWEEP_INTERVAL_SECONDS
+
+# A turn runner takes (user_id, session_id, query) and yields (event_type, payload) updates
+TurnRunner = Callable[[str, str, str], AsyncIterator[Tuple[str, dict]]]
+
+@dataclass
+class Job:
+    id: str
+    user_id: str
+    session_id: str
+    query: str
+    status: str = JOB_QUEUED
+    created_at: float = field(default_factory=time.time)
+    started_at: Optional[float] = None
+    finished_at: Optional[float] = None
+    progress: List[Dict[str, Any]] = field(default_factory=list)
+    result: Optional[str] = None
+    error: Optional[str] = None
+
+    @property
+    def finished(self) -> bool:
+        return self.status in (JOB_SUCCEEDED, JOB_FAILED)
+
+    def to_dict(self, since: int = 0) -> dict:
+        return {
+            "job_id": self.id,
+            "session_id": self.session_id,
+            "status": self.status,
+            "created_at": self.created_at,
+            "started_at": self.started_at,
+            "finished_at": self.finished_at,
+            "progress": self.progress[since:],
+            "progress_count": len(self.progress),
+            "error": self.error,
+        }
+
+class JobQueueFull(Exception):
+    pass
+
+class JobManager:
+    """
+    Runs agent turns in the background on a bounded pool of worker tasks.
+    Clients submit a query, get a job ID back immediately and poll for progress
+    events and the final result. Finished jobs are kept for `retention_seconds`.
+
+    Job state is written to `store` (the configured state backend), so any
+    worker can answer status requests. Each worker heartbeats the jobs it
+    owns; a queued job whose owner stopped heartbeating (e.g. it restarted)
+    is taken over and run by another worker, and a running one is marked failed.
+    Turns hold a global admission slot (`turn_slot`) like interactive turns.
+    """
+
+    def __init__(
+        self,
+        run_turn: TurnRunner,
+        store,
+        turn_slot: Callable[[], AsyncContextManager],
+        workers: int,
+        queue_size: int,
+        retention_seconds: int,
+        max_progress_events: int
+    ):
+        self._run_turn = run_turn
+        self._store = store
+        self._turn_slot = turn_slot
+        self._workers = workers
+        self._queue: asyncio.Queue = asyncio.Queue(maxsize=queue_size)
+        self._retention_seconds = retention_seconds
+        self._max_progress_events = max_progress_events
+        self._jobs: Dict[str, Job] = {}  # jobs owned by this worker
+        self._tasks: List[asyncio.Task] = []
+
+    async def _save(self, job: Job):
+        # State transitions only; progress events are stored one by one in _record()
+        state = {f.name: getattr(job, f.name) for f in fields(Job) if f.name != "progress"}
+        await self._store.save(state, time.time())
+
+    async def submit(self, user_id: str, session_id: str, query: str) -> Job:
+        job = Job(id=uuid.uuid4().hex, user_id=user_id, session_id=session_id, query=query)
+        if self._queue.full():
+            raise JobQueueFull("Job queue is full, please retry later.")
+        await self._save(job)
+        self._jobs[job.id] = job
+        self._queue.put_nowait(job)
+        print(f"--- Jobs: queued job {job.id} for session '{session_id}' ---")
+        return job
+
+    async def get(self, job_id: str) -> Optional[Job]:
+        job = self._jobs.get(job_id)
+        if job is not None:
+            return job
+        record = await self._store.load(job_id)
+        if record is None:
+            return None
+        return Job(**{f.name: record[f.name] for f in fields(Job)})
+
+    async def _record(self, job: Job, event_type: str, payload: dict):
+        if len(job.progress) < self._max_progress_events:
+            event = {"type": event_type, "time": time.time(), **payload}
+            job.progress.append(event)
+            await self._store.append_event(job.id, len(job.progress) - 1, event)
+
+    async def _run(self, job: Job):
+        try:
+            while True:
+                try:
+                    async with self._turn_slot():
+                        job.status = JOB_RUNNING
+                        job.started_at = time.time()
+                        await self._save(job)
+                        async for event_type, payload in self._run_turn(job.user_id, job.session_id, job.query):
+                            if event_type == "final":
+                                job.result = payload.get("response")
+                            elif event_type == "error":
+                                raise RuntimeError(payload.get("detail", "Agent failed to process the job."))
+                            await self._record(job, event_type, payload)
+                    break
+                except AdmissionRejected as e:
+                    # Background jobs wait for capacity instead of failing
+                    if job.status != JOB_QUEUED:
+                        raise
+                    await asyncio.sleep(e.retry_after)
+            if job.result is None:
+                raise RuntimeError("No final response from agent.")
+            job.status = JOB_SUCCEEDED
+        except Exception as e:
+            print(f"❌ Job {job.id} failed: {e}")
+            job.status = JOB_FAILED
+            job.error = str(e)
+        finally:
+            job.finished_at = time.time()
+            try:
+                await self._save(job)
+            except Exception as e:
+                print(f"❌ Job {job.id}: failed to save final state: {e}")
+
+    async def _worker(self):
+        while True:
+            job = await self._queue.get()
+            try:
+                await self._run(job)
+            finally:
+                self._queue.task_done()
+
+    async def _take_over_stale(self, now: float):
+        stale_before = now - JOB_STALE_SECONDS
+        for record in await self._store.stale(stale_before):
+            job = Job(**{f.name: record[f.name] for f in fields(Job)})
+            if job.status == JOB_QUEUED:
+                if self._queue.full() or not await self._store.take_over(job.id, JOB_QUEUED, stale_before, now):
+                    continue
+                print(f"--- Jobs: took over queued job {job.id} from a stopped worker ---")
+                self._jobs[job.id] = job
+                self._queue.put_nowait(job)
+            elif await self._store.take_over(job.id, JOB_RUNNING, stale_before, now):
+                print(f"--- Jobs: job {job.id} was interrupted by a stopped worker, marking it failed ---")
+                job.status = JOB_FAILED
+                job.error = "Job was interrupted, please resubmit it."
+                job.finished_at = now
+                await self._save(job)
+
+    async def _sweep(self):
+        now = time.time()
+        cutoff = now - self._retention_seconds
+        expired = [job_id for job_id, job in self._jobs.items() if job.finished and job.finished_at < cutoff]
+        for job_id in expired:
+            del self._jobs[job_id]
+        removed = await self._store.delete_finished(cutoff)
+        if removed:
+            print(f"--- Jobs: removed {removed} expired jobs ---")
+        await self._store.touch([job.id for job in self._jobs.values() if not job.finished], now)
+        await self._take_over_stale(now)
+
+    async def _sweeper(self):
+        while True:
+            await asyncio.sleep(SWEEP_INTERVAL_SECONDS)
+            try:
+                await self._sweep()
+            except Exception as e:
+                print(f"❌ Jobs: sweep failed: {e}")
+
+    def start(self):
+        if not self._tasks:
+            self._tasks = [asyncio.create_task(self._worker()) for _ in range(self._workers)]
+            self._tasks.append(asyncio.create_task(self._sweeper()))
+
+    async def stop(self):
+        for task in self._tasks:
+            task.cancel()
+        await asyncio.gather(*self._tasks, return_exceptions=True)
+        self._tasks = []
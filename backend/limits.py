@@ -0,0 +1,51 @@
+# backend/limits.py
+import asyncio
+import time
+from typing import Optional
+
+class TokenBucket:
+    """
+    Token-bucket rate limiter: `rate` tokens are added per second up to
+    `capacity`. `acquire()` waits for a token; `try_acquire()` never waits.
+    """
+
+    def __init__(self, rate: float, capacity: float):
+        self.rate = rate
+        self.capacity = capacity
+        self._tokens = capacity
+        self._updated_at = time.monotonic()
+        self._lock = asyncio.Lock()
+
+    def _refill(self):
+        now = time.monotonic()
+        self._tokens = min(self.capacity, self._tokens + (now - self._updated_at) * self.rate)
+        self._updated_at = now
+
+    def try_acquire(self, tokens: float = 1) -> bool:
+        self._refill()
+        if self._tokens >= tokens:
+            self._tokens -= tokens
+            return True
+        return False
+
+    def time_until_available(self, tokens: float = 1) -> float:
+        """Seconds until `tokens` can be acquired (0 if available now)."""
+        self._refill()
+        missing = tokens - self._tokens
+        if missing <= 0:
+            return 0.0
+        return missing / self.rate if self.rate > 0 else float("inf")
+
+    async def acquire(self, tokens: float = 1, timeout: Optional[float] = None) -> bool:
+        """
+        Waits until `tokens` are available and takes them. Returns False if that
+        would take longer than `timeout` seconds. Waiters are served in order.
+        """
+        deadline = None if timeout is None else time.monotonic() + timeout
+        async with self._lock:
+            while not self.try_acquire(tokens):
+                wait = self.time_until_available(tokens)
+                if deadline is not None and time.monotonic() + wait > deadline:
+                    return False
+                await asyncio.sleep(wait)
+            return True
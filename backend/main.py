@@ -1,17 +1,48 @@
 # backend/main.py
 import os
-from fastapi import FastAPI, HTTPException, status, Request
-from fastapi.responses import RedirectResponse
+import json
+from fastapi import FastAPI, HTTPException, status, Request, Response, Depends
+from fastapi.responses import RedirectResponse, StreamingResponse, PlainTextResponse, JSONResponse
 from dotenv import load_dotenv
-from pydantic import BaseModel
+from pydantic import BaseModel, Field
+from typing import List, Optional
+import asyncio
+import time
 from fastapi.middleware.cors import CORSMiddleware
 
 from .agent import root_agent
+from .agents import ALL_SUB_AGENTS
+from .router import intent_router
+from .config import (
+    LOCAL_ROUTER_ENABLED,
+    LOCAL_ROUTER_MIN_CONFIDENCE,
+    JOB_WORKERS,
+    JOB_QUEUE_SIZE,
+    JOB_RETENTION_SECONDS,
+    JOB_MAX_PROGRESS_EVENTS,
+    BATCH_VALIDATE_MAX_IDEAS,
+    BATCH_VALIDATE_CONCURRENCY,
+    BATCH_VALIDATE_RATE_PER_SECOND
+)
+from .jobs import JobManager, JobQueueFull
+from .limits import TokenBucket
+from .tools import get_validator
 from google.adk.runners import Runner
-from google.adk.sessions import InMemorySessionService
 from google.adk.agents.run_config import RunConfig, StreamingMode
 from google.genai.types import Content, Part
-from .state import user_tokens_store, TEST_USER_ID
+from .state import DEFAULT_SESSION_ID
+from .auth import resolve_user, session_user, start_session, begin_oauth, set_oauth_nonce, finish_oauth, end_oauth, is_admin, require_admin
+from .credentials import credential_manager
+from .sessions import SessionRouter
+from .storage import create_session_service, create_job_store
+from .clients import close_http_client, shutdown_blocking_pool, warm_clients, run_blocking
+from .cache import llm_cache
+from .drive import drive_uploader
+from .metrics import registry as metrics_registry, TURN_DURATION
+from .tracing import tracer
+from .admission import admission, AdmissionRejected
+from .tiering import tiering
+from .prefetch import prefetcher
 
 load_dotenv()
 
@@ -37,25 +68,54 @@ app.add_middleware(
 )
 
 APP_NAME = "venture_assist_ai"
-SESSION_ID = "default_session"
 
-session_service = InMemorySessionService()
+session_service = create_session_service()
 runner = Runner(
     agent=root_agent,
     app_name=APP_NAME,
     session_service=session_service
 )
+session_router = SessionRouter(session_service, APP_NAME)
+
+# Runners rooted at each sub-agent, used when the local intent router is confident.
+# They share the session service, so history and state stay in one session.
+sub_agent_runners = {
+    agent.name: Runner(agent=agent, app_name=APP_NAME, session_service=session_service)
+    for agent in ALL_SUB_AGENTS if agent is not None
+}
+
+def select_runner(query: str):
+    """
+    Picks the runner for a turn: a sub-agent runner when the local intent router
+    is confident, otherwise the LLM coordinator. Returns (runner, routed_agent_name).
+    """
+    if LOCAL_ROUTER_ENABLED:
+        route = intent_router.route(query)
+        if route.agent_name in sub_agent_runners and route.confidence >= LOCAL_ROUTER_MIN_CONFIDENCE:
+            print(f"--- Router: '{route.agent_name}' (confidence {route.confidence:.2f}, {route.reason}) ---")
+            return sub_agent_runners[route.agent_name], route.agent_name
+    return runner, None
 
 @app.on_event("startup")
 async def startup_event():
+    credential_manager.start()
+    job_manager.start()
+    drive_uploader.start()
+    prefetcher.start()
     try:
-        await session_service.get_session(APP_NAME, TEST_USER_ID, SESSION_ID)
-    except Exception:
-        await session_service.create_session(
-            app_name=APP_NAME,
-            user_id=TEST_USER_ID,
-            session_id=SESSION_ID
-        )
+        await run_blocking(warm_clients)
+    except Exception as e:
+        print(f"⚠️ Failed to warm up clients, they will be built on first use: {e}")
+
+@app.on_event("shutdown")
+async def shutdown_event():
+    await credential_manager.stop()
+    await job_manager.stop()
+    await drive_uploader.stop()
+    await prefetcher.stop()
+    await tracer.close()
+    await close_http_client()
+    shutdown_blocking_pool()
 
 SCOPES = [
     "https://www.googleapis.com/auth/drive.file",
@@ -64,43 +124,370 @@ SCOPES = [
     "https://www.googleapis.com/auth/presentations"
 ]
 
-# Pydantic model for incoming chat requests
+# Pydantic model for incoming chat requests.
+# The user is never taken from the body: it comes from the signed session cookie (see auth.py).
 class ChatRequest(BaseModel):
     query: str
+    session_id: Optional[str] = Field(default=None, max_length=128)
+    # Target for the whole turn; agents configured for Pro switch to Flash when Pro would not fit in it
+    latency_budget_ms: Optional[int] = Field(default=None, gt=0, le=600000)
+
+    def resolved_session_id(self) -> str:
+        return self.session_id or DEFAULT_SESSION_ID
+
+@app.exception_handler(AdmissionRejected)
+async def admission_rejected_handler(request: Request, exc: AdmissionRejected):
+    return JSONResponse(
+        status_code=status.HTTP_429_TOO_MANY_REQUESTS,
+        content={"detail": exc.detail, "reason": exc.reason},
+        headers={"Retry-After": exc.retry_after_header}
+    )
 
 @app.get("/")
 async def read_root():
     return {"message": "Venture Assist AI Backend is running!"}
 
 @app.post("/chat")
-async def chat_with_ai(request: ChatRequest):
+async def chat_with_ai(request: ChatRequest, http_request: Request, response: Response):
     """
     Processes user queries and returns AI responses.
+    The user is identified by the session cookie; callers without one get a new anonymous session.
+    Sampled turns carry their trace ID in the `X-Trace-Id` header (see GET /traces/{trace_id}).
+    Responds with 429 and `Retry-After` when the user's rate or the server's capacity is exceeded.
+    The response's `model_tier` tells whether Pro, Flash or both served the turn.
+    """
+    user_id, is_new_user = resolve_user(http_request)
+    if is_new_user:
+        start_session(response, user_id)
+    session_id = request.resolved_session_id()
+    admission.check_user(user_id)
+    started = time.perf_counter()
+    outcome = "error"
+
+    with tracer.trace("POST /chat", user_id=user_id, session_id=session_id) as root_span, \
+            tiering.turn("chat", request.latency_budget_ms) as turn_tier:
+        if root_span is not None:
+            response.headers["X-Trace-Id"] = root_span.trace.trace_id
+        try:
+            run_config = RunConfig(streaming_mode=StreamingMode.NONE, max_llm_calls=100)
+            content = Content(role="user", parts=[Part(text=request.query)])
+
+            turn_runner, routed_agent = select_runner(request.query)
+            if root_span is not None:
+                root_span.set(routed_agent=routed_agent or "coordinator")
+
+            async with admission.turn_slot(), session_router.turn(user_id, session_id):
+                async for event in turn_runner.run_async(
+                    user_id=user_id,
+                    session_id=session_id,
+                    new_message=content,
+                    run_config=run_config
+                ):
+                    if event.is_final_response():
+                        outcome = "ok"
+                        if root_span is not None:
+                            root_span.set(model_tier=turn_tier.tier)
+                        return {"response": event.content.parts[0].text, "session_id": session_id, "model_tier": turn_tier.tier}
+
+            raise HTTPException(status_code=500, detail="No final response from agent.")
+
+        except AdmissionRejected:
+            outcome = "rejected"
+            raise
+        except HTTPException:
+            raise
+        except Exception as e:
+            print(f"❌ Error in root agent: {e}")
+            raise HTTPException(status_code=500, detail="Agent failed to process your query.")
+        finally:
+            TURN_DURATION.observe(time.perf_counter() - started, "chat", outcome)
+
+def _event_updates(event):
+    """
+    Converts a single ADK event into client-facing (event_type, payload) updates:
+    partial text chunks, sub-agent handoffs, tool start/finish and the final answer.
+    """
+    updates = []
+
+    for call in event.get_function_calls():
+        updates.append(("tool_start", {"agent": event.author, "tool": call.name, "args": call.args}))
+
+    for function_response in event.get_function_responses():
+        updates.append(("tool_end", {"agent": event.author, "tool": function_response.name, "response": function_response.response}))
+
+    if event.actions and event.actions.transfer_to_agent:
+        updates.append(("handoff", {"from": event.author, "to": event.actions.transfer_to_agent}))
+
+    text = "".join(part.text for part in (event.content.parts if event.content and event.content.parts else []) if part.text)
+    if event.partial:
+        if text:
+            updates.append(("text", {"agent": event.author, "text": text}))
+    elif event.is_final_response():
+        updates.append(("final", {"agent": event.author, "response": text}))
+
+    return updates
+
+def _format_sse(event_type: str, payload: dict) -> str:
+    return f"event: {event_type}\ndata: {json.dumps(payload, default=str)}\n\n"
+
+async def run_turn(
+    user_id: str,
+    session_id: str,
+    query: str,
+    streaming_mode: StreamingMode = StreamingMode.NONE,
+    endpoint: str = "jobs",
+    latency_budget_ms: Optional[int] = None
+):
+    """
+    Runs one agent turn in the given session and yields client-facing
+    (event_type, payload) updates, starting with a `session` event.
+    The `final` update carries the turn's `model_tier`.
+    """
+    run_config = RunConfig(streaming_mode=streaming_mode, max_llm_calls=100)
+    content = Content(role="user", parts=[Part(text=query)])
+    turn_runner, routed_agent = select_runner(query)
+    started = time.perf_counter()
+    outcome = "error"
+
+    with tracer.trace(f"turn {endpoint}", user_id=user_id, session_id=session_id, routed_agent=routed_agent or "coordinator") as root_span, \
+            tiering.turn(endpoint, latency_budget_ms) as turn_tier:
+        try:
+            async with session_router.turn(user_id, session_id):
+                session_payload = {"session_id": session_id}
+                if root_span is not None:
+                    session_payload["trace_id"] = root_span.trace.trace_id
+                yield "session", session_payload
+                if routed_agent:
+                    yield "handoff", {"from": "LocalRouter", "to": routed_agent}
+                async for event in turn_runner.run_async(
+                    user_id=user_id,
+                    session_id=session_id,
+                    new_message=content,
+                    run_config=run_config
+                ):
+                    for event_type, payload in _event_updates(event):
+                        if event_type == "final":
+                            payload["model_tier"] = turn_tier.tier
+                            if root_span is not None:
+                                root_span.set(model_tier=turn_tier.tier)
+                        yield event_type, payload
+            outcome = "ok"
+        except AdmissionRejected:
+            outcome = "rejected"
+            raise
+        except (GeneratorExit, asyncio.CancelledError):
+            outcome = "cancelled"
+            raise
+        finally:
+            TURN_DURATION.observe(time.perf_counter() - started, endpoint, outcome)
+
+@app.post("/chat/stream")
+async def chat_with_ai_stream(request: ChatRequest, http_request: Request):
+    """
+    Processes user queries and streams the agent's progress as Server-Sent Events.
+    Emits `text` (partial output), `handoff`, `tool_start`, `tool_end`, `final` and `error` events.
+    Responds with 429 when the user's rate is exceeded or the wait queue is full; a turn
+    shed after the stream has started ends with an `error` event carrying `retry_after`.
+    """
+    user_id, is_new_user = resolve_user(http_request)
+    session_id = request.resolved_session_id()
+    admission.check_user(user_id)
+    admission.check_capacity()
+
+    async def event_stream():
+        try:
+            # The slot is taken inside the stream so it is always released with it
+            async with admission.turn_slot():
+                async for event_type, payload in run_turn(
+                    user_id, session_id, request.query, StreamingMode.SSE,
+                    endpoint="chat_stream", latency_budget_ms=request.latency_budget_ms
+                ):
+                    yield _format_sse(event_type, payload)
+        except AdmissionRejected as e:
+            yield _format_sse("error", {"detail": e.detail, "retry_after": int(e.retry_after_header)})
+        except Exception as e:
+            print(f"❌ Error in root agent (stream): {e}")
+            yield _format_sse("error", {"detail": "Agent failed to process your query."})
+
+    stream_response = StreamingResponse(
+        event_stream(),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"}
+    )
+    if is_new_user:
+        start_session(stream_response, user_id)
+    return stream_response
+
+job_manager = JobManager(
+    run_turn=run_turn,
+    store=create_job_store(),
+    turn_slot=admission.turn_slot,
+    workers=JOB_WORKERS,
+    queue_size=JOB_QUEUE_SIZE,
+    retention_seconds=JOB_RETENTION_SECONDS,
+    max_progress_events=JOB_MAX_PROGRESS_EVENTS
+)
+
+@app.post("/jobs", status_code=status.HTTP_202_ACCEPTED)
+async def submit_job(request: ChatRequest, http_request: Request, response: Response):
+    """
+    Queues a chat turn to run in the background and returns its job ID immediately.
+    Use it for long-running work such as full pitch decks, logo slides or Drive saves.
+    Jobs can only be read back by the session's user.
     """
+    user_id, is_new_user = resolve_user(http_request)
+    if is_new_user:
+        start_session(response, user_id)
+    session_id = request.resolved_session_id()
+    admission.check_user(user_id)
     try:
-        run_config = RunConfig(streaming_mode=StreamingMode.NONE, max_llm_calls=100)
-        content = Content(role="user", parts=[Part(text=request.query)])
-
-        async for event in runner.run_async(
-            user_id=TEST_USER_ID,
-            session_id=SESSION_ID,
-            new_message=content,
-            run_config=run_config
-        ):
-            if event.is_final_response():
-                return {"response": event.content.parts[0].text}
-
-        raise HTTPException(status_code=500, detail="No final response from agent.")
-    
-    except Exception as e:
-        print(f"❌ Error in root agent: {e}")
-        raise HTTPException(status_code=500, detail="Agent failed to process your query.")
+        job = await job_manager.submit(user_id, session_id, request.query)
+    except JobQueueFull as e:
+        raise HTTPException(
+            status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+            detail=str(e),
+            headers={"Retry-After": "5"}
+        )
+    return {"job_id": job.id, "status": job.status, "session_id": session_id}
+
+async def _get_own_job(job_id: str, http_request: Request):
+    """Returns the job if it belongs to the caller; other users' jobs look like missing ones."""
+    job = await job_manager.get(job_id)
+    if job is None or job.user_id != session_user(http_request):
+        return None
+    return job
+
+@app.get("/jobs/{job_id}")
+async def get_job_status(job_id: str, http_request: Request, since: int = 0):
+    """
+    Returns the job's status and its progress events (handoffs, tool start/finish).
+    Pass `since` to receive only events after the ones already seen.
+    """
+    job = await _get_own_job(job_id, http_request)
+    if job is None:
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Job not found or expired.")
+    return job.to_dict(since=max(0, since))
+
+@app.get("/jobs/{job_id}/result")
+async def get_job_result(job_id: str, http_request: Request):
+    """
+    Returns the final response of a finished job.
+    Responds with 409 while the job is still queued or running.
+    """
+    job = await _get_own_job(job_id, http_request)
+    if job is None:
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Job not found or expired.")
+    if not job.finished:
+        raise HTTPException(status_code=status.HTTP_409_CONFLICT, detail=f"Job is still {job.status}.")
+    if job.error:
+        return {"job_id": job.id, "status": job.status, "error": job.error}
+    return {"job_id": job.id, "status": job.status, "response": job.result, "session_id": job.session_id}
+
+# Shared across batches so concurrent screenings cannot exceed the validator rate together
+batch_validate_bucket = TokenBucket(rate=BATCH_VALIDATE_RATE_PER_SECOND, capacity=BATCH_VALIDATE_CONCURRENCY)
+
+class BatchValidationRequest(BaseModel):
+    ideas: List[str] = Field(min_length=1, max_length=BATCH_VALIDATE_MAX_IDEAS)
+    detailed_feedback: bool = False
+
+@app.post("/validate/batch")
+async def validate_batch(request: BatchValidationRequest, http_request: Request):
+    """
+    Screens a list of startup ideas with get_validator, bypassing the coordinator.
+    Runs under a concurrency and rate limit and streams NDJSON: one line per idea
+    as soon as it finishes, then a final line with the aggregated status counts.
+    Each batch counts as one turn against the user's rate, like /chat.
+    """
+    user_id, is_new_user = resolve_user(http_request)
+    admission.check_user(user_id)
+    semaphore = asyncio.Semaphore(BATCH_VALIDATE_CONCURRENCY)
+
+    async def validate(index: int, idea: str) -> dict:
+        async with semaphore:
+            await batch_validate_bucket.acquire()
+            started = time.monotonic()
+            result = await get_validator(idea, detailed_feedback=request.detailed_feedback)
+        return {
+            "index": index,
+            "idea": idea,
+            "status": result.get("status", "unknown"),
+            "feedback": result.get("feedback"),
+            "elapsed_ms": round((time.monotonic() - started) * 1000)
+        }
+
+    async def result_stream():
+        tasks = [asyncio.create_task(validate(index, idea)) for index, idea in enumerate(request.ideas)]
+        status_counts = {}
+        started = time.monotonic()
+        try:
+            for next_done in asyncio.as_completed(tasks):
+                result = await next_done
+                status_counts[result["status"]] = status_counts.get(result["status"], 0) + 1
+                yield json.dumps(result) + "\n"
+            yield json.dumps({
+                "summary": {
+                    "total": len(tasks),
+                    "status_counts": status_counts,
+                    "elapsed_ms": round((time.monotonic() - started) * 1000)
+                }
+            }) + "\n"
+        finally:
+            # Stop outstanding validations if the client goes away mid-stream
+            for task in tasks:
+                task.cancel()
+
+    stream_response = StreamingResponse(result_stream(), media_type="application/x-ndjson")
+    if is_new_user:
+        start_session(stream_response, user_id)
+    return stream_response
+
+@app.delete("/cache", dependencies=[Depends(require_admin)])
+async def invalidate_cache(namespace: Optional[str] = None):
+    """
+    Invalidates cached LLM tool responses.
+    Pass `namespace` (e.g. 'research' or 'validator') to clear only that tool's entries.
+    Requires the admin token (`Authorization: Bearer <AUTH_ADMIN_TOKEN>`).
+    """
+    removed = await llm_cache.invalidate(namespace=namespace)
+    return {"removed": removed, "namespace": namespace}
+
+@app.get("/metrics", response_class=PlainTextResponse)
+async def get_metrics():
+    """
+    Exposes latency histograms, call and error counts and token usage for
+    turns, agents, tools, Gemini and Google API calls in the Prometheus text format.
+    """
+    return PlainTextResponse(metrics_registry.render(), media_type="text/plain; version=0.0.4")
+
+@app.get("/traces/{trace_id}")
+async def get_trace(trace_id: str, http_request: Request):
+    """
+    Returns one sampled turn as a span waterfall: coordinator and sub-agent
+    spans, their LLM calls, tool calls and outbound Gemini and Google API requests.
+    Only the most recent traces are kept in memory.
+    Traces are visible to the user whose turn they record, or with the admin token;
+    other users' traces look like missing ones.
+    """
+    trace = tracer.get(trace_id)
+    if not is_admin(http_request):
+        user_id = session_user(http_request)
+        if user_id is None:
+            raise HTTPException(status_code=status.HTTP_401_UNAUTHORIZED, detail="Sign in to view traces.")
+        if trace is not None and trace.root.attributes.get("user_id") != user_id:
+            trace = None
+    if trace is None:
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Trace not found, not sampled or expired.")
+    return trace.to_dict()
 
 @app.get("/auth/google")
-async def google_auth():
+async def google_auth(request: Request):
     """
-    Initiates Google's OAuth flow.
+    Initiates Google's OAuth flow for the user of the browser session
+    (a new anonymous session is started when there is none).
     Redirects the user to Google's consent page.
+    The OAuth `state` is a signed nonce that is also set as a cookie, so the
+    callback only accepts flows started by this browser and stores the tokens
+    for the user who started them.
     """
     from google_auth_oauthlib.flow import Flow
 
@@ -120,28 +507,45 @@ async def google_auth():
         redirect_uri=GOOGLE_REDIRECT_URI
     )
 
+    user_id, is_new_user = resolve_user(request)
+    oauth_state, nonce = begin_oauth(user_id)
     authorization_url, state = flow.authorization_url(
         access_type='offline',
-        include_granted_scopes='true'
+        include_granted_scopes='true',
+        state=oauth_state
     )
 
-    return RedirectResponse(authorization_url)
+    response = RedirectResponse(authorization_url)
+    set_oauth_nonce(response, nonce)
+    if is_new_user:
+        start_session(response, user_id)
+
+    return response
 
 @app.get("/oauth2callback")
 async def oauth2callback(request: Request):
     """
     Handles the redirect from Google after successful authorization.
-    Exchanges the authorization code for access and refresh tokens, then stores them.
+    Exchanges the authorization code for access and refresh tokens, then stores them
+    for the user who started the flow. Rejects a `state` that was not issued to this browser.
     """
     from google_auth_oauthlib.flow import Flow
 
     code = request.query_params.get("code")
     error = request.query_params.get("error")
+    user_id = finish_oauth(request, request.query_params.get("state"))
 
     if error:
         print(f"OAuth error: {error}")
         return RedirectResponse(url=FRONTEND_URL + "/?auth_status=failed&error=" + error)
 
+    if user_id is None:
+        print("OAuth error: state does not match the browser that started the flow")
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="Invalid or expired OAuth state. Please start the authorization again."
+        )
+
     if not code:
         raise HTTPException(
             status_code=status.HTTP_400_BAD_REQUEST,
@@ -165,20 +569,15 @@ async def oauth2callback(request: Request):
     )
 
     try:
-        flow.fetch_token(code=code)
+        await run_blocking(flow.fetch_token, code=code)
         credentials = flow.credentials
 
-        user_tokens_store[TEST_USER_ID] = {
-            "token": credentials.token,
-            "refresh_token": credentials.refresh_token,
-            "token_uri": credentials.token_uri,
-            "client_id": credentials.client_id,
-            "client_secret": credentials.client_secret,
-            "scopes": credentials.scopes,
-            "expiry": credentials.expiry.isoformat()
-        }
+        await credential_manager.store(user_id, credentials)
 
-        return RedirectResponse(url=FRONTEND_URL + "/?auth_status=success")
+        response = RedirectResponse(url=FRONTEND_URL + "/?auth_status=success")
+        end_oauth(response)
+        start_session(response, user_id)
+        return response
 
     except Exception as e:
         print(f"Error exchanging code for tokens: {e}")
@@ -0,0 +1,204 @@
+# backend/metrics.py
+import bisect
+import threading
+import time
+from typing import Dict, Optional, Sequence, Tuple
+
+# Seconds; covers a fast cache hit up to a long coordinator turn
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0, 120.0)
+
+def _escape(value: str) -> str:
+    return str(value).replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+def _format_labels(labelnames: Sequence[str], labels: Tuple[str, ...], extra: str = "") -> str:
+    pairs = [f'{name}="{_escape(value)}"' for name, value in zip(labelnames, labels)]
+    if extra:
+        pairs.append(extra)
+    return "{" + ",".join(pairs) + "}" if pairs else ""
+
+class Counter:
+    def __init__(self, name: str, documentation: str, labelnames: Sequence[str] = ()):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self._values: Dict[Tuple[str, ...], float] = {}
+        self._lock = threading.Lock()
+
+    def inc(self, *labels: str, amount: float = 1.0):
+        with self._lock:
+            self._values[labels] = self._values.get(labels, 0.0) + amount
+
+    def collect(self):
+        lines = [f"# HELP {self.name} {self.documentation}", f"# TYPE {self.name} counter"]
+        with self._lock:
+            items = sorted(self._values.items())
+        for labels, value in items:
+            lines.append(f"{self.name}{_format_labels(self.labelnames, labels)} {value:g}")
+        return lines
+
+class Histogram:
+    """
+    Cumulative-bucket histogram. Observations only touch one bucket counter,
+    sum and count; buckets are accumulated when the metric is rendered.
+    """
+
+    def __init__(self, name: str, documentation: str, labelnames: Sequence[str] = (), buckets: Sequence[float] = LATENCY_BUCKETS):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self.buckets = tuple(sorted(buckets))
+        self._values: Dict[Tuple[str, ...], list] = {}  # labels -> [bucket counts..., +Inf count, sum]
+        self._lock = threading.Lock()
+
+    def observe(self, value: float, *labels: str):
+        index = bisect.bisect_left(self.buckets, value)
+        with self._lock:
+            series = self._values.get(labels)
+            if series is None:
+                series = self._values[labels] = [0] * (len(self.buckets) + 1) + [0.0]
+            series[index] += 1
+            series[-1] += value
+
+    def collect(self):
+        lines = [f"# HELP {self.name} {self.documentation}", f"# TYPE {self.name} histogram"]
+        with self._lock:
+            items = sorted((labels, list(series)) for labels, series in self._values.items())
+        for labels, series in items:
+            cumulative = 0
+            for bound, count in zip(self.buckets + (float("inf"),), series):
+                cumulative += count
+                le = "+Inf" if bound == float("inf") else f"{bound:g}"
+                bucket_label = f'le="{le}"'
+                lines.append(f"{self.name}_bucket{_format_labels(self.labelnames, labels, bucket_label)} {cumulative}")
+            lines.append(f"{self.name}_sum{_format_labels(self.labelnames, labels)} {series[-1]:g}")
+            lines.append(f"{self.name}_count{_format_labels(self.labelnames, labels)} {cumulative}")
+        return lines
+
+class MetricsRegistry:
+    def __init__(self):
+        self._metrics = []
+
+    def counter(self, name: str, documentation: str, labelnames: Sequence[str] = ()) -> Counter:
+        metric = Counter(name, documentation, labelnames)
+        self._metrics.append(metric)
+        return metric
+
+    def histogram(self, name: str, documentation: str, labelnames: Sequence[str] = (), buckets: Sequence[float] = LATENCY_BUCKETS) -> Histogram:
+        metric = Histogram(name, documentation, labelnames, buckets)
+        self._metrics.append(metric)
+        return metric
+
+    def render(self) -> str:
+        """Returns all metrics in the Prometheus text exposition format (version 0.0.4)."""
+        lines = []
+        for metric in self._metrics:
+            lines.extend(metric.collect())
+        return "\n".join(lines) + "\n"
+
+registry = MetricsRegistry()
+
+# --- Turns ---
+TURN_DURATION = registry.histogram("va_turn_duration_seconds", "Duration of a full agent turn.", ["endpoint", "status"])
+
+TURN_TIER = registry.counter("va_turn_model_tier_total", "Turns by the model tier that served them (pro, flash or mixed).", ["endpoint", "tier"])
+
+# --- ADK agents, model calls and tools ---
+AGENT_DURATION = registry.histogram("va_agent_duration_seconds", "Time spent inside an agent, including its sub-calls.", ["agent"])
+MODEL_CALL_DURATION = registry.histogram("va_model_call_duration_seconds", "Latency of agent LLM calls made by ADK.", ["agent", "model"])
+MODEL_CALL_ERRORS = registry.counter("va_model_call_errors_total", "Agent LLM calls that returned an error.", ["agent", "model"])
+TOOL_DURATION = registry.histogram("va_tool_duration_seconds", "Latency of tool calls.", ["agent", "tool"])
+TOOL_ERRORS = registry.counter("va_tool_errors_total", "Tool calls that reported an error.", ["agent", "tool"])
+MODEL_TIER_DECISIONS = registry.counter("va_model_tier_decisions_total", "Model selected for agent LLM calls, by configured model and reason.", ["configured", "selected", "reason"])
+TOKENS = registry.counter("va_llm_tokens_total", "LLM tokens used, by caller, model and direction.", ["caller", "model", "direction"])
+
+# --- Upstream calls ---
+GEMINI_DURATION = registry.histogram("va_gemini_request_duration_seconds", "Latency of Gemini requests made from tools.", ["model"])
+GEMINI_ERRORS = registry.counter("va_gemini_request_errors_total", "Failed Gemini requests made from tools.", ["model", "error"])
+GEMINI_RETRIES = registry.counter("va_gemini_retries_total", "Gemini requests from tools retried after a retryable error.", ["model", "error"])
+GEMINI_HEDGES = registry.counter("va_gemini_hedges_total", "Hedged Gemini requests, by whether the hedge returned first.", ["model", "outcome"])
+GEMINI_CIRCUIT_OPENED = registry.counter("va_gemini_circuit_opened_total", "Times a model's circuit breaker opened.", ["model"])
+GEMINI_CIRCUIT_REJECTED = registry.counter("va_gemini_circuit_rejected_total", "Gemini requests failed fast by an open circuit.", ["model"])
+UPSTREAM_DURATION = registry.histogram("va_upstream_request_duration_seconds", "Latency of Google API requests.", ["api", "method"])
+UPSTREAM_ERRORS = registry.counter("va_upstream_request_errors_total", "Failed Google API requests (transport errors and 4xx/5xx).", ["api", "method", "status"])
+
+# --- Admission control ---
+ADMISSION_REJECTIONS = registry.counter("va_admission_rejections_total", "Turns and model calls shed by admission control.", ["reason"])
+ADMISSION_WAIT = registry.histogram("va_admission_wait_seconds", "Time spent waiting for a turn slot or a model tier token.", ["gate"])
+
+# --- Speculative prefetch ---
+PREFETCH_EVENTS = registry.counter("va_prefetch_total", "Speculative tool prefetches, by tool and outcome.", ["tool", "outcome"])
+
+def upstream_api(url: str) -> str:
+    """Maps a Google API URL to a short label (drive, calendar, slides, ...)."""
+    for api in ("drive", "calendar", "slides", "oauth2"):
+        if f"/{api}/" in url:
+            return api
+    return "other"
+
+def record_tokens(caller: str, model: str, usage_metadata):
+    if usage_metadata is None:
+        return
+    prompt_tokens = getattr(usage_metadata, "prompt_token_count", None)
+    output_tokens = getattr(usage_metadata, "candidates_token_count", None)
+    if prompt_tokens:
+        TOKENS.inc(caller, model, "input", amount=prompt_tokens)
+    if output_tokens:
+        TOKENS.inc(caller, model, "output", amount=output_tokens)
+
+# --- ADK callbacks ---
+# Start times are keyed per invocation so concurrent turns do not mix;
+# the limit only guards against entries left behind by calls that raised.
+_MAX_PENDING = 10000
+_pending: Dict[tuple, Tuple[float, Optional[str]]] = {}
+
+def _start(key: tuple, detail: Optional[str] = None):
+    if len(_pending) > _MAX_PENDING:
+        _pending.clear()
+    _pending[key] = (time.perf_counter(), detail)
+
+def _finish(key: tuple) -> Tuple[Optional[float], Optional[str]]:
+    started = _pending.pop(key, None)
+    if started is None:
+        return None, None
+    return time.perf_counter() - started[0], started[1]
+
+def track_agent_start(callback_context):
+    _start(("agent", callback_context.invocation_id, callback_context.agent_name))
+
+def track_agent_end(callback_context):
+    elapsed, _ = _finish(("agent", callback_context.invocation_id, callback_context.agent_name))
+    if elapsed is not None:
+        AGENT_DURATION.observe(elapsed, callback_context.agent_name)
+
+def track_model_start(callback_context, llm_request):
+    _start(("model", callback_context.invocation_id, callback_context.agent_name), llm_request.model)
+
+def track_model_end(callback_context, llm_response):
+    # Streaming calls report partial chunks first; only the final response closes the call
+    if llm_response.partial:
+        return
+    agent_name = callback_context.agent_name
+    elapsed, model = _finish(("model", callback_context.invocation_id, agent_name))
+    model = model or "unknown"
+    if elapsed is not None:
+        MODEL_CALL_DURATION.observe(elapsed, agent_name, model)
+    if llm_response.error_code:
+        MODEL_CALL_ERRORS.inc(agent_name, model)
+    record_tokens(agent_name, model, llm_response.usage_metadata)
+
+def track_tool_start(tool, args, tool_context):
+    _start(("tool", tool_context.function_call_id))
+
+def _is_error_result(tool_response) -> bool:
+    if isinstance(tool_response, dict):
+        if tool_response.get("status") == "error":
+            return True
+        tool_response = tool_response.get("result")
+    return isinstance(tool_response, str) and tool_response.lstrip().startswith(("❌", "Error"))
+
+def track_tool_end(tool, args, tool_context, tool_response):
+    elapsed, _ = _finish(("tool", tool_context.function_call_id))
+    if elapsed is not None:
+        TOOL_DURATION.observe(elapsed, tool_context.agent_name, tool.name)
+    if _is_error_result(tool_response):
+        TOOL_ERRORS.inc(tool_context.agent_name, tool.name)
@@ -0,0 +1,252 @@
+# backend/prefetch.py
+import asyncio
+import contextvars
+import time
+from dataclasses import dataclass, field
+from typing import Any, Awaitable, Callable, Dict, FrozenSet, List, Optional, Tuple
+from .cache import normalize_input
+from .limits import TokenBucket
+from .admission import admission
+from .resilience import gemini_calls
+from .metrics import PREFETCH_EVENTS
+from .config import (
+    PREFETCH_ENABLED,
+    PREFETCH_TTL_SECONDS,
+    PREFETCH_IDLE_SECONDS,
+    PREFETCH_MAX_PER_SESSION,
+    PREFETCH_MAX_CONCURRENT,
+    PREFETCH_RATE_PER_MINUTE,
+    PREFETCH_DELAY_SECONDS,
+    PREFETCH_MATCH_THRESHOLD
+)
+
+SWEEP_INTERVAL_SECONDS = 10
+
+SessionKey = Tuple[str, str]
+
+# Words that say what kind of request it is rather than what it is about
+FILLER_WORDS = frozenset({
+    "the", "and", "for", "with", "that", "this", "from", "into", "about", "who", "which", "their", "your", "our",
+    "app", "platform", "service", "startup", "idea", "market", "industry", "sector", "space", "research", "analysis",
+})
+
+def _words(text: str) -> FrozenSet[str]:
+    return frozenset(normalize_input(text).split())
+
+def _terms(text: str) -> FrozenSet[str]:
+    """Content words of `text`, with plural "s" dropped, for comparing phrasings of one subject."""
+    terms = set()
+    for word in _words(text):
+        word = word.strip(".,;:!?()'\"")
+        if len(word) < 3 or word in FILLER_WORDS:
+            continue
+        terms.add(word[:-1] if len(word) > 3 and word.endswith("s") and not word.endswith("ss") else word)
+    return frozenset(terms)
+
+def _coverage(part: FrozenSet[str], whole: FrozenSet[str]) -> float:
+    """Share of `part` found in `whole`."""
+    if not part:
+        return 0.0
+    return len(part & whole) / len(part)
+
+def _similarity(a: FrozenSet[str], b: FrozenSet[str]) -> float:
+    if not a or not b:
+        return 0.0
+    return len(a & b) / len(a | b)
+
+@dataclass
+class PrefetchEntry:
+    tool: str
+    words: FrozenSet[str]
+    task: asyncio.Task
+    expires_at: float
+
+@dataclass
+class SessionPrefetch:
+    last_active: float = field(default_factory=time.monotonic)
+    started: int = 0
+    entries: List[PrefetchEntry] = field(default_factory=list)
+    # Inputs from earlier steps, e.g. the validated idea, reused by later prefetches
+    notes: Dict[str, str] = field(default_factory=dict)
+
+class PrefetchEngine:
+    """
+    Speculatively runs the likely next tool call of a session in the background
+    and keeps its result in a short-lived per-session cache, so the tool can
+    answer at once when the user asks for that step.
+
+    Prefetches are low priority: they start after a short delay, only when the
+    model has spare rate-limit capacity and a closed circuit, and within a
+    budget (per session, concurrent, and per minute overall). A session that
+    stays idle has its in-flight prefetches cancelled and its results dropped.
+    """
+
+    def __init__(
+        self,
+        enabled: bool,
+        ttl: float,
+        idle_seconds: float,
+        max_per_session: int,
+        max_concurrent: int,
+        rate_per_minute: float,
+        delay: float,
+        match_threshold: float
+    ):
+        self.enabled = enabled
+        self._ttl = ttl
+        self._idle_seconds = idle_seconds
+        self._max_per_session = max_per_session
+        self._max_concurrent = max_concurrent
+        self._bucket = TokenBucket(rate=rate_per_minute / 60, capacity=max(1.0, rate_per_minute / 6))
+        self._delay = delay
+        self._match_threshold = match_threshold
+        self._sessions: Dict[SessionKey, SessionPrefetch] = {}
+        self._running = 0
+        self._sweep_task: Optional[asyncio.Task] = None
+
+    def _session(self, session_key: SessionKey) -> SessionPrefetch:
+        session = self._sessions.get(session_key)
+        if session is None:
+            session = self._sessions[session_key] = SessionPrefetch()
+        session.last_active = time.monotonic()
+        return session
+
+    def remember(self, session_key: SessionKey, name: str, value: str):
+        if self.enabled:
+            self._session(session_key).notes[name] = value
+
+    def recall(self, session_key: SessionKey, name: str) -> Optional[str]:
+        session = self._sessions.get(session_key)
+        return session.notes.get(name) if session else None
+
+    def schedule(self, session_key: SessionKey, tool: str, text: str, model: str, fetch: Callable[[], Awaitable[Any]]):
+        """
+        Starts `fetch()` in the background as a prefetch of `tool` for input `text`,
+        unless the session already has one for it or the budget is spent.
+        `fetch` returns the value to serve, or None when there is nothing worth serving.
+        """
+        if not self.enabled or not text:
+            return
+        session = self._session(session_key)
+        words = _words(text)
+        if any(entry.tool == tool and _similarity(entry.words, words) >= self._match_threshold for entry in session.entries):
+            return
+        if session.started >= self._max_per_session or self._running >= self._max_concurrent or not self._bucket.try_acquire():
+            PREFETCH_EVENTS.inc(tool, "skipped_budget")
+            return
+
+        session.started += 1
+        self._running += 1
+        # A fresh context keeps the prefetch out of the current turn's trace and tier accounting
+        task = contextvars.Context().run(asyncio.get_running_loop().create_task, self._run(tool, model, fetch))
+        # A done callback also runs for tasks cancelled before they started
+        task.add_done_callback(self._finished)
+        session.entries.append(PrefetchEntry(tool, words, task, time.monotonic() + self._ttl))
+        print(f"--- Prefetch: scheduled {tool} for session '{session_key[1]}' ---")
+
+    async def _run(self, tool: str, model: str, fetch: Callable[[], Awaitable[Any]]):
+        try:
+            await asyncio.sleep(self._delay)
+            # Only spare capacity: never wait for the rate limit or probe a failing model
+            if admission.model_wait_estimate(model) > 0 or gemini_calls.breaker(model).state != "closed":
+                PREFETCH_EVENTS.inc(tool, "skipped_load")
+                return None
+            result = await fetch()
+            PREFETCH_EVENTS.inc(tool, "completed" if result is not None else "failed")
+            return result
+        except asyncio.CancelledError:
+            PREFETCH_EVENTS.inc(tool, "cancelled")
+            raise
+        except Exception as e:
+            print(f"--- Prefetch ERROR: {tool} failed. Error: {e} ---")
+            PREFETCH_EVENTS.inc(tool, "failed")
+            return None
+
+    def _finished(self, task: asyncio.Task):
+        self._running -= 1
+
+    def _matches(self, entry: PrefetchEntry, text: str, related: Optional[str]) -> bool:
+        if _similarity(entry.words, _words(text)) >= self._match_threshold:
+            return True
+        # A narrower phrasing of the input the entry was prefetched for, e.g. a research topic drawn from the idea
+        return (
+            related is not None
+            and _similarity(entry.words, _words(related)) >= self._match_threshold
+            and _coverage(_terms(text), _terms(related)) >= self._match_threshold
+        )
+
+    async def take(self, session_key: SessionKey, tool: str, text: str, related: Optional[str] = None) -> Optional[Any]:
+        """
+        Returns the prefetched result of `tool` for an input matching `text`, waiting
+        for it if it is still in flight. Returns None when there is none to serve.
+        With `related` (e.g. the session's validated idea), a result prefetched for
+        `related` is also served when `text` is about it: most of its content words
+        appear in `related`. Callers should present such a result as being for `related`.
+        """
+        if not self.enabled or not text:
+            return None
+        session = self._sessions.get(session_key)
+        if session is None:
+            return None
+        session.last_active = time.monotonic()
+        now = time.monotonic()
+        for entry in list(session.entries):
+            if entry.tool != tool or entry.expires_at < now or not self._matches(entry, text, related):
+                continue
+            session.entries.remove(entry)
+            try:
+                # shield() keeps a cancelled turn from cancelling the prefetch it joined
+                result = await asyncio.shield(entry.task)
+            except asyncio.CancelledError:
+                if not entry.task.cancelled():
+                    # The turn was cancelled, not the prefetch; leave it for the next attempt
+                    session.entries.append(entry)
+                    raise
+                result = None
+            PREFETCH_EVENTS.inc(tool, "hit" if result is not None else "miss")
+            if result is not None:
+                print(f"--- Prefetch: serving prefetched {tool} for session '{session_key[1]}' ---")
+            return result
+        return None
+
+    # --- Idle sessions and expiry ---
+    def _sweep(self):
+        now = time.monotonic()
+        for session_key, session in list(self._sessions.items()):
+            idle = now - session.last_active > self._idle_seconds
+            for entry in list(session.entries):
+                if idle or entry.expires_at < now:
+                    entry.task.cancel()
+                    session.entries.remove(entry)
+            if idle:
+                del self._sessions[session_key]
+
+    async def _sweeper(self):
+        while True:
+            await asyncio.sleep(SWEEP_INTERVAL_SECONDS)
+            self._sweep()
+
+    def start(self):
+        if self.enabled and self._sweep_task is None:
+            self._sweep_task = asyncio.create_task(self._sweeper())
+
+    async def stop(self):
+        tasks = [entry.task for session in self._sessions.values() for entry in session.entries]
+        if self._sweep_task is not None:
+            tasks.append(self._sweep_task)
+            self._sweep_task = None
+        for task in tasks:
+            task.cancel()
+        await asyncio.gather(*tasks, return_exceptions=True)
+        self._sessions.clear()
+
+prefetcher = PrefetchEngine(
+    enabled=PREFETCH_ENABLED,
+    ttl=PREFETCH_TTL_SECONDS,
+    idle_seconds=PREFETCH_IDLE_SECONDS,
+    max_per_session=PREFETCH_MAX_PER_SESSION,
+    max_concurrent=PREFETCH_MAX_CONCURRENT,
+    rate_per_minute=PREFETCH_RATE_PER_MINUTE,
+    delay=PREFETCH_DELAY_SECONDS,
+    match_threshold=PREFETCH_MATCH_THRESHOLD
+)
@@ -0,0 +1,276 @@
+# backend/resilience.py
+import asyncio
+import random
+import time
+from collections import deque
+from typing import Awaitable, Callable, Deque, Dict, Optional
+import httpx
+from google.genai import errors as genai_errors
+from .admission import admission
+from .metrics import GEMINI_RETRIES, GEMINI_HEDGES, GEMINI_CIRCUIT_OPENED, GEMINI_CIRCUIT_REJECTED
+from .config import (
+    GEMINI_ATTEMPT_TIMEOUT_SECONDS,
+    GEMINI_CALL_DEADLINE_SECONDS,
+    GEMINI_MAX_ATTEMPTS,
+    GEMINI_RETRY_BASE_DELAY_SECONDS,
+    GEMINI_RETRY_MAX_DELAY_SECONDS,
+    GEMINI_HEDGING_ENABLED,
+    GEMINI_HEDGE_QUANTILE,
+    GEMINI_HEDGE_MIN_SAMPLES,
+    GEMINI_HEDGE_MIN_DELAY_SECONDS,
+    GEMINI_LATENCY_WINDOW,
+    GEMINI_BREAKER_FAILURE_THRESHOLD,
+    GEMINI_BREAKER_COOLDOWN_SECONDS
+)
+
+RETRYABLE_STATUS_CODES = {408, 429, 500, 502, 503, 504}
+
+# Takes `hedge=True` for the hedged copy of a request and returns the response
+Send = Callable[..., Awaitable]
+# Waits until the model may be called (e.g. for a rate-limit token), or raises to shed the call
+Pace = Callable[[str], Awaitable[None]]
+
+class CircuitOpenError(Exception):
+    pass
+
+def is_retryable(error: BaseException) -> bool:
+    """Timeouts, network failures, throttling and server errors are worth another attempt."""
+    if isinstance(error, (asyncio.TimeoutError, httpx.TransportError)):
+        return True
+    if isinstance(error, genai_errors.APIError):
+        return error.code in RETRYABLE_STATUS_CODES
+    return False
+
+class CircuitBreaker:
+    """
+    Opens after `failure_threshold` consecutive retryable failures and fails
+    calls fast for `cooldown` seconds. Then a single probe is let through:
+    success closes the circuit, failure opens it again.
+    """
+
+    def __init__(self, name: str, failure_threshold: int, cooldown: float):
+        self.name = name
+        self._failure_threshold = failure_threshold
+        self._cooldown = cooldown
+        self._failures = 0
+        self._opened_at: Optional[float] = None
+        self._probing = False
+
+    @property
+    def state(self) -> str:
+        if self._opened_at is None:
+            return "closed"
+        if time.monotonic() - self._opened_at >= self._cooldown:
+            return "half_open"
+        return "open"
+
+    def before_call(self):
+        state = self.state
+        if state == "closed":
+            return
+        if state == "half_open" and not self._probing:
+            self._probing = True
+            return
+        GEMINI_CIRCUIT_REJECTED.inc(self.name)
+        raise CircuitOpenError(f"{self.name} is unavailable (circuit open), please retry shortly.")
+
+    def record_success(self):
+        self._failures = 0
+        self._opened_at = None
+        self._probing = False
+
+    def record_failure(self):
+        self._failures += 1
+        # A failed probe reopens the circuit; failures of calls still in flight while open are only counted
+        if self._probing or (self._opened_at is None and self._failures >= self._failure_threshold):
+            print(f"--- Resilience: circuit for {self.name} opened after {self._failures} failures ---")
+            GEMINI_CIRCUIT_OPENED.inc(self.name)
+            self._opened_at = time.monotonic()
+        self._probing = False
+
+    def release(self):
+        """Ends a probe that neither proved nor disproved the upstream's health."""
+        self._probing = False
+
+class LatencyWindow:
+    """Latencies of the most recent successful requests, for quantile estimates."""
+
+    def __init__(self, size: int):
+        self._samples: Deque[float] = deque(maxlen=size)
+
+    def add(self, seconds: float):
+        self._samples.append(seconds)
+
+    def quantile(self, q: float, min_samples: int) -> Optional[float]:
+        if len(self._samples) < max(1, min_samples):
+            return None
+        ordered = sorted(self._samples)
+        return ordered[min(len(ordered) - 1, int(q * len(ordered)))]
+
+class ResilientCaller:
+    """
+    Wraps single-attempt requests with a per-attempt timeout and an overall
+    deadline, full-jitter exponential retry on retryable errors, optional
+    hedging and a circuit breaker per model.
+
+    Hedging: when an attempt has not answered within the model's recent
+    `hedge_quantile` latency, an identical request is sent and whichever
+    answers first wins; the other is cancelled. `can_hedge(model)` decides
+    whether spare capacity allows the extra request.
+    """
+
+    def __init__(
+        self,
+        attempt_timeout: float,
+        deadline: float,
+        max_attempts: int,
+        base_delay: float,
+        max_delay: float,
+        hedging_enabled: bool,
+        hedge_quantile: float,
+        hedge_min_samples: int,
+        hedge_min_delay: float,
+        latency_window: int,
+        failure_threshold: int,
+        cooldown: float,
+        can_hedge: Optional[Callable[[str], bool]] = None
+    ):
+        self._attempt_timeout = attempt_timeout
+        self._deadline = deadline
+        self._max_attempts = max(1, max_attempts)
+        self._base_delay = base_delay
+        self._max_delay = max_delay
+        self._hedging_enabled = hedging_enabled
+        self._hedge_quantile = hedge_quantile
+        self._hedge_min_samples = hedge_min_samples
+        self._hedge_min_delay = hedge_min_delay
+        self._latency_window = latency_window
+        self._failure_threshold = failure_threshold
+        self._cooldown = cooldown
+        self._can_hedge = can_hedge or (lambda model: True)
+        self._breakers: Dict[str, CircuitBreaker] = {}
+        self._latencies: Dict[str, LatencyWindow] = {}
+
+    def breaker(self, model: str) -> CircuitBreaker:
+        breaker = self._breakers.get(model)
+        if breaker is None:
+            breaker = self._breakers[model] = CircuitBreaker(model, self._failure_threshold, self._cooldown)
+        return breaker
+
+    def _window(self, model: str) -> LatencyWindow:
+        window = self._latencies.get(model)
+        if window is None:
+            window = self._latencies[model] = LatencyWindow(self._latency_window)
+        return window
+
+    def hedge_delay(self, model: str) -> Optional[float]:
+        """Seconds to wait before hedging, or None while there is too little latency history."""
+        if not self._hedging_enabled:
+            return None
+        quantile = self._window(model).quantile(self._hedge_quantile, self._hedge_min_samples)
+        if quantile is None:
+            return None
+        return max(self._hedge_min_delay, quantile)
+
+    def _backoff(self, attempt: int) -> float:
+        return random.uniform(0, min(self._max_delay, self._base_delay * 2 ** (attempt - 1)))
+
+    async def _timed(self, model: str, send: Send, timeout: float, hedge: bool):
+        started = time.monotonic()
+        result = await asyncio.wait_for(send(hedge=hedge), timeout)
+        self._window(model).add(time.monotonic() - started)
+        return result
+
+    async def _hedged(self, model: str, send: Send, timeout: float):
+        delay = self.hedge_delay(model)
+        if delay is None or delay >= timeout:
+            return await self._timed(model, send, timeout, hedge=False)
+
+        primary = asyncio.ensure_future(self._timed(model, send, timeout, hedge=False))
+        pending = {primary}
+        try:
+            done, pending = await asyncio.wait(pending, timeout=delay)
+            if primary in done:
+                return primary.result()
+            if not self._can_hedge(model):
+                return await primary
+
+            hedge = asyncio.ensure_future(self._timed(model, send, timeout - delay, hedge=True))
+            pending = {primary, hedge}
+            error: Optional[BaseException] = None
+            while pending:
+                done, pending = await asyncio.wait(pending, return_when=asyncio.FIRST_COMPLETED)
+                for task in done:
+                    if task.exception() is None:
+                        GEMINI_HEDGES.inc(model, "won" if task is hedge else "lost")
+                        return task.result()
+                    error = error or task.exception()
+            raise error
+        finally:
+            for task in pending:
+                task.cancel()
+
+    async def call(self, model: str, send: Send, pace: Optional[Pace] = None):
+        """
+        Runs `send` under the model's deadline, retry, hedging and circuit breaker policy.
+        `pace(model)` runs before each attempt, outside its timeout and its latency sample,
+        so waiting for rate-limit capacity is neither a timeout nor a slow response.
+        Hedges are not paced; `can_hedge` decides whether they may be sent.
+        """
+        breaker = self.breaker(model)
+        deadline = None
+        attempt = 0
+        while True:
+            attempt += 1
+            breaker.before_call()
+            if pace is not None:
+                try:
+                    await pace(model)
+                except BaseException:
+                    breaker.release()
+                    raise
+            if deadline is None:
+                # The deadline starts once the first attempt has been admitted
+                deadline = time.monotonic() + self._deadline
+            remaining = deadline - time.monotonic()
+            try:
+                result = await self._hedged(model, send, min(self._attempt_timeout, remaining))
+            except Exception as e:
+                if is_retryable(e):
+                    breaker.record_failure()
+                elif isinstance(e, genai_errors.APIError):
+                    # The model answered, so it is up even though this request was rejected
+                    breaker.record_success()
+                else:
+                    breaker.release()
+                delay = self._backoff(attempt)
+                if not is_retryable(e) or attempt >= self._max_attempts or time.monotonic() + delay >= deadline:
+                    raise
+                error_name = type(e).__name__
+                print(f"--- Resilience: {model} attempt {attempt} failed ({error_name}), retrying in {delay:.2f}s ---")
+                GEMINI_RETRIES.inc(model, error_name)
+                await asyncio.sleep(delay)
+                continue
+            except BaseException:
+                # Cancelled (client gone, job cancelled, ...): a probe must not keep the circuit half-open forever
+                breaker.release()
+                raise
+            breaker.record_success()
+            return result
+
+gemini_calls = ResilientCaller(
+    attempt_timeout=GEMINI_ATTEMPT_TIMEOUT_SECONDS,
+    deadline=GEMINI_CALL_DEADLINE_SECONDS,
+    max_attempts=GEMINI_MAX_ATTEMPTS,
+    base_delay=GEMINI_RETRY_BASE_DELAY_SECONDS,
+    max_delay=GEMINI_RETRY_MAX_DELAY_SECONDS,
+    hedging_enabled=GEMINI_HEDGING_ENABLED,
+    hedge_quantile=GEMINI_HEDGE_QUANTILE,
+    hedge_min_samples=GEMINI_HEDGE_MIN_SAMPLES,
+    hedge_min_delay=GEMINI_HEDGE_MIN_DELAY_SECONDS,
+    latency_window=GEMINI_LATENCY_WINDOW,
+    failure_threshold=GEMINI_BREAKER_FAILURE_THRESHOLD,
+    cooldown=GEMINI_BREAKER_COOLDOWN_SECONDS,
+    # Hedges only use spare capacity of the model tier and never wait for it
+    can_hedge=admission.try_model_call
+)
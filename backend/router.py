@@ -0,0 +1,170 @@
+# backend/router.py
+import math
+import re
+from collections import Counter
+from dataclasses import dataclass
+from typing import Dict, List, Optional
+
+# --- Keyword rules per sub-agent ---
+EMAIL_PATTERN = re.compile(r"[\w.+-]+@[\w-]+\.[\w.-]+")
+
+KEYWORD_RULES: Dict[str, List[re.Pattern]] = {
+    "IdeaValidatorAgent": [
+        re.compile(r"\b(validat\w*|evaluat\w*|assess\w*|viab\w*)\b.*\bidea\b", re.I),
+        re.compile(r"\bidea\b.*\b(validat\w*|evaluat\w*|viab\w*)\b", re.I),
+        re.compile(r"\b(test|check) (the|my|this) idea\b", re.I),
+        re.compile(r"\bwhat do you think (about|of) (the|my|this) idea\b", re.I),
+    ],
+    "MarketResearcherAgent": [
+        re.compile(r"\bmarket (research|analysis|size|trends?)\b", re.I),
+        re.compile(r"\bcompetitor(s| analysis)?\b", re.I),
+        re.compile(r"\bresearch\b.*\b(market|industry|sector)\b", re.I),
+    ],
+    "PitchDeckGeneratorAgent": [
+        re.compile(r"\bpitch[- ]?deck\b", re.I),
+        re.compile(r"\b(investor )?pitch\b", re.I),
+    ],
+    "SummarySaverAgent": [
+        re.compile(r"\bsumm(ari[sz]e|ary)\b", re.I),
+        re.compile(r"\bsave\b.*\b(it|this|summary|drive|report)\b", re.I),
+        re.compile(r"\bgoogle drive\b", re.I),
+    ],
+    "LogoCreatorAgent": [
+        re.compile(r"\blogos?\b", re.I),
+    ],
+    "MeetMakerAgent": [
+        re.compile(r"\b(schedule|arrange|organi[sz]e|book|set up)\b.*\b(meeting|call|discussion|meet)\b", re.I),
+        re.compile(r"\bmeeting\b", re.I),
+    ],
+}
+
+# --- Seed examples for the TF-IDF classifier ---
+TRAINING_EXAMPLES: Dict[str, List[str]] = {
+    "IdeaValidatorAgent": [
+        "Test the idea: a mobile app for finding nannies.",
+        "What do you think about the idea of a smart waste diversion system for households?",
+        "Is my startup idea viable?",
+        "Evaluate my business idea and give feedback on risks.",
+        "Validate this concept for a subscription service.",
+    ],
+    "MarketResearcherAgent": [
+        "Conduct market research on the renewable energy sector.",
+        "Research the current state of the AI in healthcare market.",
+        "Who are the main competitors in fintech?",
+        "What is the market size and trends for electric bikes?",
+        "Give me an industry analysis of edtech.",
+    ],
+    "PitchDeckGeneratorAgent": [
+        "Generate a pitch deck for a web app that helps finding houses with AI.",
+        "Create a pitch deck for an AI-powered personalized learning platform with Problem, Solution and Team sections.",
+        "Write the problem and solution slides for my investor presentation.",
+        "Draft a pitch for investors about my startup.",
+    ],
+    "SummarySaverAgent": [
+        "Summarize idea: a smart mirror that tracks your mental state.",
+        "Can you save it?",
+        "Summary and save: personalized tea based on DNA.",
+        "Save the summary to Google Drive.",
+        "Give me a short summary of these notes.",
+    ],
+    "LogoCreatorAgent": [
+        "Generate a logo concept for a startup that builds eco-friendly packaging solutions.",
+        "Create a logo for a fitness app for seniors.",
+        "Design a brand mark and color palette for my company.",
+        "I need a logo idea with icon, colors and font.",
+    ],
+    "MeetMakerAgent": [
+        "Arrange a meeting with investor@gmail.com next week to discuss the startup.",
+        "Schedule a project discussion with alice@company.com for June 15th.",
+        "Organize an investor meeting with bob@example.com for tomorrow.",
+        "Book a call with my cofounder on Friday afternoon.",
+        "Set up a Google Meet with the team next Tuesday.",
+    ],
+}
+
+TOKEN_PATTERN = re.compile(r"[a-z0-9]+")
+STOP_WORDS = {
+    "a", "an", "the", "of", "for", "on", "in", "to", "and", "or", "with", "my", "me", "i",
+    "is", "it", "this", "that", "about", "can", "you", "please", "what", "do", "be", "at",
+}
+
+def tokenize(text: str) -> List[str]:
+    return [token for token in TOKEN_PATTERN.findall(text.lower()) if token not in STOP_WORDS]
+
+@dataclass
+class Route:
+    agent_name: Optional[str]
+    confidence: float
+    reason: str
+
+class IntentRouter:
+    """
+    Cheap in-process intent classifier that picks a sub-agent for a query.
+    Keyword rules give a strong signal; a TF-IDF nearest-centroid classifier
+    trained on a handful of seed examples breaks ties and covers phrasing the
+    rules miss. Callers should fall back to the LLM coordinator when the
+    returned confidence is below their threshold.
+    """
+
+    def __init__(self, examples: Dict[str, List[str]], rules: Dict[str, List[re.Pattern]]):
+        self._rules = rules
+        documents = [(label, tokenize(text)) for label, texts in examples.items() for text in texts]
+        document_frequency = Counter(token for _, tokens in documents for token in set(tokens))
+        total_documents = len(documents)
+        self._idf = {
+            token: math.log((1 + total_documents) / (1 + frequency)) + 1
+            for token, frequency in document_frequency.items()
+        }
+        self._centroids: Dict[str, Dict[str, float]] = {}
+        for label in examples:
+            centroid = Counter()
+            for document_label, tokens in documents:
+                if document_label == label:
+                    centroid.update(self._vectorize(tokens))
+            self._centroids[label] = self._normalize(centroid)
+
+    def _vectorize(self, tokens: List[str]) -> Dict[str, float]:
+        counts = Counter(token for token in tokens if token in self._idf)
+        return self._normalize({token: count * self._idf[token] for token, count in counts.items()})
+
+    @staticmethod
+    def _normalize(vector: Dict[str, float]) -> Dict[str, float]:
+        norm = math.sqrt(sum(value * value for value in vector.values()))
+        return {token: value / norm for token, value in vector.items()} if norm else {}
+
+    def _classify(self, text: str):
+        vector = self._vectorize(tokenize(text))
+        scores = {
+            label: sum(weight * centroid.get(token, 0.0) for token, weight in vector.items())
+            for label, centroid in self._centroids.items()
+        }
+        ranked = sorted(scores.items(), key=lambda item: item[1], reverse=True)
+        return ranked[0], ranked[1][1] if len(ranked) > 1 else 0.0
+
+    def route(self, query: str) -> Route:
+        rule_matches = {
+            agent_name for agent_name, patterns in self._rules.items()
+            if any(pattern.search(query) for pattern in patterns)
+        }
+        # An email address plus a meeting verb is unambiguous
+        if "MeetMakerAgent" in rule_matches and EMAIL_PATTERN.search(query):
+            rule_matches = {"MeetMakerAgent"}
+
+        (best_label, best_score), runner_up_score = self._classify(query)
+        margin = best_score - runner_up_score
+
+        if len(rule_matches) == 1:
+            agent_name = next(iter(rule_matches))
+            if agent_name == best_label:
+                return Route(agent_name, 0.95, "rule+classifier")
+            return Route(agent_name, 0.8, "rule")
+
+        if len(rule_matches) > 1:
+            # Several intents in one query (e.g. "research and pitch") need the coordinator
+            return Route(None, 0.0, f"ambiguous rules: {sorted(rule_matches)}")
+
+        # No rule fired: trust the classifier only on a clear, well-separated match
+        confidence = min(0.9, best_score) * min(1.0, margin / 0.2) if best_score > 0 else 0.0
+        return Route(best_label if confidence > 0 else None, confidence, "classifier")
+
+intent_router = IntentRouter(TRAINING_EXAMPLES, KEYWORD_RULES)
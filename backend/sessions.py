@@ -0,0 +1,66 @@
+# backend/sessions.py
+import asyncio
+import weakref
+from contextlib import asynccontextmanager
+from google.adk.events import Event, EventActions
+
+# Session state keys naming the session's user and ID, so tools can read them
+# through the public `tool_context.state`
+STATE_USER_ID = "user_id"
+STATE_SESSION_ID = "session_id"
+
+class SessionRouter:
+    """
+    Routes chat turns to per-user, per-conversation ADK sessions.
+    Sessions are created lazily on their first turn. Turns within one session are
+    serialized so the conversation history stays ordered, while turns for different
+    sessions run fully in parallel.
+    """
+
+    def __init__(self, session_service, app_name: str):
+        self._session_service = session_service
+        self._app_name = app_name
+        # Locks disappear on their own once no turn holds or waits on them
+        self._locks = weakref.WeakValueDictionary()
+
+    def _get_lock(self, user_id: str, session_id: str) -> asyncio.Lock:
+        key = (user_id, session_id)
+        lock = self._locks.get(key)
+        if lock is None:
+            lock = asyncio.Lock()
+            self._locks[key] = lock
+        return lock
+
+    async def ensure_session(self, user_id: str, session_id: str):
+        identity = {STATE_USER_ID: user_id, STATE_SESSION_ID: session_id}
+        session = await self._session_service.get_session(
+            app_name=self._app_name,
+            user_id=user_id,
+            session_id=session_id
+        )
+        if session is None:
+            print(f"--- Session: creating session '{session_id}' for user '{user_id}' ---")
+            session = await self._session_service.create_session(
+                app_name=self._app_name,
+                user_id=user_id,
+                session_id=session_id,
+                state=identity
+            )
+        elif any(session.state.get(key) != value for key, value in identity.items()):
+            # Sessions created before the identity was kept in state get it added once
+            await self._session_service.append_event(
+                session,
+                Event(author="system", actions=EventActions(state_delta=identity))
+            )
+        return session
+
+    @asynccontextmanager
+    async def turn(self, user_id: str, session_id: str):
+        """
+        Holds the session's lock for the duration of one agent turn,
+        creating the session first if it does not exist yet.
+        """
+        lock = self._get_lock(user_id, session_id)
+        async with lock:
+            await self.ensure_session(user_id, session_id)
+            yield
@@ -0,0 +1,48 @@
+# backend/singleflight.py
+import asyncio
+from typing import Any, Awaitable, Callable, Dict
+
+class SingleFlight:
+    """
+    Coalesces concurrent calls that share a key: the first caller starts the
+    work, later callers with the same key await the same in-flight task and
+    receive its result (or its exception). The key is released as soon as the
+    call finishes, so results are not retained here.
+
+    One caller's cancellation never cancels a call others still wait for. With
+    `cancel_abandoned`, the call is cancelled once every caller waiting for it has
+    been cancelled (e.g. an idle session's prefetch), instead of running on unobserved.
+    """
+
+    def __init__(self, cancel_abandoned: bool = False):
+        self._cancel_abandoned = cancel_abandoned
+        self._in_flight: Dict[str, asyncio.Task] = {}
+        self._waiters: Dict[asyncio.Task, int] = {}
+
+    def _forget(self, key: str, task: asyncio.Task):
+        if self._in_flight.get(key) is task:
+            del self._in_flight[key]
+
+    async def do(self, key: str, func: Callable[[], Awaitable[Any]]) -> Any:
+        task = self._in_flight.get(key)
+        if task is None:
+            task = asyncio.ensure_future(func())
+            self._in_flight[key] = task
+            task.add_done_callback(lambda _: self._forget(key, task))
+        else:
+            print(f"--- SingleFlight: joining in-flight call {key[:12]} ---")
+        self._waiters[task] = self._waiters.get(task, 0) + 1
+        try:
+            # shield() keeps one caller's cancellation from cancelling the shared call
+            return await asyncio.shield(task)
+        finally:
+            self._waiters[task] -= 1
+            if not self._waiters[task]:
+                del self._waiters[task]
+                if self._cancel_abandoned and not task.done():
+                    # Nobody waits for the result any more; later callers start a fresh call
+                    self._forget(key, task)
+                    task.cancel()
+
+    def in_flight(self) -> int:
+        return len(self._in_flight)
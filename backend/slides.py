@@ -0,0 +1,148 @@
+# backend/slides.py
+import hashlib
+import re
+from typing import List, Sequence, Tuple
+from .clients import get_google_service, execute_google_request
+
+SLIDES_EDIT_URL = "https://docs.google.com/presentation/d/{presentation_id}/edit"
+
+# (title, body) pairs, one per content slide
+DeckSection = Tuple[str, str]
+
+def object_id(seed: str, *parts) -> str:
+    """
+    Builds a deterministic Slides object ID from a seed and a path of parts.
+    IDs only need to be unique within one presentation, so the same deck
+    always produces the same requests (handy for logging and retries).
+    """
+    digest = hashlib.sha1(seed.encode("utf-8")).hexdigest()[:10]
+    suffix = "_".join(str(part) for part in parts)
+    return re.sub(r"[^A-Za-z0-9_\-:]", "_", f"va_{digest}_{suffix}")[:50]
+
+def _plain_text(text: str) -> str:
+    """Drops markdown markers the Slides API would otherwise show literally."""
+    text = re.sub(r"^\s{0,3}#{1,6}\s*", "", text, flags=re.M)
+    text = re.sub(r"(\*\*|__)(.+?)\1", r"\2", text)
+    text = re.sub(r"^\s*[*-]\s+", "• ", text, flags=re.M)
+    return text.strip()
+
+def _text_box_requests(box_id: str, page_id: str, text: str) -> List[dict]:
+    return [
+        {
+            "createShape": {
+                "objectId": box_id,
+                "shapeType": "TEXT_BOX",
+                "elementProperties": {
+                    "pageObjectId": page_id,
+                    "size": {
+                        "height": {"magnitude": 2000000, "unit": "EMU"},
+                        "width": {"magnitude": 4000000, "unit": "EMU"}
+                    },
+                    "transform": {
+                        "scaleX": 1, "scaleY": 1,
+                        "translateX": 1000000, "translateY": 1000000, "unit": "EMU"
+                    }
+                }
+            }
+        },
+        {"insertText": {"objectId": box_id, "insertionIndex": 0, "text": text}}
+    ]
+
+def build_deck_requests(title: str, sections: Sequence[DeckSection], default_slide_ids: Sequence[str] = ()) -> List[dict]:
+    """
+    Builds every request for a deck: a title slide plus one TITLE_AND_BODY slide per
+    section, with placeholders mapped to known IDs so text can be inserted in the
+    same batchUpdate. The presentation's default slides are removed at the end.
+    """
+    requests = []
+
+    title_slide_id = object_id(title, "title")
+    title_shape_id = object_id(title, "title", "heading")
+    requests.append({
+        "createSlide": {
+            "objectId": title_slide_id,
+            "insertionIndex": 0,
+            "slideLayoutReference": {"predefinedLayout": "TITLE_ONLY"},
+            "placeholderIdMappings": [
+                {"layoutPlaceholder": {"type": "TITLE", "index": 0}, "objectId": title_shape_id}
+            ]
+        }
+    })
+    requests.append({"insertText": {"objectId": title_shape_id, "insertionIndex": 0, "text": title}})
+
+    for index, (section_title, body) in enumerate(sections, start=1):
+        slide_id = object_id(title, "slide", index)
+        heading_id = object_id(title, "slide", index, "heading")
+        body_id = object_id(title, "slide", index, "body")
+        requests.append({
+            "createSlide": {
+                "objectId": slide_id,
+                "insertionIndex": index,
+                "slideLayoutReference": {"predefinedLayout": "TITLE_AND_BODY"},
+                "placeholderIdMappings": [
+                    {"layoutPlaceholder": {"type": "TITLE", "index": 0}, "objectId": heading_id},
+                    {"layoutPlaceholder": {"type": "BODY", "index": 0}, "objectId": body_id}
+                ]
+            }
+        })
+        requests.append({"insertText": {"objectId": heading_id, "insertionIndex": 0, "text": section_title}})
+        body_text = _plain_text(body)
+        if body_text:
+            requests.append({"insertText": {"objectId": body_id, "insertionIndex": 0, "text": body_text}})
+
+    requests.extend({"deleteObject": {"objectId": slide_id}} for slide_id in default_slide_ids)
+    return requests
+
+def build_text_slide_requests(seed: str, text: str, default_slide_ids: Sequence[str] = ()) -> List[dict]:
+    """Builds a single blank slide holding one text box."""
+    slide_id = object_id(seed, "slide")
+    requests = [
+        {
+            "createSlide": {
+                "objectId": slide_id,
+                "insertionIndex": 0,
+                "slideLayoutReference": {"predefinedLayout": "BLANK"}
+            }
+        }
+    ]
+    requests.extend(_text_box_requests(object_id(seed, "text"), slide_id, text))
+    requests.extend({"deleteObject": {"objectId": default_id}} for default_id in default_slide_ids)
+    return requests
+
+async def create_presentation(credentials, title: str, build_requests) -> str:
+    """
+    Creates a presentation and fills it with one batchUpdate.
+    `build_requests(default_slide_ids)` returns the request list, so the default
+    slide returned by `create` can be deleted in the same batch.
+    Returns the presentation URL.
+    """
+    service = get_google_service('slides', 'v1')
+
+    presentation = await execute_google_request(
+        'slides',
+        service.presentations().create(body={"title": title}),
+        credentials
+    )
+    presentation_id = presentation['presentationId']
+    default_slide_ids = [slide['objectId'] for slide in presentation.get('slides', [])]
+
+    requests = build_requests(default_slide_ids)
+    print(f"--- Tool: Sending {len(requests)} Slides requests in one batchUpdate ---")
+    await execute_google_request(
+        'slides',
+        service.presentations().batchUpdate(
+            presentationId=presentation_id,
+            body={"requests": requests}
+        ),
+        credentials
+    )
+
+    return SLIDES_EDIT_URL.format(presentation_id=presentation_id)
+
+async def export_deck(credentials, title: str, sections: Sequence[DeckSection]) -> str:
+    """Exports a title plus sections as a slide deck using two Slides API calls."""
+    return await create_presentation(
+        credentials,
+        title,
+        lambda default_slide_ids: build_deck_requests(title, sections, default_slide_ids)
+    )
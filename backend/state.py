@@ -1,3 +1,6 @@
 # backend/state.py
-user_tokens_store = {}
-TEST_USER_ID = "test_user"
\ No newline at end of file
+from .storage import create_token_store
+
+user_tokens_store = create_token_store()
+TEST_USER_ID = "test_user"
+DEFAULT_SESSION_ID = "default_session"
\ No newline at end of file
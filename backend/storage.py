@@ -0,0 +1,423 @@
+# backend/storage.py
+import json
+import os
+import queue
+import sqlite3
+import time
+from collections.abc import MutableMapping
+from contextlib import contextmanager
+from typing import Optional
+from sqlalchemy import event, text
+from google.adk.sessions import InMemorySessionService, DatabaseSessionService
+from .clients import run_blocking
+from .config import STATE_BACKEND, STATE_DB_PATH, SQLITE_POOL_SIZE
+
+SQLITE_BUSY_TIMEOUT_MS = 5000
+
+def _apply_sqlite_pragmas(conn):
+    cursor = conn.cursor()
+    cursor.execute("PRAGMA journal_mode=WAL")
+    cursor.execute("PRAGMA synchronous=NORMAL")
+    cursor.execute(f"PRAGMA busy_timeout={SQLITE_BUSY_TIMEOUT_MS}")
+    cursor.close()
+
+def _ensure_parent_dir(path: str):
+    directory = os.path.dirname(path)
+    if directory:
+        os.makedirs(directory, exist_ok=True)
+
+class SQLiteConnectionPool:
+    """
+    Small fixed-size pool of SQLite connections in WAL mode, shared across
+    threads. Connections are opened lazily up to `size`.
+    """
+
+    def __init__(self, path: str, size: int):
+        _ensure_parent_dir(path)
+        self._path = path
+        self._pool = queue.LifoQueue(maxsize=size)
+        for _ in range(size):
+            self._pool.put(None)
+
+    def _open(self) -> sqlite3.Connection:
+        conn = sqlite3.connect(self._path, check_same_thread=False, timeout=SQLITE_BUSY_TIMEOUT_MS / 1000)
+        _apply_sqlite_pragmas(conn)
+        return conn
+
+    @contextmanager
+    def connection(self):
+        conn = self._pool.get()
+        try:
+            if conn is None:
+                conn = self._open()
+            yield conn
+            conn.commit()
+        except Exception:
+            if conn is not None:
+                conn.rollback()
+            raise
+        finally:
+            self._pool.put(conn)
+
+class MemoryTokenStore(dict):
+    """
+    Per-process OAuth token store. Exposes the same async `load`/`save`/`discard`
+    interface as `SQLiteTokenStore`, which the app uses from the event loop.
+    """
+
+    async def load(self, user_id: str):
+        return self.get(user_id)
+
+    async def save(self, user_id: str, tokens: dict):
+        self[user_id] = tokens
+
+    async def discard(self, user_id: str, refresh_token: Optional[str] = None) -> bool:
+        """
+        Deletes the user's tokens. With `refresh_token`, only if the stored
+        tokens still hold that refresh token. Returns whether anything was deleted.
+        """
+        tokens = self.get(user_id)
+        if tokens is None or (refresh_token is not None and tokens.get("refresh_token") != refresh_token):
+            return False
+        del self[user_id]
+        return True
+
+class SQLiteTokenStore(MutableMapping):
+    """
+    Dict-like OAuth token store persisted in SQLite, so tokens survive restarts
+    and are visible to every worker sharing the database file.
+    Code on the event loop uses the async `load`/`save`/`discard`, which run
+    the queries on the blocking I/O pool.
+    """
+
+    def __init__(self, pool: SQLiteConnectionPool):
+        self._pool = pool
+        with self._pool.connection() as conn:
+            conn.execute(
+                "CREATE TABLE IF NOT EXISTS user_tokens ("
+                "user_id TEXT PRIMARY KEY, tokens TEXT NOT NULL, updated_at REAL NOT NULL)"
+            )
+
+    def __getitem__(self, user_id):
+        with self._pool.connection() as conn:
+            row = conn.execute("SELECT tokens FROM user_tokens WHERE user_id = ?", (user_id,)).fetchone()
+        if row is None:
+            raise KeyError(user_id)
+        return json.loads(row[0])
+
+    def __setitem__(self, user_id, tokens):
+        with self._pool.connection() as conn:
+            conn.execute(
+                "INSERT INTO user_tokens (user_id, tokens, updated_at) VALUES (?, ?, ?) "
+                "ON CONFLICT(user_id) DO UPDATE SET tokens = excluded.tokens, updated_at = excluded.updated_at",
+                (user_id, json.dumps(tokens), time.time())
+            )
+
+    def __delitem__(self, user_id):
+        with self._pool.connection() as conn:
+            cursor = conn.execute("DELETE FROM user_tokens WHERE user_id = ?", (user_id,))
+        if cursor.rowcount == 0:
+            raise KeyError(user_id)
+
+    def __iter__(self):
+        with self._pool.connection() as conn:
+            rows = conn.execute("SELECT user_id FROM user_tokens").fetchall()
+        return iter([row[0] for row in rows])
+
+    def __len__(self):
+        with self._pool.connection() as conn:
+            return conn.execute("SELECT COUNT(*) FROM user_tokens").fetchone()[0]
+
+    async def load(self, user_id: str):
+        return await run_blocking(self.get, user_id)
+
+    async def save(self, user_id: str, tokens: dict):
+        await run_blocking(self.__setitem__, user_id, tokens)
+
+    def _discard(self, user_id: str, refresh_token: Optional[str]) -> bool:
+        with self._pool.connection() as conn:
+            if refresh_token is None:
+                cursor = conn.execute("DELETE FROM user_tokens WHERE user_id = ?", (user_id,))
+            else:
+                # Compare-and-delete, so tokens another worker just stored are kept
+                cursor = conn.execute(
+                    "DELETE FROM user_tokens WHERE user_id = ? AND json_extract(tokens, '$.refresh_token') = ?",
+                    (user_id, refresh_token)
+                )
+        return cursor.rowcount > 0
+
+    async def discard(self, user_id: str, refresh_token: Optional[str] = None) -> bool:
+        """
+        Deletes the user's tokens. With `refresh_token`, only if the stored
+        tokens still hold that refresh token. Returns whether anything was deleted.
+        """
+        return await run_blocking(self._discard, user_id, refresh_token)
+
+JOB_COLUMNS = (
+    "id", "user_id", "session_id", "query", "status", "created_at", "started_at",
+    "finished_at", "result", "error", "updated_at"
+)
+UNFINISHED_JOB_STATUSES = ("queued", "running")
+
+class MemoryJobStore:
+    """
+    Per-process background job records, keyed by job ID. Records are plain
+    dicts of the job's fields plus `updated_at`, the owning worker's last heartbeat.
+    `save` writes the job's state; its progress events are added one at a time with `append_event`.
+    """
+
+    def __init__(self):
+        self._records = {}
+        self._events = {}
+
+    async def save(self, record: dict, now: float):
+        state = {key: value for key, value in record.items() if key != "progress"}
+        self._records[record["id"]] = {**state, "updated_at": now}
+        self._events.setdefault(record["id"], [])
+
+    async def append_event(self, job_id: str, seq: int, event: dict):
+        events = self._events.setdefault(job_id, [])
+        if seq == len(events):
+            events.append(event)
+
+    def _with_progress(self, record: dict) -> dict:
+        return {**record, "progress": list(self._events.get(record["id"], []))}
+
+    async def load(self, job_id: str):
+        record = self._records.get(job_id)
+        return self._with_progress(record) if record is not None else None
+
+    async def touch(self, job_ids, now: float):
+        for job_id in job_ids:
+            if job_id in self._records:
+                self._records[job_id]["updated_at"] = now
+
+    async def stale(self, before: float):
+        return [
+            self._with_progress(record) for record in self._records.values()
+            if record["status"] in UNFINISHED_JOB_STATUSES and record["updated_at"] < before
+        ]
+
+    async def take_over(self, job_id: str, status: str, before: float, now: float) -> bool:
+        record = self._records.get(job_id)
+        if record is None or record["status"] != status or record["updated_at"] >= before:
+            return False
+        record["updated_at"] = now
+        return True
+
+    async def delete_finished(self, before: float) -> int:
+        expired = [
+            job_id for job_id, record in self._records.items()
+            if record["status"] not in UNFINISHED_JOB_STATUSES and record["finished_at"] < before
+        ]
+        for job_id in expired:
+            del self._records[job_id]
+            self._events.pop(job_id, None)
+        return len(expired)
+
+class SQLiteJobStore:
+    """
+    Background job records persisted in SQLite, so any worker sharing the
+    database can read a job and queued jobs survive restarts.
+    Progress events are rows of their own, so recording one is a single insert.
+    Same interface as `MemoryJobStore`; queries run on the blocking I/O pool.
+    """
+
+    def __init__(self, pool: SQLiteConnectionPool):
+        self._pool = pool
+        with self._pool.connection() as conn:
+            conn.execute(
+                "CREATE TABLE IF NOT EXISTS jobs ("
+                "id TEXT PRIMARY KEY, user_id TEXT NOT NULL, session_id TEXT NOT NULL, query TEXT NOT NULL, "
+                "status TEXT NOT NULL, created_at REAL NOT NULL, started_at REAL, finished_at REAL, "
+                "result TEXT, error TEXT, updated_at REAL NOT NULL)"
+            )
+            conn.execute("CREATE INDEX IF NOT EXISTS idx_jobs_status ON jobs (status, updated_at)")
+            conn.execute(
+                "CREATE TABLE IF NOT EXISTS job_events ("
+                "job_id TEXT NOT NULL, seq INTEGER NOT NULL, event TEXT NOT NULL, PRIMARY KEY (job_id, seq))"
+            )
+
+    @staticmethod
+    def _to_record(conn: sqlite3.Connection, row) -> dict:
+        record = dict(zip(JOB_COLUMNS, row))
+        events = conn.execute("SELECT event FROM job_events WHERE job_id = ? ORDER BY seq", (record["id"],)).fetchall()
+        record["progress"] = [json.loads(event[0]) for event in events]
+        return record
+
+    def _save(self, record: dict, now: float):
+        values = {**record, "updated_at": now}
+        with self._pool.connection() as conn:
+            conn.execute(
+                f"INSERT OR REPLACE INTO jobs ({', '.join(JOB_COLUMNS)}) VALUES ({', '.join('?' * len(JOB_COLUMNS))})",
+                [values[column] for column in JOB_COLUMNS]
+            )
+
+    def _append_event(self, job_id: str, seq: int, event: dict):
+        with self._pool.connection() as conn:
+            conn.execute(
+                "INSERT OR IGNORE INTO job_events (job_id, seq, event) VALUES (?, ?, ?)",
+                (job_id, seq, json.dumps(event, default=str))
+            )
+
+    def _load(self, job_id: str):
+        with self._pool.connection() as conn:
+            row = conn.execute(f"SELECT {', '.join(JOB_COLUMNS)} FROM jobs WHERE id = ?", (job_id,)).fetchone()
+            return self._to_record(conn, row) if row is not None else None
+
+    def _touch(self, job_ids, now: float):
+        with self._pool.connection() as conn:
+            conn.executemany("UPDATE jobs SET updated_at = ? WHERE id = ?", [(now, job_id) for job_id in job_ids])
+
+    def _stale(self, before: float):
+        with self._pool.connection() as conn:
+            rows = conn.execute(
+                f"SELECT {', '.join(JOB_COLUMNS)} FROM jobs WHERE status IN (?, ?) AND updated_at < ?",
+                (*UNFINISHED_JOB_STATUSES, before)
+            ).fetchall()
+            return [self._to_record(conn, row) for row in rows]
+
+    def _take_over(self, job_id: str, status: str, before: float, now: float) -> bool:
+        with self._pool.connection() as conn:
+            cursor = conn.execute(
+                "UPDATE jobs SET updated_at = ? WHERE id = ? AND status = ? AND updated_at < ?",
+                (now, job_id, status, before)
+            )
+        return cursor.rowcount > 0
+
+    def _delete_finished(self, before: float) -> int:
+        with self._pool.connection() as conn:
+            conn.execute(
+                "DELETE FROM job_events WHERE job_id IN "
+                "(SELECT id FROM jobs WHERE status NOT IN (?, ?) AND finished_at < ?)",
+                (*UNFINISHED_JOB_STATUSES, before)
+            )
+            cursor = conn.execute(
+                "DELETE FROM jobs WHERE status NOT IN (?, ?) AND finished_at < ?",
+                (*UNFINISHED_JOB_STATUSES, before)
+            )
+        return cursor.rowcount
+
+    async def save(self, record: dict, now: float):
+        """Writes the job's state; a `progress` entry in `record` is ignored."""
+        await run_blocking(self._save, record, now)
+
+    async def append_event(self, job_id: str, seq: int, event: dict):
+        """Stores the job's progress event number `seq` (0-based)."""
+        await run_blocking(self._append_event, job_id, seq, event)
+
+    async def load(self, job_id: str):
+        return await run_blocking(self._load, job_id)
+
+    async def touch(self, job_ids, now: float):
+        if job_ids:
+            await run_blocking(self._touch, list(job_ids), now)
+
+    async def stale(self, before: float):
+        return await run_blocking(self._stale, before)
+
+    async def take_over(self, job_id: str, status: str, before: float, now: float) -> bool:
+        """Claims a job whose owner stopped heartbeating; only one worker wins."""
+        return await run_blocking(self._take_over, job_id, status, before, now)
+
+    async def delete_finished(self, before: float) -> int:
+        return await run_blocking(self._delete_finished, before)
+
+# --- Sessions ---
+def _complete(coro):
+    """
+    Runs a coroutine that never suspends to completion. DatabaseSessionService's
+    async methods only make blocking SQLAlchemy calls, so they can be run this way on a pool thread.
+    """
+    try:
+        coro.send(None)
+    except StopIteration as done:
+        return done.value
+    coro.close()
+    raise RuntimeError("Session service call suspended outside the event loop.")
+
+class ThreadedDatabaseSessionService(DatabaseSessionService):
+    """
+    DatabaseSessionService whose queries run on the blocking I/O pool, so a write
+    waiting on a locked SQLite database (up to the busy timeout) only holds up its own turn.
+    """
+
+    async def create_session(self, **kwargs):
+        return await run_blocking(_complete, super().create_session(**kwargs))
+
+    async def get_session(self, **kwargs):
+        return await run_blocking(_complete, super().get_session(**kwargs))
+
+    async def list_sessions(self, **kwargs):
+        return await run_blocking(_complete, super().list_sessions(**kwargs))
+
+    async def delete_session(self, **kwargs):
+        return await run_blocking(_complete, super().delete_session(**kwargs))
+
+    async def append_event(self, session, event):
+        if event.partial:
+            # Streamed chunks are never stored
+            return event
+        return await run_blocking(_complete, super().append_event(session=session, event=event))
+
+# --- Backend factories ---
+_sqlite_pool = None
+
+def get_sqlite_pool() -> SQLiteConnectionPool:
+    global _sqlite_pool
+    if _sqlite_pool is None:
+        _sqlite_pool = SQLiteConnectionPool(STATE_DB_PATH, SQLITE_POOL_SIZE)
+    return _sqlite_pool
+
+_memory_pool = None
+
+def get_state_pool() -> SQLiteConnectionPool:
+    """
+    Pool for the app's own tables: the state database, or with STATE_BACKEND=memory
+    a private in-memory database (one connection, so every caller sees the same data).
+    """
+    global _memory_pool
+    if STATE_BACKEND == "memory":
+        if _memory_pool is None:
+            _memory_pool = SQLiteConnectionPool(":memory:", 1)
+        return _memory_pool
+    return get_sqlite_pool()
+
+def create_token_store():
+    if STATE_BACKEND == "memory":
+        return MemoryTokenStore()
+    if STATE_BACKEND == "sqlite":
+        return SQLiteTokenStore(get_sqlite_pool())
+    # A Redis-compatible store would plug in here behind the same load/save/discard interface
+    raise ValueError(f"Unsupported STATE_BACKEND '{STATE_BACKEND}'. Use 'memory' or 'sqlite'.")
+
+def create_job_store():
+    if STATE_BACKEND == "memory":
+        return MemoryJobStore()
+    if STATE_BACKEND == "sqlite":
+        return SQLiteJobStore(get_sqlite_pool())
+    raise ValueError(f"Unsupported STATE_BACKEND '{STATE_BACKEND}'. Use 'memory' or 'sqlite'.")
+
+def create_session_service():
+    if STATE_BACKEND == "memory":
+        return InMemorySessionService()
+    if STATE_BACKEND == "sqlite":
+        _ensure_parent_dir(STATE_DB_PATH)
+        service = ThreadedDatabaseSessionService(
+            f"sqlite:///{STATE_DB_PATH}",
+            connect_args={"check_same_thread": False, "timeout": SQLITE_BUSY_TIMEOUT_MS / 1000},
+            pool_size=SQLITE_POOL_SIZE,
+            pool_pre_ping=True
+        )
+        event.listen(service.db_engine, "connect", lambda conn, _: _apply_sqlite_pragmas(conn))
+        with service.db_engine.begin() as conn:
+            # WAL is persistent per database file; also covers connections opened before the listener
+            conn.execute(text("PRAGMA journal_mode=WAL"))
+            # get_session loads a session's events filtered by these columns and ordered by time
+            conn.execute(text(
+                "CREATE INDEX IF NOT EXISTS idx_events_session "
+                "ON events (app_name, user_id, session_id, timestamp)"
+            ))
+        print(f"✅ Using SQLite session service at {STATE_DB_PATH}")
+        return service
+    raise ValueError(f"Unsupported STATE_BACKEND '{STATE_BACKEND}'. Use 'memory' or 'sqlite'.")
@@ -0,0 +1,165 @@
+# backend/tiering.py
+import contextvars
+import time
+from contextlib import contextmanager
+from dataclasses import dataclass, field
+from typing import Dict, Optional, Tuple
+from .admission import admission
+from .resilience import gemini_calls
+from .metrics import TURN_TIER, MODEL_TIER_DECISIONS
+from .config import (
+    MODEL_GEMINI_PRO,
+    MODEL_GEMINI_FLASH,
+    TIERING_ENABLED,
+    TIERING_DEFAULT_LATENCY_BUDGET_MS,
+    TIERING_MAX_PRO_INPUT_TOKENS,
+    TIERING_PRO_MAX_WAIT_SECONDS,
+    TIERING_PRO_MAX_ERROR_RATE,
+    TIERING_EWMA_ALPHA,
+    TIERING_MIN_SAMPLES
+)
+
+TIER_NAMES = {MODEL_GEMINI_PRO: "pro", MODEL_GEMINI_FLASH: "flash"}
+
+@dataclass
+class TurnTier:
+    """Latency budget of one turn and the models that served its LLM calls."""
+    deadline: Optional[float] = None
+    calls: Dict[str, int] = field(default_factory=dict)
+    # (invocation_id, agent_name) -> (model, start time) of LLM calls in flight
+    pending: Dict[Tuple[str, str], Tuple[str, float]] = field(default_factory=dict)
+
+    @property
+    def tier(self) -> str:
+        tiers = {TIER_NAMES.get(model, model) for model in self.calls}
+        if not tiers:
+            return "none"
+        return tiers.pop() if len(tiers) == 1 else "mixed"
+
+class ModelStats:
+    """Exponentially weighted latency and error rate of one model's recent calls."""
+
+    def __init__(self, alpha: float):
+        self._alpha = alpha
+        self.samples = 0
+        self.latency: Optional[float] = None
+        self.error_rate = 0.0
+
+    def observe(self, seconds: float, error: bool):
+        self.samples += 1
+        self.latency = seconds if self.latency is None else self._alpha * seconds + (1 - self._alpha) * self.latency
+        self.error_rate = self._alpha * float(error) + (1 - self._alpha) * self.error_rate
+
+def estimate_tokens(contents) -> int:
+    """Rough size (~4 characters per token) of the text in a request's contents."""
+    return sum(len(part.text or "") for content in contents for part in (content.parts or [])) // 4
+
+class TieringPolicy:
+    """
+    Picks Pro or Flash for each agent LLM call. Agents configured for Pro keep
+    it unless one of these holds, checked in order:
+    - Pro is saturated: its circuit is open, its rate-limit wait is too long
+      or its recent error rate is too high,
+    - the prompt is too large to answer quickly on Pro,
+    - Pro's recent latency no longer fits in what is left of the turn's
+      latency budget.
+    """
+
+    def __init__(self, enabled: bool, max_pro_input_tokens: int, pro_max_wait: float, pro_max_error_rate: float, alpha: float, min_samples: int):
+        self.enabled = enabled
+        self._max_pro_input_tokens = max_pro_input_tokens
+        self._pro_max_wait = pro_max_wait
+        self._pro_max_error_rate = pro_max_error_rate
+        self._min_samples = min_samples
+        self._stats = {model: ModelStats(alpha) for model in TIER_NAMES}
+        self._current: contextvars.ContextVar[Optional[TurnTier]] = contextvars.ContextVar("turn_tier", default=None)
+
+    def current_turn(self) -> Optional[TurnTier]:
+        return self._current.get()
+
+    @contextmanager
+    def turn(self, endpoint: str, latency_budget_ms: Optional[int] = None):
+        """Tracks the tier of one turn and applies its latency budget to the calls made in it."""
+        budget_ms = latency_budget_ms or TIERING_DEFAULT_LATENCY_BUDGET_MS
+        turn = TurnTier(deadline=time.monotonic() + budget_ms / 1000 if budget_ms else None)
+        token = self._current.set(turn)
+        try:
+            yield turn
+        except Exception:
+            # LLM calls still open when the turn failed are what made it fail
+            for model, started_at in turn.pending.values():
+                self.observe(model, time.monotonic() - started_at, error=True)
+            raise
+        finally:
+            self._current.reset(token)
+            if turn.calls:
+                TURN_TIER.inc(endpoint, turn.tier)
+
+    def pro_saturated(self) -> Optional[str]:
+        """Returns why Pro is saturated, or None."""
+        if gemini_calls.breaker(MODEL_GEMINI_PRO).state != "closed":
+            return "pro_circuit_open"
+        if admission.model_wait_estimate(MODEL_GEMINI_PRO) > self._pro_max_wait:
+            return "pro_rate_limited"
+        stats = self._stats[MODEL_GEMINI_PRO]
+        if stats.samples >= self._min_samples and stats.error_rate > self._pro_max_error_rate:
+            return "pro_errors"
+        return None
+
+    def choose(self, configured: str, input_tokens: int) -> Tuple[str, str]:
+        """Returns (model, reason) for one call by an agent configured with `configured`."""
+        if not self.enabled or configured != MODEL_GEMINI_PRO:
+            return configured, "configured"
+        saturated = self.pro_saturated()
+        if saturated:
+            return MODEL_GEMINI_FLASH, saturated
+        if input_tokens > self._max_pro_input_tokens:
+            return MODEL_GEMINI_FLASH, "input_size"
+        turn = self._current.get()
+        if turn is not None and turn.deadline is not None:
+            remaining = turn.deadline - time.monotonic()
+            pro = self._stats[MODEL_GEMINI_PRO]
+            if remaining <= 0 or (pro.samples >= self._min_samples and pro.latency > remaining):
+                return MODEL_GEMINI_FLASH, "latency_budget"
+        return MODEL_GEMINI_PRO, "configured"
+
+    def observe(self, model: str, seconds: float, error: bool):
+        stats = self._stats.get(model)
+        if stats is not None:
+            stats.observe(seconds, error)
+
+tiering = TieringPolicy(
+    enabled=TIERING_ENABLED,
+    max_pro_input_tokens=TIERING_MAX_PRO_INPUT_TOKENS,
+    pro_max_wait=TIERING_PRO_MAX_WAIT_SECONDS,
+    pro_max_error_rate=TIERING_PRO_MAX_ERROR_RATE,
+    alpha=TIERING_EWMA_ALPHA,
+    min_samples=TIERING_MIN_SAMPLES
+)
+
+# --- ADK callbacks ---
+# select_model must run before pacing, metrics and tracing so they all see the selected model.
+# Latency and errors are only observed inside turns started through tiering.turn().
+
+def select_model(callback_context, llm_request):
+    configured = llm_request.model
+    model, reason = tiering.choose(configured, estimate_tokens(llm_request.contents))
+    if model != configured:
+        print(f"--- Tiering: {callback_context.agent_name} uses {model} instead of {configured} ({reason}) ---")
+        llm_request.model = model
+    MODEL_TIER_DECISIONS.inc(configured, model, reason)
+
+    turn = tiering.current_turn()
+    if turn is not None:
+        turn.calls[model] = turn.calls.get(model, 0) + 1
+        turn.pending[(callback_context.invocation_id, callback_context.agent_name)] = (model, time.monotonic())
+
+def observe_model_end(callback_context, llm_response):
+    # Streaming calls report partial chunks first; only the final response closes the call
+    turn = tiering.current_turn()
+    if llm_response.partial or turn is None:
+        return
+    started = turn.pending.pop((callback_context.invocation_id, callback_context.agent_name), None)
+    if started is not None:
+        model, started_at = started
+        tiering.observe(model, time.monotonic() - started_at, bool(llm_response.error_code))
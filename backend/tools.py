@@ -1,28 +1,64 @@
 # backend/tools.py
-from typing import Optional, List
-import google.generativeai as genai
+import asyncio
+from typing import Optional, List, Tuple
 from google.adk.tools.tool_context import ToolContext
 from datetime import datetime, timezone
 from .config import (
     MODEL_GEMINI_FLASH,
-    MODEL_GEMINI_PRO
+    MODEL_GEMINI_PRO,
+    PITCH_SECTION_CONCURRENCY,
+    SUMMARY_CHUNK_THRESHOLD_CHARS,
+    SUMMARY_CHUNK_CHARS,
+    SUMMARY_CHUNK_CONCURRENCY,
+    SUMMARY_MAX_REDUCE_ROUNDS,
+    MEETING_CANDIDATE_SLOTS,
+    GOOGLE_API_BASE_URL
 )
-import requests
-from .state import user_tokens_store, TEST_USER_ID
+from .state import TEST_USER_ID, DEFAULT_SESSION_ID
+from .sessions import STATE_USER_ID, STATE_SESSION_ID
+from .credentials import credential_manager
+from .clients import get_http_client, generate_content
+from .cache import llm_cache
+from .singleflight import SingleFlight
+from .dateparse import parse_meeting_slots, format_slot
+from .availability import query_busy_intervals, first_free_slot, freebusy_cache
+from .slides import export_deck, create_presentation, build_text_slide_requests
+from .drive import drive_uploader
+from .prefetch import prefetcher
+import hashlib
+import re
 import traceback
-from googleapiclient.discovery import build
 from googleapiclient.errors import HttpError
-import uuid
 import json
-from google.oauth2.credentials import Credentials
 
-GOOGLE_CALENDAR_API_ENDPOINT = 'https://www.googleapis.com/calendar/v3/calendars/primary/events';
+GOOGLE_CALENDAR_API_ENDPOINT = f'{GOOGLE_API_BASE_URL}/calendar/v3/calendars/primary/events'
+
+# Bump when a cached tool's prompt changes so stale responses are not served
+VALIDATOR_PROMPT_VERSION = "v1"
+RESEARCH_PROMPT_VERSION = "v1"
+
+# Concurrent identical LLM calls share a single upstream request, cancelled once nobody waits for it
+# (e.g. a prefetch dropped for an idle session)
+_llm_flights = SingleFlight(cancel_abandoned=True)
+
+def _prompt_key(model_name: str, prompt: str) -> str:
+    return hashlib.sha256(f"{model_name}\x1f{prompt}".encode("utf-8")).hexdigest()
+
+def _get_user_id(tool_context: Optional[ToolContext]) -> str:
+    """Returns the ID of the user whose session invoked the tool (set in session state by SessionRouter)."""
+    if tool_context is not None:
+        return tool_context.state.get(STATE_USER_ID, TEST_USER_ID)
+    return TEST_USER_ID
+
+def _session_key(tool_context: ToolContext) -> Tuple[str, str]:
+    """Returns (user_id, session_id) of the session that invoked the tool."""
+    return _get_user_id(tool_context), tool_context.state.get(STATE_SESSION_ID, DEFAULT_SESSION_ID)
 
 # --- Tool Function Definitions ---
 # Each function represents a core operation for its corresponding agent.
 
 # Tool for IdeaValidatorAgent
-def get_validator(idea: str, detailed_feedback: bool = False) -> dict:
+async def get_validator(idea: str, detailed_feedback: bool = False) -> dict:
     """
     Validates a startup idea and provides feedback on its potential and viability.
     Uses an LLM for deeper analysis.
@@ -63,20 +99,26 @@ def get_validator(idea: str, detailed_feedback: bool = False) -> dict:
     user_message = f"Evaluate the following startup idea: {idea}"
 
     try:
-        # Create a model for validation
-        model = genai.GenerativeModel(
-            MODEL_GEMINI_PRO,
-            generation_config=genai.GenerationConfig(
-                response_mime_type="application/json"
+        cache_key = llm_cache.make_key("validator", MODEL_GEMINI_PRO, VALIDATOR_PROMPT_VERSION, idea)
+        validation_result = await llm_cache.get(cache_key)
+
+        async def validate() -> dict:
+            # Send request to LLM
+            response = await generate_content(
+                MODEL_GEMINI_PRO,
+                [system_prompt, user_message],
+                json_output=True
             )
-        )
-        # Send request to LLM
-        response = model.generate_content(
-            [system_prompt, user_message]
-        )
 
-        # Parse JSON response
-        validation_result = json.loads(response.text)
+            # Parse JSON response
+            result = json.loads(response.text)
+            await llm_cache.set(cache_key, "validator", result)
+            return result
+
+        if validation_result is not None:
+            print(f"--- Tool: Using cached validation for idea: {idea} ---")
+        else:
+            validation_result = await _llm_flights.do(cache_key, validate)
 
         if detailed_feedback:
             return {
@@ -94,7 +136,7 @@ def get_validator(idea: str, detailed_feedback: bool = False) -> dict:
         return {"status": "error", "feedback": f"Failed to perform detailed validation due to an internal error: {str(e)}."}
 
 # Tool for MarketResearcherAgent
-def get_research(topic: str) -> dict:
+async def get_research(topic: str, tool_context: ToolContext = None) -> dict:
     """
     Conducts general market research on a given topic, including market size,
     key competitors, current trends, and future outlook using an LLM.
@@ -106,7 +148,23 @@ def get_research(topic: str) -> dict:
     print(f"--- Tool: get_research called for topic: {topic} ---")
 
     try:
-        model = genai.GenerativeModel(MODEL_GEMINI_PRO)
+        if tool_context is not None:
+            # The research prefetched after validation is for the whole idea; a topic about the idea can use it
+            session_key = _session_key(tool_context)
+            prefetched = await prefetcher.take(session_key, "get_research", topic, related=prefetcher.recall(session_key, "idea"))
+            if prefetched is not None:
+                # Keeps the idea as its topic, so the agent sees what the research actually covers
+                return prefetched
+
+        cache_key = llm_cache.make_key("research", MODEL_GEMINI_PRO, RESEARCH_PROMPT_VERSION, topic)
+        research_summary = await llm_cache.get(cache_key)
+        if research_summary is not None:
+            print(f"--- Tool: Using cached research for topic: {topic} ---")
+            return {
+                "status": "success",
+                "summary": research_summary,
+                "topic": topic
+            }
 
         prompt = (
             f"Conduct detailed market research on the '{topic}' industry. "
@@ -121,10 +179,14 @@ def get_research(topic: str) -> dict:
             "Just provide the structured information."
         )
 
-        print(f"--- Tool: Calling LLM for research on '{topic}' with model: {MODEL_GEMINI_PRO} ---")
-        response = model.generate_content(prompt)
+        async def research() -> str:
+            print(f"--- Tool: Calling LLM for research on '{topic}' with model: {MODEL_GEMINI_PRO} ---")
+            response = await generate_content(MODEL_GEMINI_PRO, prompt)
+            summary = response.text
+            await llm_cache.set(cache_key, "research", summary)
+            return summary
 
-        research_summary = response.text
+        research_summary = await _llm_flights.do(cache_key, research)
         print(f"--- Tool: LLM generated research summary. ---")
 
         return {
@@ -141,10 +203,75 @@ def get_research(topic: str) -> dict:
         }
 
 # Tool for PitchDeckGeneratorAgent
-def get_pitch(idea_summary: str, sections: Optional[List[str]] = None) -> str:
+def _build_pitch_section_prompt(idea_summary: str, section: str) -> str:
+    section_title = section.capitalize()
+    prompt = (
+        f"Generate a concise and compelling paragraph for the '{section_title}' section "
+        f"of a startup pitch deck. The startup idea is: '{idea_summary}'.\n\n"
+        f"Focus on key information relevant to a pitch. Do not include any introductory or "
+        f"concluding phrases outside of the generated section content. Start directly with the content for the section. "
+        f"Make sure the content is professional and persuasive."
+    )
+
+    if section.lower() == "problem":
+        prompt += " Specifically, describe the core pain point or unmet need that the idea addresses."
+    elif section.lower() == "solution":
+        prompt += " Specifically, describe how the idea innovatively solves the identified problem."
+    elif section.lower() == "market":
+        prompt += " Specifically, describe the target market, its size, and growth potential."
+    elif section.lower() == "team":
+        prompt += " Specifically, describe the key team members and their relevant experience or unique advantages."
+
+    return prompt
+
+async def generate_pitch_sections(idea_summary: str, sections: Optional[List[str]] = None) -> List[dict]:
+    """
+    Generates pitch deck sections as structured data: a list of
+    {"title", "content", "error"} dicts in the requested order.
+    Sections are generated concurrently (up to PITCH_SECTION_CONCURRENCY at a time).
+    A section that fails has `content` set to None and `error` filled in.
+    """
+    if not sections:
+        sections = ["Problem", "Solution", "Market", "Team"]
+
+    semaphore = asyncio.Semaphore(max(1, PITCH_SECTION_CONCURRENCY))
+
+    async def generate_section(section: str) -> dict:
+        section_title = section.capitalize()
+        prompt = _build_pitch_section_prompt(idea_summary, section)
+        async with semaphore:
+            print(f"--- Tool: Calling LLM for '{section_title}' section with model: {MODEL_GEMINI_FLASH} ---")
+            try:
+                response = await _llm_flights.do(
+                    _prompt_key(MODEL_GEMINI_FLASH, prompt),
+                    lambda: generate_content(MODEL_GEMINI_FLASH, prompt)
+                )
+                section_content = response.text
+            except Exception as e:
+                print(f"--- Tool ERROR: Failed to generate '{section_title}' section for '{idea_summary}'. Error: {e} ---")
+                return {"title": section_title, "content": None, "error": str(e)}
+        print(f"--- Tool: LLM generated content for '{section_title}'. ---")
+        return {"title": section_title, "content": section_content, "error": None}
+
+    # gather() preserves the order of `sections` regardless of completion order
+    return list(await asyncio.gather(*(generate_section(section) for section in sections)))
+
+def _format_pitch_markdown(idea_summary: str, pitch_sections: List[dict]) -> str:
+    generated_content = [f"# Pitch Deck for '{idea_summary}'\n\n"]
+    for section in pitch_sections:
+        if section["error"]:
+            generated_content.append(f"## {section['title']}\n⚠️ Failed to generate this section: {section['error']}\n\n")
+        else:
+            generated_content.append(f"## {section['title']}\n{section['content']}\n\n")
+    return "".join(generated_content)
+
+async def get_pitch(idea_summary: str, sections: Optional[List[str]] = None, tool_context: ToolContext = None) -> str:
     """
     Generates a draft or sections of a pitch deck based on the provided idea summary,
     using an LLM to generate compelling content for each specified section.
+    Sections are generated concurrently (up to PITCH_SECTION_CONCURRENCY at a time)
+    and returned in the requested order. A section that fails is marked in place.
+    The structured deck is kept in session state so it can be exported with 'get_pitch_slides'.
     Args:
         idea_summary (str): A brief description of the startup idea.
         sections (List[str], optional): A list of specific sections to generate
@@ -155,54 +282,176 @@ def get_pitch(idea_summary: str, sections: Optional[List[str]] = None) -> str:
     """
     print(f"--- Tool: get_pitch called for idea: {idea_summary}, sections: {sections} ---")
 
-    if not sections:
-        sections = ["Problem", "Solution", "Market", "Team"]
+    try:
+        pitch_sections = None
+        if tool_context is not None and not sections:
+            pitch_sections = await prefetcher.take(_session_key(tool_context), "get_pitch", idea_summary)
+        if pitch_sections is None:
+            pitch_sections = await generate_pitch_sections(idea_summary, sections)
+    except Exception as e:
+        print(f"--- Tool ERROR: Failed to generate pitch deck content for '{idea_summary}'. Error: {e} ---")
+        return f"Error generating pitch deck: {e}"
+
+    if tool_context:
+        tool_context.state["last_pitch_deck"] = {
+            "idea_summary": idea_summary,
+            "sections": [section for section in pitch_sections if not section["error"]]
+        }
 
-    generated_content = []
-    generated_content.append(f"# Pitch Deck for '{idea_summary}'\n\n")
+    return _format_pitch_markdown(idea_summary, pitch_sections)
+
+async def get_pitch_slides(idea_summary: str = "", sections: Optional[List[str]] = None, tool_context: ToolContext = None) -> str:
+    """
+    Exports a pitch deck to Google Slides: a title slide plus one slide per section.
+    Reuses the deck last generated by 'get_pitch' in this session when available;
+    otherwise generates it for the given idea summary first.
+    Args:
+        idea_summary (str, optional): The startup idea, required only if no deck was generated yet.
+        sections (List[str], optional): Sections to generate when no deck exists yet.
+    Returns:
+        str: A link to the created presentation or an error message.
+    """
+    print(f"--- Tool: get_pitch_slides called for idea: {idea_summary} ---")
+
+    deck = tool_context.state.get("last_pitch_deck") if tool_context else None
+    if not deck or (idea_summary and idea_summary != deck["idea_summary"]):
+        if not idea_summary:
+            return "❌ No pitch deck to export yet. Please describe the idea or generate a pitch deck first."
+        try:
+            pitch_sections = await generate_pitch_sections(idea_summary, sections)
+        except Exception as e:
+            return f"❌ Error generating pitch deck: {e}"
+        deck = {
+            "idea_summary": idea_summary,
+            "sections": [section for section in pitch_sections if not section["error"]]
+        }
+
+    if not deck["sections"]:
+        return "❌ The pitch deck has no sections to export."
+
+    creds = await credential_manager.get_credentials(_get_user_id(tool_context))
+    if not creds:
+        return "❌ No valid Google access token. Please authorize via /auth/google."
 
     try:
-        model = genai.GenerativeModel(MODEL_GEMINI_FLASH)
+        slides_url = await export_deck(
+            creds,
+            f"Pitch Deck: {deck['idea_summary']}",
+            [(section["title"], section["content"]) for section in deck["sections"]]
+        )
+    except HttpError as error:
+        print(f"--- Tool ERROR: Slides API failed: {error} ---")
+        return f"❌ Failed to export pitch deck to Google Slides: {error}"
 
-        for section in sections:
-            section_title = section.capitalize()
-            prompt = (
-                f"Generate a concise and compelling paragraph for the '{section_title}' section "
-                f"of a startup pitch deck. The startup idea is: '{idea_summary}'.\n\n"
-                f"Focus on key information relevant to a pitch. Do not include any introductory or "
-                f"concluding phrases outside of the generated section content. Start directly with the content for the section. "
-                f"Make sure the content is professional and persuasive."
-            )
+    return f"✅ Pitch deck exported to Google Slides ({len(deck['sections'])} sections).\n\n[View Deck]({slides_url})"
 
-            if section.lower() == "problem":
-                prompt += " Specifically, describe the core pain point or unmet need that the idea addresses."
-            elif section.lower() == "solution":
-                prompt += " Specifically, describe how the idea innovatively solves the identified problem."
-            elif section.lower() == "market":
-                prompt += " Specifically, describe the target market, its size, and growth potential."
-            elif section.lower() == "team":
-                prompt += " Specifically, describe the key team members and their relevant experience or unique advantages."
+# Tools for SummarySavingAgent
+SUMMARY_INSTRUCTIONS = (
+    "Please provide a concise, factual, and neutral summary of the following content. "
+    "Focus on the main points and key information. "
+    "The summary should be no longer than 3-5 sentences unless the content is extremely long, "
+    "in which case provide a slightly longer but still concise summary. "
+    "Do not include any introductory phrases like 'Here is a summary...' or 'This content is about...'. "
+    "Just provide the summary directly.\n\n"
+)
 
-            print(f"--- Tool: Calling LLM for '{section_title}' section with model: {MODEL_GEMINI_FLASH} ---")
-            response = model.generate_content(prompt)
-            section_content = response.text
-            print(f"--- Tool: LLM generated content for '{section_title}'. ---")
+def _split_into_chunks(content: str, max_chars: int) -> List[str]:
+    """
+    Splits long content into chunks of at most `max_chars`, preferring section
+    headings and paragraph breaks, then sentence ends, as boundaries.
+    """
+    # Blank lines and markdown headings start a new block
+    blocks = [block.strip() for block in re.split(r"\n\s*\n|\n(?=#{1,6} )", content) if block.strip()]
+
+    pieces = []
+    for block in blocks:
+        if len(block) <= max_chars:
+            pieces.append(block)
+            continue
+        sentence = ""
+        for part in re.split(r"(?<=[.!?])\s+", block):
+            if len(part) > max_chars:
+                # Flush buffered sentences first so hard-cut text stays in order
+                if sentence:
+                    pieces.append(sentence)
+                    sentence = ""
+                while len(part) > max_chars:
+                    pieces.append(part[:max_chars])
+                    part = part[max_chars:]
+            if sentence and len(sentence) + len(part) + 1 > max_chars:
+                pieces.append(sentence)
+                sentence = part
+            else:
+                sentence = f"{sentence} {part}" if sentence else part
+        if sentence:
+            pieces.append(sentence)
+
+    chunks = []
+    current = ""
+    for piece in pieces:
+        if current and len(current) + len(piece) + 2 > max_chars:
+            chunks.append(current)
+            current = piece
+        else:
+            current = f"{current}\n\n{piece}" if current else piece
+    if current:
+        chunks.append(current)
+    return chunks
+
+async def _generate_summary(prompt: str) -> str:
+    response = await _llm_flights.do(
+        _prompt_key(MODEL_GEMINI_FLASH, prompt),
+        lambda: generate_content(MODEL_GEMINI_FLASH, prompt)
+    )
+    return response.text
 
-            generated_content.append(f"## {section_title}\n")
-            generated_content.append(section_content)
-            generated_content.append("\n\n")
+# Another reduce round only pays off if the previous one cut the text by at least this share
+SUMMARY_MIN_SHRINK = 0.1
 
-    except Exception as e:
-        print(f"--- Tool ERROR: Failed to generate pitch deck content for '{idea_summary}'. Error: {e} ---")
-        return f"Error generating pitch deck: {e}"
+async def _map_reduce_summary(content: str, round_number: int = 1) -> str:
+    """
+    Summarizes each chunk concurrently (map), then merges the partial summaries
+    (reduce). Partial summaries that are still too long are reduced again, for at
+    most SUMMARY_MAX_REDUCE_ROUNDS rounds and only while they keep shrinking;
+    after that each one is cut so together they fit the final merge.
+    """
+    chunks = _split_into_chunks(content, SUMMARY_CHUNK_CHARS)
+    print(f"--- Tool: Summarizing {len(chunks)} chunks with model: {MODEL_GEMINI_FLASH} ---")
+    semaphore = asyncio.Semaphore(max(1, SUMMARY_CHUNK_CONCURRENCY))
 
-    return "".join(generated_content)
+    async def summarize_chunk(index: int, chunk: str) -> str:
+        prompt = (
+            f"The following is part {index + 1} of {len(chunks)} of a longer document. "
+            "Summarize the key points, facts and figures of this part in a few sentences. "
+            "Do not include any introductory phrases. Just provide the summary directly.\n\n"
+            f"Part to summarize:\n{chunk}"
+        )
+        async with semaphore:
+            return await _generate_summary(prompt)
 
-# Tools for SummarySavingAgent
-def get_summary(content_to_summarize: str, tool_context: ToolContext) -> str:
+    partial_summaries = await asyncio.gather(*(summarize_chunk(i, chunk) for i, chunk in enumerate(chunks)))
+    combined = "\n\n".join(partial_summaries)
+
+    if len(combined) > SUMMARY_CHUNK_THRESHOLD_CHARS and len(chunks) > 1:
+        if round_number < SUMMARY_MAX_REDUCE_ROUNDS and len(combined) <= len(content) * (1 - SUMMARY_MIN_SHRINK):
+            return await _map_reduce_summary(combined, round_number + 1)
+        print(f"--- Tool: Partial summaries still too long after {round_number} rounds, cutting them to fit ---")
+        per_summary = max(1, SUMMARY_CHUNK_THRESHOLD_CHARS // len(partial_summaries) - 2)
+        combined = "\n\n".join(summary[:per_summary] for summary in partial_summaries)
+
+    prompt = (
+        SUMMARY_INSTRUCTIONS +
+        "The content below consists of summaries of consecutive parts of one document; "
+        "merge them into a single summary of the whole document.\n\n"
+        f"Content to summarize:\n{combined}"
+    )
+    return await _generate_summary(prompt)
+
+async def get_summary(content_to_summarize: str, tool_context: ToolContext) -> str:
     """
     Creates a brief, high-quality summary of the provided content using an LLM.
     and stores it in the session state for later saving.
+    Long content is split into chunks that are summarized concurrently and then merged.
     Args:
         content_to_summarize (str): Long text or report to be summarized.
         tool_context (ToolContext): ADK ToolContext for accessing session state.
@@ -216,27 +465,22 @@ def get_summary(content_to_summarize: str, tool_context: ToolContext) -> str:
         return f"Summary: The provided content is too short (less than {MIN_CONTENT_LENGTH} characters) to generate a meaningful summary. Content received: '{content_to_summarize}'"
 
     try:
-        model = genai.GenerativeModel(MODEL_GEMINI_FLASH)
-
-        prompt = (
-            f"Please provide a concise, factual, and neutral summary of the following content. "
-            "Focus on the main points and key information. "
-            "The summary should be no longer than 3-5 sentences unless the content is extremely long, "
-            "in which case provide a slightly longer but still concise summary. "
-            "Do not include any introductory phrases like 'Here is a summary...' or 'This content is about...'. "
-            "Just provide the summary directly.\n\n"
-            "Content to summarize:\n"
-            f"{content_to_summarize}"
-        )
+        if len(content_to_summarize) > SUMMARY_CHUNK_THRESHOLD_CHARS:
+            llm_summary = await _map_reduce_summary(content_to_summarize)
+        else:
+            prompt = (
+                SUMMARY_INSTRUCTIONS +
+                "Content to summarize:\n"
+                f"{content_to_summarize}"
+            )
 
-        print(f"--- Tool: Calling LLM for summarization with model: {MODEL_GEMINI_FLASH} ---")
-        response = model.generate_content(prompt)
-        llm_summary = response.text
+            print(f"--- Tool: Calling LLM for summarization with model: {MODEL_GEMINI_FLASH} ---")
+            llm_summary = await _generate_summary(prompt)
         print(f"--- Tool: LLM generated summary. ---")
 
         # Save summary to session state
         tool_context.state["last_summary"] = llm_summary
-        tool_context.state["last_summary_timestamp"] = datetime.now()
+        tool_context.state["last_summary_timestamp"] = datetime.now().isoformat()
         print(f"--- Tool: Summary saved to session state via tool_context. Current state: {tool_context.state} ---")
 
         return f"Summary: {llm_summary}"
@@ -245,13 +489,13 @@ def get_summary(content_to_summarize: str, tool_context: ToolContext) -> str:
         print(f"--- Tool ERROR: Failed to generate summary. Error: {e} ---")
         return f"Error: Could not generate a summary due to an internal LLM error: {e}"
 
-def get_saver(content_to_save: Optional[str] = None, file_name: Optional[str] = None, tool_context: ToolContext = None) -> str:
+async def get_saver(content_to_save: Optional[str] = None, file_name: Optional[str] = None, tool_context: ToolContext = None) -> str:
     """
     Saves content to Google Drive using provided credentials.
     Prioritizes content from session state if available and no explicit content_to_save is provided.
+    Saving identical content again returns the existing file; uploads that fail
+    on a transient error are retried in the background.
     """
-    # from main import user_tokens_store, TEST_USER_ID
-
     print(f"--- Tool: get_saver called. Content provided directly: {content_to_save is not None}, file_name: {file_name} ---")
 
     actual_content_to_save = content_to_save
@@ -283,54 +527,38 @@ def get_saver(content_to_save: Optional[str] = None, file_name: Optional[str] =
             file_name = file_name[:90] + ".txt"
         print(f"--- Tool: Generated file_name: {file_name} ---")
 
-    tokens = user_tokens_store.get(TEST_USER_ID)
-    if not tokens or "token" not in tokens:
+    user_id = _get_user_id(tool_context)
+    access_token = await credential_manager.get_token(user_id)
+    if not access_token:
         return "Error: No valid Google access token. Please authorize via /auth/google."
 
-    access_token = tokens["token"]
-
-    metadata = {
-        'name': file_name,
-        'mimeType': 'text/plain'
-    }
-
-    files = {
-        'metadata': ('metadata', json.dumps(metadata), 'application/json'),
-        'file': (file_name, actual_content_to_save, 'text/plain')
-    }
-
-    headers = {
-        'Authorization': f'Bearer {access_token}'
-    }
-
     try:
-        upload_url = 'https://www.googleapis.com/upload/drive/v3/files?uploadType=multipart'
-        response = requests.post(upload_url, headers=headers, files=files)
-        response.raise_for_status()
-        file_id = response.json().get('id')
-
-        tool_context.state["last_summary"] = None
-        tool_context.state["last_summary_timestamp"] = None
-        print(f"--- Tool: Cleared session state after saving. ---")
-
-        if file_id:
-            return f"✅ Saved to Google Drive: https://drive.google.com/file/d/{file_id}/view"
-        else:
-            return "⚠️ Upload succeeded but file ID was not returned."
-
+        result = await drive_uploader.save(user_id, access_token, file_name, actual_content_to_save)
     except Exception as e:
         print(f"❌ Upload error: {e}")
         return f"❌ Failed to upload to Google Drive: {e}"
 
+    tool_context.state["last_summary"] = None
+    tool_context.state["last_summary_timestamp"] = None
+    print(f"--- Tool: Cleared session state after saving. ---")
+
+    file_id = result["file_id"]
+    if result["status"] == "queued":
+        return "⏳ Google Drive is not reachable right now. The file has been queued and will be uploaded automatically."
+    if not file_id:
+        return "⚠️ Upload succeeded but file ID was not returned."
+    if result["status"] == "existing":
+        return f"✅ This content is already saved in Google Drive: https://drive.google.com/file/d/{file_id}/view"
+    return f"✅ Saved to Google Drive: https://drive.google.com/file/d/{file_id}/view"
+
 # Tool for LogoCreatorAgent
-def get_logo(idea_description: str) -> str:
+async def get_logo(idea_description: str, tool_context: ToolContext = None) -> str:
     """
     Generates a logo concept using Gemini and creates a Google Slides slide for visual representation.
     """
     print(f"--- Tool: get_logo called for idea: {idea_description} ---")
 
     try:
-        model = genai.GenerativeModel(MODEL_GEMINI_PRO)
         prompt = (
             f"Generate a concise and creative concept for a startup logo based on the idea:\n'{idea_description}'\n\n"
             "Include:\n"
@@ -340,70 +568,25 @@ def get_logo(idea_description: str) -> str:
             "4. Mood/impression\n"
             "Return as a plain list in the format: Icon:..., Colors:..., Font:..., Mood:..."
         )
-        response = model.generate_content(prompt)
+        response = await generate_content(MODEL_GEMINI_PRO, prompt)
         concept_text = response.text.strip()
         print("--- Tool: LLM generated logo concept ---")
 
     except Exception as e:
         return f"❌ Error generating logo concept: {e}"
 
-    tokens = user_tokens_store.get(TEST_USER_ID)
-    if not tokens or "token" not in tokens:
+    creds = await credential_manager.get_credentials(_get_user_id(tool_context))
+    if not creds:
         return "❌ No valid Google access token. Please authorize via /auth/google."
 
-    access_token = tokens["token"]
-    creds = Credentials(token=access_token)
-
     try:
-        service = build('slides', 'v1', credentials=creds)
-
-        presentation = service.presentations().create(
-            body={"title": f"Logo for: {idea_description}"}
-        ).execute()
-
-        presentation_id = presentation['presentationId']
-        slide_id = str(uuid.uuid4())[:8]
-
-        requests = [
-            {
-                "createSlide": {
-                    "objectId": slide_id,
-                    "insertionIndex": "1",
-                    "slideLayoutReference": {"predefinedLayout": "BLANK"}
-                }
-            },
-            {
-                "createShape": {
-                    "objectId": "logo_text",
-                    "shapeType": "TEXT_BOX",
-                    "elementProperties": {
-                        "pageObjectId": slide_id,
-                        "size": {
-                            "height": {"magnitude": 2000000, "unit": "EMU"},
-                            "width": {"magnitude": 4000000, "unit": "EMU"}
-                        },
-                        "transform": {
-                            "scaleX": 1, "scaleY": 1,
-                            "translateX": 1000000, "translateY": 1000000, "unit": "EMU"
-                        }
-                    }
-                }
-            },
-            {
-                "insertText": {
-                    "objectId": "logo_text",
-                    "insertionIndex": 0,
-                    "text": concept_text
-                }
-            }
-        ]
-
-        service.presentations().batchUpdate(
-            presentationId=presentation_id,
-            body={"requests": requests}
-        ).execute()
-
-        slide_url = f"https://docs.google.com/presentation/d/{presentation_id}/edit"
+        slide_url = await create_presentation(
+            creds,
+            f"Logo for: {idea_description}",
+            lambda default_slide_ids: build_text_slide_requests(
+                f"logo:{idea_description}", concept_text, default_slide_ids
+            )
+        )
 
         return f"✅ Logo concept created and visualized in Google Slides.\n\nConcept:\n{concept_text}\n\n[View Slide]({slide_url})"
 
@@ -412,8 +595,30 @@ def get_logo(idea_description: str) -> str:
         return f"❌ Failed to create logo slide: {error}"
 
 # Tool for MeetMakerAgent
-def extract_meeting_slots(preferred_date: str, model_name: str = MODEL_GEMINI_FLASH) -> list:
-    now_utc = datetime.now(timezone.utc).strftime("%Y-%m-%dT%H:%M:%SZ")
+ISO_SLOT_PATTERN = re.compile(
+    r"(\d{4}-\d{2}-\d{2}T\d{2}:\d{2}(?::\d{2})?(?:\.\d+)?(?:Z|[+-]\d{2}:\d{2})?)"
+    r".*?"
+    r"(\d{4}-\d{2}-\d{2}T\d{2}:\d{2}(?::\d{2})?(?:\.\d+)?(?:Z|[+-]\d{2}:\d{2})?)"
+)
+
+def _parse_iso_utc(value: str) -> datetime:
+    parsed = datetime.fromisoformat(value.replace("Z", "+00:00"))
+    if parsed.tzinfo is None:
+        parsed = parsed.replace(tzinfo=timezone.utc)
+    return parsed.astimezone(timezone.utc)
+
+async def extract_meeting_slots(preferred_date: str, model_name: str = MODEL_GEMINI_FLASH, max_slots: int = 3) -> list:
+    """
+    Resolves a preferred date phrase into 1-hour (start, end) UTC slots.
+    Common phrasings are parsed locally; the LLM is only asked when the local parser cannot resolve the phrase.
+    """
+    slots = parse_meeting_slots(preferred_date, max_slots=max_slots)
+    if slots:
+        print(f"--- Tool: Resolved slots locally: {[format_slot(slot) for slot in slots]} ---")
+        return slots
+
+    now = datetime.now(timezone.utc)
+    now_utc = now.strftime("%Y-%m-%dT%H:%M:%SZ")
 
     prompt = (
         f"You are an assistant helping to schedule meetings. The current date and time is: {now_utc}.\n"
@@ -427,18 +632,28 @@ def extract_meeting_slots(preferred_date: str, model_name: str = MODEL_GEMINI_FL
     )
 
     try:
-        model = genai.GenerativeModel(model_name)
-        response = model.generate_content(prompt)
-        slots = [line.strip("- ").strip() for line in response.text.splitlines() if line.startswith("-")]
-        print(f"--- Tool: Extracted slots: {slots} ---")
+        response = await generate_content(model_name, prompt)
+        slots = []
+        for line in response.text.splitlines():
+            match = ISO_SLOT_PATTERN.search(line)
+            if not match:
+                continue
+            try:
+                start_dt, end_dt = _parse_iso_utc(match.group(1)), _parse_iso_utc(match.group(2))
+            except ValueError:
+                continue
+            if start_dt > now and end_dt > start_dt:
+                slots.append((start_dt, end_dt))
+        print(f"--- Tool: Extracted slots with LLM: {[format_slot(slot) for slot in slots]} ---")
         return slots
     except Exception as e:
         print(f"❌ Error extracting time slots: {e}")
         return []
 
-def get_meeting(purpose: str, participant_email: str, preferred_date: str) -> str:
+async def get_meeting(purpose: str, participant_email: str, preferred_date: str, tool_context: ToolContext = None) -> str:
     """
     Schedules a real meeting in Google Calendar with Google Meet link.
+    Books the first candidate slot that is free for both the user and the participant.
     """
     print(f"--- Tool: get_meeting called for purpose: {purpose}, participant: {participant_email}, preferred_date: '{preferred_date}' ---")
 
@@ -446,25 +661,33 @@ def get_meeting(purpose: str, participant_email: str, preferred_date: str) -> st
         print(f"--- Tool: Invalid email format for participant: {participant_email} ---")
         return "Failed to organize meeting. Please ensure a valid participant email is provided (e.g., 'name@example.com')."
 
-    slots = extract_meeting_slots(preferred_date)
-    print(f"--- Tool: Extracted slots: {slots} ---")
+    slots = await extract_meeting_slots(preferred_date, max_slots=MEETING_CANDIDATE_SLOTS)
     if not slots:
         return "❌ Failed to interpret the preferred date. Please try a more specific one."
-    
+
+    user_id = _get_user_id(tool_context)
+    access_token = await credential_manager.get_token(user_id)
+    if not access_token:
+        return "❌ No valid Google access token. Please authorize via /auth/google."
+
     try:
-        first_slot = slots[0]
-        start_str, end_str = [s.strip() for s in first_slot.split("to")]
-        start_dt = datetime.fromisoformat(start_str.replace("Z", "+00:00"))
-        end_dt = datetime.fromisoformat(end_str.replace("Z", "+00:00"))
-        print(f"--- Tool: Parsed times: {start_dt} to {end_dt} ---")
+        busy = await query_busy_intervals(
+            user_id,
+            access_token,
+            calendars=["primary", participant_email],
+            time_min=min(start for start, _ in slots),
+            time_max=max(end for _, end in slots)
+        )
+        free_slot = first_free_slot(slots, busy)
+        if free_slot is None:
+            return f"❌ All proposed times for '{preferred_date}' conflict with existing events. Please suggest another date or time."
     except Exception as e:
-        return f"❌ Failed to parse generated time slot: {e}"
-    
-    tokens = user_tokens_store.get(TEST_USER_ID)
-    if not tokens or "token" not in tokens:
-        return "❌ No valid Google access token. Please authorize via /auth/google."
-    
-    access_token = tokens["token"]
+        # Availability is an optimization: fall back to the first candidate rather than failing
+        print(f"--- Tool ERROR: Free/busy query failed, booking the first candidate slot. Error: {e} ---")
+        free_slot = slots[0]
+
+    start_dt, end_dt = free_slot
+    print(f"--- Tool: Selected slot: {start_dt} to {end_dt} ---")
 
     event_data = {
         "summary": purpose,
@@ -488,11 +711,11 @@ def get_meeting(purpose: str, participant_email: str, preferred_date: str) -> st
     params = {"conferenceDataVersion": 1}
     
     try:
-        response = requests.post(
+        response = await get_http_client().post(
             GOOGLE_CALENDAR_API_ENDPOINT,
             headers=headers,
             params=params,
-            data=json.dumps(event_data)
+            content=json.dumps(event_data)
         )
 
         print(f"--- Tool: Calendar API response code: {response.status_code} ---")
@@ -509,6 +732,8 @@ def get_meeting(purpose: str, participant_email: str, preferred_date: str) -> st
                     meet_link = entry.get("uri")
                     break
 
+        freebusy_cache.add_busy(user_id, (start_dt, end_dt))
+
         print("--- Tool: Full event created ---")
         print(json.dumps(event, indent=2))
         return f"✅ Meeting scheduled on {start_dt} with {participant_email}. Google Meet link: {meet_link or '[None]'}"
@@ -516,4 +741,29 @@ def get_meeting(purpose: str, participant_email: str, preferred_date: str) -> st
     except Exception as e:
         traceback.print_exc()
         print(f"--- Tool ERROR: Failed to generate meeting confirmation for '{participant_email}'. Error: {e} ---")
-        return f"An error occurred while trying to organize the meeting: {e}. Please try again later."
\ No newline at end of file
+        return f"An error occurred while trying to organize the meeting: {e}. Please try again later."
+
+# --- Speculative prefetch of the next step (validator -> research -> pitch) ---
+async def _prefetch_research(topic: str) -> Optional[dict]:
+    result = await get_research(topic)
+    return result if result.get("status") == "success" else None
+
+async def _prefetch_pitch_sections(idea_summary: str) -> Optional[List[dict]]:
+    pitch_sections = await generate_pitch_sections(idea_summary)
+    return None if any(section["error"] for section in pitch_sections) else pitch_sections
+
+def prefetch_next_step(tool, args, tool_context, tool_response):
+    """
+    After-tool callback: once a step of the validate -> research -> pitch flow
+    succeeds, starts the likely next one in the background (see prefetch.py).
+    """
+    if not prefetcher.enabled or not isinstance(tool_response, dict) or tool_response.get("status") == "error":
+        return
+    session_key = _session_key(tool_context)
+    if tool.name == "get_validator":
+        idea = args.get("idea", "")
+        prefetcher.remember(session_key, "idea", idea)
+        prefetcher.schedule(session_key, "get_research", idea, MODEL_GEMINI_PRO, lambda: _prefetch_research(idea))
+    elif tool.name == "get_research":
+        idea = prefetcher.recall(session_key, "idea") or args.get("topic", "")
+        prefetcher.schedule(session_key, "get_pitch", idea, MODEL_GEMINI_FLASH, lambda: _prefetch_pitch_sections(idea))
@@ -0,0 +1,330 @@
+# backend/tracing.py
+import asyncio
+import contextvars
+import json
+import os
+import random
+import secrets
+import threading
+import time
+from collections import OrderedDict
+from contextlib import contextmanager
+from typing import Dict, List, Optional
+import httpx
+from .config import (
+    TRACING_SAMPLE_RATE,
+    TRACING_EXPORTER,
+    TRACING_JSON_PATH,
+    TRACING_OTLP_ENDPOINT,
+    TRACING_MAX_TRACES,
+    TRACING_MAX_SPANS_PER_TRACE
+)
+
+SERVICE_NAME = "venture-assist-ai"
+
+# OTLP span kinds
+KIND_INTERNAL = 1
+KIND_SERVER = 2
+KIND_CLIENT = 3
+
+class Span:
+    __slots__ = ("trace", "span_id", "parent", "name", "kind", "start_ns", "end_ns", "attributes", "error")
+
+    def __init__(self, trace: "Trace", name: str, parent: Optional["Span"], kind: int, attributes: dict):
+        self.trace = trace
+        self.span_id = secrets.token_hex(8)
+        self.parent = parent
+        self.name = name
+        self.kind = kind
+        self.start_ns = time.time_ns()
+        self.end_ns: Optional[int] = None
+        self.attributes = attributes
+        self.error: Optional[str] = None
+
+    def set(self, **attributes):
+        self.attributes.update(attributes)
+
+    def end(self, error: Optional[str] = None):
+        if self.end_ns is None:
+            self.end_ns = time.time_ns()
+        if error:
+            self.error = error
+
+    @property
+    def traceparent(self) -> str:
+        """W3C trace context header for outgoing requests."""
+        return f"00-{self.trace.trace_id}-{self.span_id}-01"
+
+    def to_dict(self) -> dict:
+        return {
+            "span_id": self.span_id,
+            "parent_span_id": self.parent.span_id if self.parent else None,
+            "name": self.name,
+            "kind": self.kind,
+            "start_ns": self.start_ns,
+            "end_ns": self.end_ns,
+            "attributes": self.attributes,
+            "error": self.error,
+        }
+
+class Trace:
+    def __init__(self, name: str):
+        self.trace_id = secrets.token_hex(16)
+        self.name = name
+        self.spans: List[Span] = []
+        self.dropped_spans = 0
+        self.finished = False
+
+    @property
+    def root(self) -> Optional[Span]:
+        return self.spans[0] if self.spans else None
+
+    def add(self, span: Span) -> bool:
+        if self.finished or len(self.spans) >= TRACING_MAX_SPANS_PER_TRACE:
+            self.dropped_spans += 1
+            return False
+        self.spans.append(span)
+        return True
+
+    def to_dict(self) -> dict:
+        """Spans in start order with offsets and depth, ready to draw as a waterfall."""
+        spans = sorted(self.spans, key=lambda span: span.start_ns)
+        start_ns = spans[0].start_ns if spans else 0
+        depth: Dict[str, int] = {}
+        waterfall = []
+        for span in spans:
+            depth[span.span_id] = depth.get(span.parent.span_id, -1) + 1 if span.parent else 0
+            entry = span.to_dict()
+            entry["depth"] = depth[span.span_id]
+            entry["offset_ms"] = round((span.start_ns - start_ns) / 1e6, 3)
+            entry["duration_ms"] = round(((span.end_ns or span.start_ns) - span.start_ns) / 1e6, 3)
+            waterfall.append(entry)
+        return {
+            "trace_id": self.trace_id,
+            "name": self.name,
+            "duration_ms": waterfall[0]["duration_ms"] if waterfall else 0,
+            "dropped_spans": self.dropped_spans,
+            "spans": waterfall,
+        }
+
+def _otlp_value(value) -> dict:
+    if isinstance(value, bool):
+        return {"boolValue": value}
+    if isinstance(value, int):
+        return {"intValue": str(value)}
+    if isinstance(value, float):
+        return {"doubleValue": value}
+    return {"stringValue": str(value)}
+
+def to_otlp(trace: Trace) -> dict:
+    """Encodes a trace as an OTLP/JSON ExportTraceServiceRequest."""
+    spans = []
+    for span in trace.spans:
+        otlp_span = {
+            "traceId": trace.trace_id,
+            "spanId": span.span_id,
+            "name": span.name,
+            "kind": span.kind,
+            "startTimeUnixNano": str(span.start_ns),
+            "endTimeUnixNano": str(span.end_ns or span.start_ns),
+            "attributes": [{"key": key, "value": _otlp_value(value)} for key, value in span.attributes.items()],
+            "status": {"code": 2, "message": span.error} if span.error else {"code": 1},
+        }
+        if span.parent:
+            otlp_span["parentSpanId"] = span.parent.span_id
+        spans.append(otlp_span)
+    return {
+        "resourceSpans": [{
+            "resource": {"attributes": [{"key": "service.name", "value": {"stringValue": SERVICE_NAME}}]},
+            "scopeSpans": [{"scope": {"name": "backend.tracing"}, "spans": spans}],
+        }]
+    }
+
+class Tracer:
+    """
+    Minimal span tracer built on contextvars.
+    A root span is started per turn and sampled up front (head-based), so
+    unsampled turns cost a single random() call and every nested `span()`
+    is a no-op. Finished traces are kept in memory for GET /traces/{id}
+    and optionally exported as JSON lines or OTLP/JSON.
+    """
+
+    def __init__(self, sample_rate: float, exporter: str, json_path: str, otlp_endpoint: str, max_traces: int):
+        if exporter not in ("none", "json", "otlp"):
+            raise ValueError(f"Unsupported TRACING_EXPORTER '{exporter}'. Use 'none', 'json' or 'otlp'.")
+        self.sample_rate = sample_rate
+        self._exporter = exporter
+        self._json_path = json_path
+        self._otlp_endpoint = otlp_endpoint
+        self._max_traces = max_traces
+        self._traces: "OrderedDict[str, Trace]" = OrderedDict()
+        self._current: contextvars.ContextVar[Optional[Span]] = contextvars.ContextVar("current_span", default=None)
+        self._file_lock = threading.Lock()
+        self._export_client: Optional[httpx.AsyncClient] = None
+        self._export_tasks = set()
+        # Spans opened by ADK callbacks, keyed by invocation/call so the closing callback can find them
+        self.open_spans: Dict[tuple, Span] = {}
+
+    # --- Span lifecycle ---
+    def current_span(self) -> Optional[Span]:
+        return self._current.get()
+
+    def start_span(self, name: str, parent: Optional[Span] = None, kind: int = KIND_INTERNAL, **attributes) -> Optional[Span]:
+        """Starts a child of `parent` (or of the current span) and makes it current. Returns None when not tracing."""
+        parent = parent or self._current.get()
+        if parent is None or parent.trace.finished:
+            return None
+        span = Span(parent.trace, name, parent, kind, attributes)
+        if not parent.trace.add(span):
+            return None
+        self._current.set(span)
+        return span
+
+    def end_span(self, span: Optional[Span], error: Optional[str] = None):
+        """Ends `span` and makes its parent current again."""
+        if span is None:
+            return
+        span.end(error)
+        self._current.set(span.parent)
+
+    @contextmanager
+    def trace(self, name: str, **attributes):
+        """Starts a new root span for a turn; yields None when the turn is not sampled."""
+        if self.sample_rate <= 0 or random.random() >= self.sample_rate:
+            yield None
+            return
+        trace = Trace(name)
+        root = Span(trace, name, None, KIND_SERVER, attributes)
+        trace.add(root)
+        token = self._current.set(root)
+        try:
+            yield root
+        except BaseException as e:
+            root.error = root.error or type(e).__name__
+            raise
+        finally:
+            self._current.reset(token)
+            self._finish(trace)
+
+    @contextmanager
+    def span(self, name: str, kind: int = KIND_INTERNAL, **attributes):
+        """Traces the enclosed block as a child of the current span."""
+        span = self.start_span(name, kind=kind, **attributes)
+        if span is None:
+            yield None
+            return
+        try:
+            yield span
+        except BaseException as e:
+            span.error = f"{type(e).__name__}: {e}"
+            raise
+        finally:
+            self.end_span(span)
+
+    # --- Storage and export ---
+    def _finish(self, trace: Trace):
+        end_ns = time.time_ns()
+        for span in trace.spans:
+            # Spans left open by a failed call are closed at the end of the turn
+            if span.end_ns is None:
+                span.end_ns = end_ns
+        trace.finished = True
+        for key in [key for key, span in self.open_spans.items() if span.trace is trace]:
+            del self.open_spans[key]
+
+        self._traces[trace.trace_id] = trace
+        while len(self._traces) > self._max_traces:
+            self._traces.popitem(last=False)
+
+        if self._exporter != "none":
+            try:
+                loop = asyncio.get_running_loop()
+            except RuntimeError:
+                return
+            # Run the export outside the turn's context so it cannot add spans to any trace
+            task = contextvars.Context().run(loop.create_task, self._export(trace))
+            self._export_tasks.add(task)
+            task.add_done_callback(self._export_tasks.discard)
+
+    def get(self, trace_id: str) -> Optional[Trace]:
+        return self._traces.get(trace_id)
+
+    def _append_json(self, line: str):
+        directory = os.path.dirname(self._json_path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        with self._file_lock, open(self._json_path, "a", encoding="utf-8") as f:
+            f.write(line + "\n")
+
+    async def _export(self, trace: Trace):
+        try:
+            if self._exporter == "json":
+                await asyncio.to_thread(self._append_json, json.dumps(trace.to_dict(), default=str))
+            elif self._exporter == "otlp":
+                # A separate client keeps exports out of the instrumented upstream metrics and spans
+                if self._export_client is None:
+                    self._export_client = httpx.AsyncClient(timeout=5)
+                response = await self._export_client.post(self._otlp_endpoint, json=to_otlp(trace))
+                response.raise_for_status()
+        except Exception as e:
+            print(f"--- Tracing ERROR: Failed to export trace {trace.trace_id}. Error: {e} ---")
+
+    async def close(self):
+        if self._export_tasks:
+            await asyncio.gather(*self._export_tasks, return_exceptions=True)
+        if self._export_client is not None:
+            await self._export_client.aclose()
+            self._export_client = None
+
+tracer = Tracer(
+    sample_rate=TRACING_SAMPLE_RATE,
+    exporter=TRACING_EXPORTER,
+    json_path=TRACING_JSON_PATH,
+    otlp_endpoint=TRACING_OTLP_ENDPOINT,
+    max_traces=TRACING_MAX_TRACES
+)
+
+# --- ADK callbacks ---
+# Agent spans are looked up by invocation so model and tool spans attach to
+# the right agent even if an earlier call raised without closing its span.
+
+def trace_agent_start(callback_context):
+    span = tracer.start_span(f"agent {callback_context.agent_name}", agent=callback_context.agent_name)
+    if span is not None:
+        tracer.open_spans[("agent", callback_context.invocation_id, callback_context.agent_name)] = span
+
+def trace_agent_end(callback_context):
+    tracer.end_span(tracer.open_spans.pop(("agent", callback_context.invocation_id, callback_context.agent_name), None))
+
+def trace_model_start(callback_context, llm_request):
+    parent = tracer.open_spans.get(("agent", callback_context.invocation_id, callback_context.agent_name))
+    if parent is None:
+        return
+    span = tracer.start_span(
+        f"llm {llm_request.model}", parent=parent, kind=KIND_CLIENT,
+        agent=callback_context.agent_name, model=llm_request.model, contents=len(llm_request.contents)
+    )
+    if span is not None:
+        tracer.open_spans[("model", callback_context.invocation_id, callback_context.agent_name)] = span
+
+def trace_model_end(callback_context, llm_response):
+    if llm_response.partial:
+        return
+    span = tracer.open_spans.pop(("model", callback_context.invocation_id, callback_context.agent_name), None)
+    if span is None:
+        return
+    usage = llm_response.usage_metadata
+    if usage is not None:
+        span.set(input_tokens=usage.prompt_token_count or 0, output_tokens=usage.candidates_token_count or 0)
+    tracer.end_span(span, error=llm_response.error_code)
+
+def trace_tool_start(tool, args, tool_context):
+    parent = tracer.open_spans.get(("agent", tool_context.invocation_id, tool_context.agent_name))
+    if parent is None:
+        return
+    span = tracer.start_span(f"tool {tool.name}", parent=parent, agent=tool_context.agent_name, tool=tool.name)
+    if span is not None:
+        tracer.open_spans[("tool", tool_context.function_call_id)] = span
+
+def trace_tool_end(tool, args, tool_context, tool_response):
+    tracer.end_span(tracer.open_spans.pop(("tool", tool_context.function_call_id), None))
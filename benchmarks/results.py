@@ -0,0 +1,148 @@
+# benchmarks/results.py
+"""Percentiles, Prometheus scraping helpers and stored-result comparison."""
+import argparse
+import json
+import math
+import re
+import sys
+from collections import defaultdict
+from typing import Dict, List, Optional, Sequence, Tuple
+
+METRIC_LINE = re.compile(r"^(\w+)(?:\{(.*)\})? (\S+)$")
+LABEL_PAIR = re.compile(r'(\w+)="((?:[^"\\]|\\.)*)"')
+
+# Stored results are compared on these keys of each "latency" block
+COMPARED_STATS = ("p50_ms", "p95_ms", "p99_ms")
+
+def percentile(values: Sequence[float], q: float) -> Optional[float]:
+    """Nearest-rank percentile, q in [0, 100]."""
+    if not values:
+        return None
+    ordered = sorted(values)
+    rank = max(1, math.ceil(q / 100 * len(ordered)))
+    return ordered[rank - 1]
+
+def latency_summary(values_seconds: Sequence[float]) -> dict:
+    values_ms = [value * 1000 for value in values_seconds]
+    if not values_ms:
+        return {"count": 0}
+    return {
+        "count": len(values_ms),
+        "mean_ms": round(sum(values_ms) / len(values_ms), 2),
+        "p50_ms": round(percentile(values_ms, 50), 2),
+        "p95_ms": round(percentile(values_ms, 95), 2),
+        "p99_ms": round(percentile(values_ms, 99), 2),
+        "max_ms": round(max(values_ms), 2),
+    }
+
+# --- Prometheus histograms from /metrics ---
+def parse_histograms(text: str, metric: str, group_by: str) -> Dict[str, dict]:
+    """
+    Collects `metric` histogram series from Prometheus text, summed per value of
+    the `group_by` label: {label_value: {"count", "sum", "buckets": {le: count}}}.
+    """
+    series: Dict[str, dict] = defaultdict(lambda: {"count": 0.0, "sum": 0.0, "buckets": defaultdict(float)})
+    for line in text.splitlines():
+        match = METRIC_LINE.match(line)
+        if not match or not match.group(1).startswith(metric):
+            continue
+        name, raw_labels, value = match.groups()
+        labels = dict(LABEL_PAIR.findall(raw_labels or ""))
+        entry = series[labels.get(group_by, "")]
+        if name == f"{metric}_count":
+            entry["count"] += float(value)
+        elif name == f"{metric}_sum":
+            entry["sum"] += float(value)
+        elif name == f"{metric}_bucket":
+            entry["buckets"][labels["le"]] += float(value)
+    return series
+
+def _bucket_quantile(buckets: List[Tuple[float, float]], total: float, q: float) -> Optional[float]:
+    """Estimates a quantile from cumulative buckets by linear interpolation, like PromQL's histogram_quantile."""
+    if total <= 0:
+        return None
+    target = q * total
+    previous_bound, previous_count = 0.0, 0.0
+    for bound, count in buckets:
+        if count >= target:
+            if math.isinf(bound):
+                return previous_bound
+            span = count - previous_count
+            fraction = (target - previous_count) / span if span else 1.0
+            return previous_bound + (bound - previous_bound) * fraction
+        previous_bound, previous_count = bound, count
+    return previous_bound
+
+def histogram_delta(before: Dict[str, dict], after: Dict[str, dict]) -> Dict[str, dict]:
+    """Per-label count, mean and estimated p50/p95 for observations made between two scrapes."""
+    summary = {}
+    for key, entry in after.items():
+        previous = before.get(key, {"count": 0.0, "sum": 0.0, "buckets": {}})
+        count = entry["count"] - previous["count"]
+        if count <= 0:
+            continue
+        buckets = sorted(
+            (float(le.replace("+Inf", "inf")), value - previous["buckets"].get(le, 0.0))
+            for le, value in entry["buckets"].items()
+        )
+        p50 = _bucket_quantile(buckets, count, 0.50)
+        p95 = _bucket_quantile(buckets, count, 0.95)
+        summary[key] = {
+            "count": int(count),
+            "mean_ms": round((entry["sum"] - previous["sum"]) / count * 1000, 2),
+            "p50_ms": round(p50 * 1000, 2) if p50 is not None else None,
+            "p95_ms": round(p95 * 1000, 2) if p95 is not None else None,
+        }
+    return summary
+
+# --- Comparison of stored runs ---
+def load(path: str) -> dict:
+    with open(path, encoding="utf-8") as f:
+        return json.load(f)
+
+def compare(baseline: dict, current: dict, threshold: float) -> Tuple[List[str], List[str]]:
+    """
+    Compares two stored runs. Returns (report lines, regressions), where a
+    regression is a latency percentile more than `threshold` (e.g. 0.10) slower,
+    or throughput more than `threshold` lower.
+    """
+    lines, regressions = [], []
+
+    def check(name: str, old: Optional[float], new: Optional[float], higher_is_worse: bool = True):
+        if old is None or new is None:
+            return
+        change = (new - old) / old if old else 0.0
+        worse = change > threshold if higher_is_worse else change < -threshold
+        marker = "REGRESSION" if worse else ""
+        lines.append(f"  {name:<48} {old:>10.2f} -> {new:>10.2f}  ({change:+.1%}) {marker}")
+        if worse:
+            regressions.append(name)
+
+    lines.append(f"Baseline: {baseline.get('label')} ({baseline.get('started_at')})")
+    lines.append(f"Current:  {current.get('label')} ({current.get('started_at')})")
+    check("throughput_turns_per_s", baseline.get("throughput_turns_per_s"), current.get("throughput_turns_per_s"), higher_is_worse=False)
+    for stat in COMPARED_STATS:
+        check(f"turn latency {stat}", baseline["latency"].get(stat), current["latency"].get(stat))
+    for section in ("tools", "upstream", "gemini"):
+        for key, entry in sorted(current.get(section, {}).items()):
+            old_entry = baseline.get(section, {}).get(key)
+            if old_entry:
+                check(f"{section} {key} p95_ms", old_entry.get("p95_ms"), entry.get("p95_ms"))
+    return lines, regressions
+
+def main():
+    parser = argparse.ArgumentParser(description="Compare two stored benchmark runs.")
+    parser.add_argument("baseline")
+    parser.add_argument("current")
+    parser.add_argument("--threshold", type=float, default=0.10, help="Relative slowdown reported as a regression (default 0.10).")
+    args = parser.parse_args()
+
+    lines, regressions = compare(load(args.baseline), load(args.current), args.threshold)
+    print("\n".join(lines))
+    if regressions:
+        print(f"\n❌ {len(regressions)} regression(s) above {args.threshold:.0%}")
+        sys.exit(1)
+    print("\n✅ No regressions")
+
+if __name__ == "__main__":
+    main()
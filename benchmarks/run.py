@@ -0,0 +1,261 @@
+# benchmarks/run.py
+"""
+Offline load test for the backend.
+
+Starts the upstream stub server and the FastAPI app from backend/main.py in
+this process, replays scripted multi-turn conversations against /chat at a
+fixed concurrency and reports turn latency percentiles, throughput and
+per-tool / per-upstream timings (from the app's /metrics). Results are
+stored as JSON so runs can be compared:
+
+    python -m benchmarks.run --conversations 40 --concurrency 8 --label baseline
+    python -m benchmarks.run --gemini-latency-ms 800 --compare benchmarks/results/<baseline>.json
+"""
+import argparse
+import asyncio
+import json
+import os
+import subprocess
+import sys
+import threading
+import time
+from datetime import datetime, timedelta, timezone
+
+import httpx
+import uvicorn
+
+from .results import latency_summary, parse_histograms, histogram_delta, compare, load
+from .scenarios import SCENARIOS, DEFAULT_MIX
+from .stub_server import StubConfig, Fault, create_app
+
+RESULTS_DIR = os.path.join(os.path.dirname(__file__), "results")
+
+def parse_args():
+    parser = argparse.ArgumentParser(description="Benchmark /chat against local Gemini and Google API stand-ins.")
+    parser.add_argument("--conversations", type=int, default=20, help="Scripted conversations to replay.")
+    parser.add_argument("--concurrency", type=int, default=4, help="Conversations running at the same time.")
+    parser.add_argument("--scenarios", nargs="+", default=DEFAULT_MIX, choices=sorted(SCENARIOS), help="Scenario mix, assigned round-robin.")
+    parser.add_argument("--warmup", type=int, default=1, help="Conversations run first and left out of the results.")
+    parser.add_argument("--label", default="run", help="Name stored with the results.")
+    parser.add_argument("--stub-config", help="JSON file with stub 'faults' per API and 'response_words'; overrides the latency flags.")
+    parser.add_argument("--gemini-latency-ms", type=float, default=300.0)
+    parser.add_argument("--google-latency-ms", type=float, default=80.0, help="Latency of Drive, Calendar and Slides.")
+    parser.add_argument("--jitter-ms", type=float, default=0.0, help="Standard deviation added to every injected latency.")
+    parser.add_argument("--error-rate", type=float, default=0.0, help="Fraction of upstream calls that fail with 503.")
+    parser.add_argument("--stub-port", type=int, default=8765)
+    parser.add_argument("--app-port", type=int, default=8766)
+    parser.add_argument("--timeout", type=float, default=120.0, help="Per-turn client timeout in seconds.")
+    parser.add_argument("--production-admission", action="store_true", help="Keep the production admission limits instead of lifting them.")
+    parser.add_argument("--no-save", action="store_true", help="Do not store the results.")
+    parser.add_argument("--compare", help="Stored run to compare against.")
+    parser.add_argument("--threshold", type=float, default=0.10, help="Relative slowdown reported as a regression.")
+    return parser.parse_args()
+
+def build_stub_config(args) -> StubConfig:
+    if args.stub_config:
+        with open(args.stub_config, encoding="utf-8") as f:
+            return StubConfig.from_dict(json.load(f))
+    google = Fault(args.google_latency_ms, args.jitter_ms, args.error_rate)
+    return StubConfig(faults={
+        "gemini": Fault(args.gemini_latency_ms, args.jitter_ms, args.error_rate),
+        "drive": google,
+        "calendar": google,
+        "slides": google,
+    })
+
+# Production quotas (e.g. 2 Pro calls/s) would turn most load into 429s and measure the limiter, not the app
+BENCHMARK_ADMISSION = {
+    "ADMISSION_USER_TURNS_PER_MINUTE": "0",
+    "ADMISSION_PRO_CALLS_PER_SECOND": "0",
+    "ADMISSION_FLASH_CALLS_PER_SECOND": "0",
+    "ADMISSION_MAX_CONCURRENT_TURNS": "1000",
+    "ADMISSION_MAX_QUEUED_TURNS": "1000",
+}
+
+def configure_environment(stub_url: str, production_admission: bool = False):
+    """Points the backend at the stub. Must run before `backend` is imported, since config is read at import."""
+    os.environ["GEMINI_API_BASE_URL"] = stub_url
+    os.environ["GOOGLE_API_BASE_URL"] = stub_url
+    if not production_admission:
+        os.environ.update(BENCHMARK_ADMISSION)
+    for name, value in {
+        "GOOGLE_API_KEY": "benchmark",
+        "GOOGLE_CLIENT_ID": "benchmark",
+        "GOOGLE_CLIENT_SECRET": "benchmark",
+        "GOOGLE_REDIRECT_URI": "http://localhost/oauth2callback",
+        "GOOGLE_PROJECT_ID": "benchmark",
+        "FRONTEND_URL": "http://localhost",
+        "AUTH_SECRET_KEY": "benchmark",
+        "STATE_BACKEND": "memory",
+        # Cached answers would hide upstream latency; opt back in by exporting it
+        "LLM_CACHE_ENABLED": "false",
+        # Speculative calls would add load that no turn asked for
+        "PREFETCH_ENABLED": "false",
+        "TRACING_SAMPLE_RATE": "0",
+    }.items():
+        os.environ.setdefault(name, value)
+
+def start_stub(config: StubConfig, port: int) -> uvicorn.Server:
+    """Runs the stub on its own thread and event loop so it does not compete with the app."""
+    server = uvicorn.Server(uvicorn.Config(create_app(config), host="127.0.0.1", port=port, log_level="warning"))
+    threading.Thread(target=server.run, daemon=True).start()
+    while not server.started:
+        time.sleep(0.05)
+    return server
+
+async def seed_credentials(credential_manager, user_ids):
+    from google.oauth2.credentials import Credentials
+
+    expiry = datetime.now(timezone.utc).replace(tzinfo=None) + timedelta(days=1)
+    for user_id in user_ids:
+        await credential_manager.store(user_id, Credentials(token=f"stub-token-{user_id}", expiry=expiry))
+
+async def run_conversation(client: httpx.AsyncClient, index: int, scenario: str, turns: list):
+    from backend.auth import SESSION_COOKIE, signer
+
+    user_id = f"bench_user_{index}"
+    session_id = f"bench_session_{index}"
+    # The app identifies users by their signed session cookie only
+    headers = {"Cookie": f"{SESSION_COOKIE}={signer.sign(user_id)}"}
+    for turn_index, query in enumerate(turns):
+        started = time.perf_counter()
+        try:
+            response = await client.post("/chat", json={"query": query, "session_id": session_id}, headers=headers)
+            ok = response.status_code == 200
+            status = response.status_code
+        except httpx.HTTPError as e:
+            ok, status = False, type(e).__name__
+        turns[turn_index] = {
+            "scenario": scenario,
+            "turn": turn_index,
+            "latency_s": time.perf_counter() - started,
+            "ok": ok,
+            "status": status,
+        }
+
+async def replay(client: httpx.AsyncClient, conversations: int, concurrency: int, scenarios: list, offset: int = 0) -> list:
+    semaphore = asyncio.Semaphore(concurrency)
+    records = []
+
+    async def one(index: int):
+        scenario = scenarios[index % len(scenarios)]
+        turns = list(SCENARIOS[scenario])
+        async with semaphore:
+            await run_conversation(client, offset + index, scenario, turns)
+        records.extend(turns)
+
+    await asyncio.gather(*(one(index) for index in range(conversations)))
+    return records
+
+def git_revision() -> str:
+    try:
+        return subprocess.run(["git", "rev-parse", "--short", "HEAD"], capture_output=True, text=True, check=True).stdout.strip()
+    except Exception:
+        return "unknown"
+
+def print_report(result: dict):
+    latency = result["latency"]
+    print(f"\n=== {result['label']} @ {result['git_revision']} ===")
+    print(f"Turns: {latency['count']} ok, {result['errors']} errors, {result['rejected']} rejected (429) in {result['duration_s']:.1f}s "
+          f"-> {result['throughput_turns_per_s']:.2f} turns/s at concurrency {result['concurrency']}")
+    if latency["count"]:
+        print(f"Turn latency: p50 {latency['p50_ms']:.0f} ms | p95 {latency['p95_ms']:.0f} ms | p99 {latency['p99_ms']:.0f} ms | max {latency['max_ms']:.0f} ms")
+    for section, title in (("scenarios", "Per scenario"), ("tools", "Per tool"), ("gemini", "Gemini (tools)"), ("upstream", "Google APIs"), ("model_calls", "Agent LLM calls")):
+        if not result[section]:
+            continue
+        print(f"\n{title}:")
+        for key, entry in sorted(result[section].items()):
+            p95 = entry.get("p95_ms")
+            print(f"  {key:<32} n={entry['count']:<5} mean {entry['mean_ms']:>9.1f} ms   p95 {p95 if p95 is not None else '-':>9} ms")
+
+async def main_async(args) -> dict:
+    stub_url = f"http://127.0.0.1:{args.stub_port}"
+    configure_environment(stub_url, args.production_admission)
+    stub_server = start_stub(build_stub_config(args), args.stub_port)
+
+    from backend.main import app
+    from backend.credentials import credential_manager
+
+    app_server = uvicorn.Server(uvicorn.Config(app, host="127.0.0.1", port=args.app_port, log_level="warning"))
+    app_task = asyncio.create_task(app_server.serve())
+    while not app_server.started:
+        await asyncio.sleep(0.05)
+
+    total = args.warmup + args.conversations
+    await seed_credentials(credential_manager, [f"bench_user_{index}" for index in range(total)])
+
+    limits = httpx.Limits(max_connections=args.concurrency + 2)
+    async with httpx.AsyncClient(base_url=f"http://127.0.0.1:{args.app_port}", timeout=args.timeout, limits=limits) as client:
+        try:
+            if args.warmup:
+                await replay(client, args.warmup, 1, args.scenarios)
+
+            metrics_before = (await client.get("/metrics")).text
+            started_at = datetime.now(timezone.utc)
+            started = time.perf_counter()
+            records = await replay(client, args.conversations, args.concurrency, args.scenarios, offset=args.warmup)
+            duration = time.perf_counter() - started
+            metrics_after = (await client.get("/metrics")).text
+        finally:
+            app_server.should_exit = True
+            await app_task
+            stub_server.should_exit = True
+
+    def deltas(metric: str, group_by: str) -> dict:
+        return histogram_delta(parse_histograms(metrics_before, metric, group_by), parse_histograms(metrics_after, metric, group_by))
+
+    ok_latencies = [record["latency_s"] for record in records if record["ok"]]
+    rejected = sum(1 for record in records if record["status"] == 429)
+    by_scenario = {
+        scenario: latency_summary([record["latency_s"] for record in records if record["scenario"] == scenario and record["ok"]])
+        for scenario in sorted({record["scenario"] for record in records})
+    }
+    return {
+        "label": args.label,
+        "started_at": started_at.isoformat(),
+        "git_revision": git_revision(),
+        "config": {
+            "conversations": args.conversations,
+            "concurrency": args.concurrency,
+            "scenarios": args.scenarios,
+            "admission": "production" if args.production_admission else "lifted",
+            "stub": {api: vars(fault) for api, fault in build_stub_config(args).faults.items()},
+        },
+        "concurrency": args.concurrency,
+        "duration_s": round(duration, 3),
+        # Shed turns are reported apart from failures; neither counts towards latency or throughput
+        "errors": sum(1 for record in records if not record["ok"]) - rejected,
+        "rejected": rejected,
+        "throughput_turns_per_s": round(len(ok_latencies) / duration, 3) if duration else 0.0,
+        "latency": latency_summary(ok_latencies),
+        "scenarios": {scenario: summary for scenario, summary in by_scenario.items() if summary["count"]},
+        "tools": deltas("va_tool_duration_seconds", "tool"),
+        "gemini": deltas("va_gemini_request_duration_seconds", "model"),
+        "upstream": deltas("va_upstream_request_duration_seconds", "api"),
+        "model_calls": deltas("va_model_call_duration_seconds", "agent"),
+        "turns": records,
+    }
+
+def main():
+    args = parse_args()
+    result = asyncio.run(main_async(args))
+    print_report(result)
+
+    if not args.no_save:
+        os.makedirs(RESULTS_DIR, exist_ok=True)
+        timestamp = datetime.now(timezone.utc).strftime("%Y%m%d_%H%M%S")
+        path = os.path.join(RESULTS_DIR, f"{timestamp}_{args.label}.json")
+        with open(path, "w", encoding="utf-8") as f:
+            json.dump(result, f, indent=2, default=str)
+        print(f"\n✅ Results saved to {path}")
+
+    if args.compare:
+        lines, regressions = compare(load(args.compare), result, args.threshold)
+        print("\n" + "\n".join(lines))
+        if regressions:
+            print(f"\n❌ {len(regressions)} regression(s) above {args.threshold:.0%}")
+            sys.exit(1)
+        print("\n✅ No regressions")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,32 @@
+# benchmarks/scenarios.py
+"""Scripted multi-turn conversations replayed by the benchmark runner."""
+
+IDEA = "an AI assistant that helps small farms plan irrigation from soil sensor data"
+
+SCENARIOS = {
+    # The most common flow: validate, research, then pitch
+    "validate_research_pitch": [
+        f"Validate my startup idea: {IDEA}",
+        "Research the market and competitors for precision agriculture software",
+        f"Create a pitch deck for {IDEA}",
+    ],
+    # Long-form content: summarize, then save to Drive
+    "summarize_and_save": [
+        "Summarize this for my notes: " + " ".join(
+            f"Section {i}: farms lose up to 30% of water to poor scheduling; sensors and forecasts can cut that in half."
+            for i in range(1, 41)
+        ),
+        "Save the summary to my Google Drive",
+    ],
+    # Google Slides and Calendar tools
+    "logo_and_meeting": [
+        f"Design a logo for {IDEA}",
+        "Schedule a meeting with investor@example.com next Tuesday at 3pm to discuss the seed round",
+    ],
+    "pitch_to_slides": [
+        f"Create a pitch deck for {IDEA} with Problem, Solution, Market, Team, Business Model and Competition sections",
+        "Export the pitch deck to Google Slides",
+    ],
+}
+
+DEFAULT_MIX = ["validate_research_pitch", "summarize_and_save", "logo_and_meeting", "pitch_to_slides"]
@@ -0,0 +1,305 @@
+# benchmarks/stub_server.py
+"""
+Local stand-in for the Gemini API and the Google Drive, Calendar and Slides
+REST endpoints used by the backend, with configurable latency and error
+injection. Point the backend at it with:
+
+    GEMINI_API_BASE_URL=http://127.0.0.1:8765
+    GOOGLE_API_BASE_URL=http://127.0.0.1:8765
+
+Run standalone with `python -m benchmarks.stub_server --port 8765`.
+"""
+import argparse
+import asyncio
+import json
+import random
+import re
+import uuid
+from dataclasses import dataclass, field
+from typing import Dict, Optional
+from fastapi import FastAPI, Request
+from fastapi.responses import JSONResponse, Response, StreamingResponse
+
+# Sub-agent picked by the stub coordinator, by keyword in the user's message
+ROUTING_KEYWORDS = [
+    ("pitch", "PitchDeckGeneratorAgent"),
+    ("deck", "PitchDeckGeneratorAgent"),
+    ("research", "MarketResearcherAgent"),
+    ("market", "MarketResearcherAgent"),
+    ("competitor", "MarketResearcherAgent"),
+    ("summar", "SummarySaverAgent"),
+    ("save", "SummarySaverAgent"),
+    ("drive", "SummarySaverAgent"),
+    ("logo", "LogoCreatorAgent"),
+    ("meeting", "MeetMakerAgent"),
+    ("schedule", "MeetMakerAgent"),
+    ("validat", "IdeaValidatorAgent"),
+    ("evaluate", "IdeaValidatorAgent"),
+]
+DEFAULT_AGENT = "IdeaValidatorAgent"
+
+# Agents with several tools call the one whose keyword appears in the message, else their first tool
+TOOL_KEYWORDS = {
+    "get_saver": "save",
+    "get_pitch_slides": "slides",
+}
+
+# Arguments the stub model passes for well-known tool parameters
+ARGUMENT_DEFAULTS = {
+    "participant_email": "investor@example.com",
+    "preferred_date": "next Tuesday at 3pm",
+    "detailed_feedback": False,
+}
+
+VALIDATION_RESULT = {
+    "status": "success",
+    "validation_score": 7,
+    "feedback": "Clear problem and a reachable early market; differentiation needs work.",
+    "recommendations": ["Interview 20 target users", "Size the initial niche", "Prototype the core workflow"],
+}
+
+@dataclass
+class Fault:
+    """Latency (mean ± jitter, in ms) and error rate injected into one upstream API."""
+    latency_ms: float = 0.0
+    jitter_ms: float = 0.0
+    error_rate: float = 0.0
+
+    async def apply(self) -> bool:
+        """Sleeps for the injected latency; returns True when this call should fail."""
+        delay = max(0.0, random.gauss(self.latency_ms, self.jitter_ms)) if self.jitter_ms else self.latency_ms
+        if delay:
+            await asyncio.sleep(delay / 1000)
+        return random.random() < self.error_rate
+
+@dataclass
+class StubConfig:
+    faults: Dict[str, Fault] = field(default_factory=lambda: {
+        "gemini": Fault(),
+        "drive": Fault(),
+        "calendar": Fault(),
+        "slides": Fault(),
+    })
+    # Approximate size of generated text, in words
+    response_words: int = 120
+
+    @classmethod
+    def from_dict(cls, data: dict) -> "StubConfig":
+        config = cls(response_words=data.get("response_words", 120))
+        for api, values in data.get("faults", {}).items():
+            config.faults[api] = Fault(**values)
+        return config
+
+def _error(status_code: int, message: str) -> JSONResponse:
+    return JSONResponse(status_code=status_code, content={"error": {"code": status_code, "message": message, "status": "UNAVAILABLE"}})
+
+def _text_of(content: dict) -> str:
+    return " ".join(part.get("text", "") for part in content.get("parts", []) if "text" in part)
+
+def _last_user_text(contents: list) -> str:
+    for content in reversed(contents):
+        if content.get("role") == "user":
+            text = _text_of(content)
+            if text and not text.startswith("For context:"):
+                return text
+    return ""
+
+def _route(text: str) -> Optional[str]:
+    lowered = text.lower()
+    for keyword, agent_name in ROUTING_KEYWORDS:
+        if keyword in lowered:
+            return agent_name
+    return None
+
+def _own_agent_name(body: dict) -> Optional[str]:
+    """ADK tells each agent its name in the system instruction."""
+    instruction = _text_of(body.get("systemInstruction") or {})
+    match = re.search(r'Your internal name is "([^"]+)"', instruction)
+    return match.group(1) if match else None
+
+def _tool_arguments(declaration: dict, user_text: str) -> dict:
+    args = {}
+    parameters = declaration.get("parameters") or {}
+    properties = parameters.get("properties") or {}
+    for name in parameters.get("required") or list(properties):
+        if name in ARGUMENT_DEFAULTS:
+            args[name] = ARGUMENT_DEFAULTS[name]
+        elif (properties.get(name) or {}).get("type", "").upper() == "STRING":
+            args[name] = user_text[:200] or "AI assistant for small farms"
+    return args
+
+def _filler_text(words: int, seed: str) -> str:
+    vocabulary = ["market", "customers", "growth", "product", "team", "revenue", "AI", "platform", "users", "startup", "scale", "data"]
+    rng = random.Random(seed)
+    return " ".join(rng.choice(vocabulary) for _ in range(words)).capitalize() + "."
+
+def _model_turn(body: dict, config: StubConfig) -> dict:
+    """
+    Decides what the stub model answers:
+    - a function call when tools are declared and the last turn is the user's,
+    - a final text answer after a tool result,
+    - plain text (or the validator JSON) for tool-side calls without tools.
+    """
+    contents = body.get("contents") or []
+    declarations = [
+        declaration
+        for tool in body.get("tools") or []
+        for declaration in tool.get("functionDeclarations") or []
+    ]
+    last_parts = contents[-1].get("parts", []) if contents else []
+    answered_tool = any("functionResponse" in part for part in last_parts)
+    user_text = _last_user_text(contents)
+
+    if declarations and not answered_tool:
+        tools = [declaration for declaration in declarations if declaration["name"] != "transfer_to_agent"]
+        can_transfer = len(tools) < len(declarations)
+        target = _route(user_text)
+        # A sub-agent still active from the previous turn hands off when the user changes topic
+        if tools and can_transfer and target and target != _own_agent_name(body):
+            return {"functionCall": {"name": "transfer_to_agent", "args": {"agent_name": target}}}
+        if tools:
+            declaration = next(
+                (tool for tool in tools if TOOL_KEYWORDS.get(tool["name"], "\0") in user_text.lower()),
+                tools[0]
+            )
+            return {"functionCall": {"name": declaration["name"], "args": _tool_arguments(declaration, user_text)}}
+        return {"functionCall": {"name": "transfer_to_agent", "args": {"agent_name": target or DEFAULT_AGENT}}}
+
+    generation_config = body.get("generationConfig") or {}
+    if generation_config.get("responseMimeType") == "application/json":
+        return {"text": json.dumps(VALIDATION_RESULT)}
+    return {"text": _filler_text(config.response_words, user_text or json.dumps(contents[-1:]))}
+
+def _generate_response(part: dict, body: dict) -> dict:
+    prompt_words = sum(len(_text_of(content).split()) for content in body.get("contents") or [])
+    output_words = len(part.get("text", "").split()) or 5
+    return {
+        "candidates": [{"content": {"role": "model", "parts": [part]}, "finishReason": "STOP", "index": 0}],
+        "usageMetadata": {
+            "promptTokenCount": int(prompt_words * 1.3),
+            "candidatesTokenCount": int(output_words * 1.3),
+            "totalTokenCount": int((prompt_words + output_words) * 1.3),
+        },
+        "modelVersion": "stub",
+    }
+
+def create_app(config: Optional[StubConfig] = None) -> FastAPI:
+    config = config or StubConfig()
+    app = FastAPI(title="Venture Assist AI upstream stub")
+    app.state.config = config
+    app.state.calls = {api: 0 for api in config.faults}
+    upload_sessions: Dict[str, int] = {}
+
+    async def inject(api: str) -> bool:
+        app.state.calls[api] = app.state.calls.get(api, 0) + 1
+        return await config.faults[api].apply()
+
+    # --- Gemini ---
+    @app.post("/{api_version}/models/{model_action}")
+    async def gemini(api_version: str, model_action: str, request: Request):
+        model, _, action = model_action.partition(":")
+        if await inject("gemini"):
+            return _error(503, f"Injected failure for {model}")
+        body = await request.json()
+        response = _generate_response(_model_turn(body, config), body)
+
+        if action == "streamGenerateContent":
+            async def stream():
+                yield f"data: {json.dumps(response)}\r\n\r\n"
+            return StreamingResponse(stream(), media_type="text/event-stream")
+        return response
+
+    # --- Drive ---
+    @app.post("/upload/drive/v3/files")
+    async def drive_upload(request: Request, uploadType: str = "multipart"):
+        if await inject("drive"):
+            return _error(503, "Injected Drive failure")
+        if uploadType == "resumable":
+            session_id = uuid.uuid4().hex
+            upload_sessions[session_id] = int(request.headers.get("X-Upload-Content-Length", "0"))
+            return Response(status_code=200, headers={"Location": f"{request.base_url}upload/drive/v3/sessions/{session_id}"})
+        await request.body()
+        return {"id": f"file_{uuid.uuid4().hex[:12]}", "name": "upload.txt"}
+
+    @app.put("/upload/drive/v3/sessions/{session_id}")
+    async def drive_upload_chunk(session_id: str, request: Request):
+        if await inject("drive"):
+            return _error(503, "Injected Drive failure")
+        await request.body()
+        content_range = request.headers.get("Content-Range", "")
+        total = upload_sessions.get(session_id, 0)
+        if content_range.startswith("bytes */"):
+            return Response(status_code=308)
+        end = int(content_range.split(" ")[1].split("/")[0].split("-")[1])
+        if end + 1 >= total:
+            upload_sessions.pop(session_id, None)
+            return {"id": f"file_{session_id[:12]}"}
+        return Response(status_code=308, headers={"Range": f"bytes=0-{end}"})
+
+    @app.get("/drive/v3/files/{file_id}")
+    async def drive_file(file_id: str):
+        if await inject("drive"):
+            return _error(503, "Injected Drive failure")
+        return {"id": file_id, "trashed": False}
+
+    # --- Calendar ---
+    @app.post("/calendar/v3/freeBusy")
+    async def calendar_freebusy(request: Request):
+        if await inject("calendar"):
+            return _error(503, "Injected Calendar failure")
+        body = await request.json()
+        return {"calendars": {item["id"]: {"busy": []} for item in body.get("items", [])}}
+
+    @app.post("/calendar/v3/calendars/primary/events")
+    async def calendar_event(request: Request):
+        if await inject("calendar"):
+            return _error(503, "Injected Calendar failure")
+        event = json.loads(await request.body())
+        event_id = uuid.uuid4().hex[:12]
+        event.update({
+            "id": event_id,
+            "htmlLink": f"https://calendar.google.com/event?eid={event_id}",
+            "hangoutLink": f"https://meet.google.com/stub-{event_id[:4]}",
+        })
+        return event
+
+    # --- Slides ---
+    @app.post("/v1/presentations")
+    async def slides_create(request: Request):
+        if await inject("slides"):
+            return _error(503, "Injected Slides failure")
+        body = await request.json()
+        return {"presentationId": f"deck_{uuid.uuid4().hex[:12]}", "title": body.get("title"), "slides": [{"objectId": "p"}]}
+
+    @app.post("/v1/presentations/{presentation_action}")
+    async def slides_batch_update(presentation_action: str, request: Request):
+        if await inject("slides"):
+            return _error(503, "Injected Slides failure")
+        presentation_id, _, _ = presentation_action.partition(":")
+        body = await request.json()
+        return {"presentationId": presentation_id, "replies": [{} for _ in body.get("requests", [])]}
+
+    @app.get("/stub/calls")
+    async def stub_calls():
+        """Number of calls received per upstream API."""
+        return app.state.calls
+
+    return app
+
+def main():
+    import uvicorn
+
+    parser = argparse.ArgumentParser(description="Run the upstream stub server.")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8765)
+    parser.add_argument("--config", help="JSON file with 'faults' per API (gemini, drive, calendar, slides) and 'response_words'.")
+    args = parser.parse_args()
+
+    config = StubConfig()
+    if args.config:
+        with open(args.config, encoding="utf-8") as f:
+            config = StubConfig.from_dict(json.load(f))
+    uvicorn.run(create_app(config), host=args.host, port=args.port, log_level="warning")
+
+if __name__ == "__main__":
+    main()
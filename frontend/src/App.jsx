@@ -40,6 +40,8 @@ function App() {
     try {
       const response = await fetch(VITE_REACT_APP_BACKEND_URL + '/chat', {
         method: 'POST',
+        // Sends the session cookie that identifies the user to the backend
+        credentials: 'include',
         headers: {
           'Content-Type': 'application/json',
         },
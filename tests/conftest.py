@@ -0,0 +1,20 @@
+# tests/conftest.py
+import os
+
+# backend.config reads the environment at import time, so this must run before any backend import
+for name, value in {
+    "GOOGLE_API_KEY": "test",
+    "GOOGLE_CLIENT_ID": "test",
+    "GOOGLE_CLIENT_SECRET": "test",
+    "GOOGLE_REDIRECT_URI": "http://testserver/oauth2callback",
+    "GOOGLE_PROJECT_ID": "test",
+    "FRONTEND_URL": "http://frontend.test",
+    "STATE_BACKEND": "memory",
+    "LLM_CACHE_ENABLED": "false",
+    "TRACING_SAMPLE_RATE": "0",
+    "AUTH_SECRET_KEY": "test-secret",
+    # The test client talks plain HTTP, which never sends Secure cookies back
+    "AUTH_COOKIE_SECURE": "false",
+    "AUTH_COOKIE_SAMESITE": "lax",
+}.items():
+    os.environ.setdefault(name, value)
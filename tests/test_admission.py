@@ -0,0 +1,143 @@
+import asyncio
+
+import pytest
+
+from backend.admission import AdmissionController, AdmissionRejected, ConcurrencyGate
+
+
+def make_controller(**overrides):
+    settings = dict(
+        max_concurrent_turns=1, max_queued_turns=1, queue_timeout=0.05,
+        user_turns_per_minute=60, user_burst=2,
+        tier_limits={"pro": (1, 1)}, model_wait=0.05, max_tracked_users=2,
+    )
+    settings.update(overrides)
+    return AdmissionController(**settings)
+
+
+def test_check_user_rejects_after_the_burst_with_a_retry_hint():
+    controller = make_controller()
+    controller.check_user("alice")
+    controller.check_user("alice")
+    with pytest.raises(AdmissionRejected) as rejected:
+        controller.check_user("alice")
+    assert rejected.value.reason == "user_rate"
+    assert 0 < rejected.value.retry_after <= 1.0
+    assert rejected.value.retry_after_header == "1"
+    # Other users have their own bucket
+    controller.check_user("bob")
+
+
+def test_check_user_is_disabled_by_a_zero_rate():
+    controller = make_controller(user_turns_per_minute=0)
+    for _ in range(10):
+        controller.check_user("alice")
+
+
+def test_least_recent_users_are_forgotten_past_the_limit():
+    controller = make_controller(user_burst=1)
+    controller.check_user("alice")
+    controller.check_user("bob")
+    controller.check_user("carol")
+    # alice's exhausted bucket was dropped, so she starts with a fresh burst
+    controller.check_user("alice")
+    with pytest.raises(AdmissionRejected):
+        controller.check_user("carol")
+
+
+def test_gate_hands_released_slots_to_waiters_in_order():
+    gate = ConcurrencyGate(limit=1, max_waiting=2)
+    order = []
+
+    async def turn(name):
+        assert await gate.acquire(timeout=1.0)
+        order.append(name)
+        await asyncio.sleep(0)
+        gate.release()
+
+    async def scenario():
+        assert await gate.acquire(timeout=1.0)
+        waiters = [asyncio.create_task(turn(name)) for name in "ab"]
+        await asyncio.sleep(0)
+        assert gate.waiting == 2 and gate.is_full()
+        gate.release()
+        await asyncio.gather(*waiters)
+
+    asyncio.run(scenario())
+    assert order == ["a", "b"]
+    assert gate.active == 0 and gate.waiting == 0
+
+
+def test_gate_rejects_when_the_queue_is_full_or_the_wait_times_out():
+    gate = ConcurrencyGate(limit=1, max_waiting=1)
+
+    async def scenario():
+        assert await gate.acquire(timeout=1.0)
+        waiter = asyncio.create_task(gate.acquire(timeout=0.05))
+        await asyncio.sleep(0)
+        assert not await gate.acquire(timeout=1.0)
+        assert not await waiter
+        assert gate.waiting == 0
+        gate.release()
+
+    asyncio.run(scenario())
+    assert gate.active == 0
+
+
+def test_cancelled_waiter_never_loses_a_handed_over_slot():
+    gate = ConcurrencyGate(limit=1, max_waiting=2)
+
+    async def scenario():
+        assert await gate.acquire(timeout=1.0)
+        first = asyncio.create_task(gate.acquire(timeout=1.0))
+        second = asyncio.create_task(gate.acquire(timeout=1.0))
+        await asyncio.sleep(0)
+        gate.release()  # hands the slot to `first`
+        first.cancel()
+        try:
+            # Depending on the Python version the cancellation may lose the race to the hand-over
+            if await first:
+                gate.release()
+        except asyncio.CancelledError:
+            pass
+        assert await second
+        gate.release()
+
+    asyncio.run(scenario())
+    assert gate.active == 0 and gate.waiting == 0
+
+
+def test_turn_slot_rejects_overload():
+    controller = make_controller(max_queued_turns=0)
+
+    async def scenario():
+        async with controller.turn_slot():
+            with pytest.raises(AdmissionRejected) as rejected:
+                controller.check_capacity()
+            assert rejected.value.reason == "overloaded"
+            with pytest.raises(AdmissionRejected):
+                async with controller.turn_slot():
+                    pass
+        # The slot is free again
+        async with controller.turn_slot():
+            pass
+
+    asyncio.run(scenario())
+
+
+def test_pace_model_call_sheds_calls_that_would_wait_too_long():
+    controller = make_controller()
+
+    async def scenario():
+        await controller.pace_model_call("pro")
+        assert controller.model_wait_estimate("pro") > 0.5
+        assert not controller.try_model_call("pro")
+        with pytest.raises(AdmissionRejected) as rejected:
+            await controller.pace_model_call("pro")
+        assert rejected.value.reason == "model_capacity"
+        # Models without a tier limit are never paced
+        await controller.pace_model_call("flash")
+        assert controller.model_wait_estimate("flash") == 0.0
+        assert controller.try_model_call("flash")
+
+    asyncio.run(scenario())
@@ -0,0 +1,73 @@
+# tests/test_auth.py
+from urllib.parse import parse_qs, urlparse
+
+import pytest
+from fastapi.testclient import TestClient
+
+from backend.auth import OAUTH_NONCE_COOKIE, SESSION_COOKIE, Signer, signer
+
+@pytest.fixture(scope="module")
+def client():
+    from backend.main import app
+
+    return TestClient(app, follow_redirects=False)
+
+def test_signer_round_trip():
+    s = Signer(b"key")
+    assert s.unsign(s.sign("user_1", now=1000), max_age=60, now=1030) == "user_1"
+
+def test_signer_rejects_tampering_expiry_and_other_keys():
+    s = Signer(b"key")
+    signed = s.sign("user_1", now=1000)
+    encoded, issued_at, signature = signed.split(".")
+    forged = s._signature("another message")
+    assert s.unsign(f"{encoded}.{issued_at}.{forged}", max_age=60, now=1000) is None
+    assert s.unsign(f"{encoded}.{int(issued_at) + 1}.{signature}", max_age=60, now=1000) is None
+    assert s.unsign(signed, max_age=60, now=1061) is None
+    assert Signer(b"other").unsign(signed, max_age=60, now=1000) is None
+    assert s.unsign("garbage", max_age=60) is None
+    assert s.unsign("é.1.é", max_age=60) is None
+
+def test_auth_google_binds_state_to_browser_and_session(client):
+    response = client.get("/auth/google")
+    assert response.status_code == 307
+    state = parse_qs(urlparse(response.headers["location"]).query)["state"][0]
+    nonce = response.cookies[OAUTH_NONCE_COOKIE]
+    user_id = signer.unsign(response.cookies[SESSION_COOKIE], max_age=60)
+    assert user_id and user_id.startswith("user_")
+    # The state carries no user ID in the clear
+    assert user_id not in state
+    assert signer.unsign(state, max_age=60) == f"{nonce}:{user_id}"
+
+def test_auth_google_keeps_existing_session(client):
+    client.cookies.set(SESSION_COOKIE, signer.sign("alice"))
+    try:
+        response = client.get("/auth/google")
+    finally:
+        client.cookies.clear()
+    state = parse_qs(urlparse(response.headers["location"]).query)["state"][0]
+    assert signer.unsign(state, max_age=60).endswith(":alice")
+    assert SESSION_COOKIE not in response.cookies
+
+@pytest.mark.parametrize("state, nonce", [
+    # Plain user ID, as an attacker would pass it
+    ("alice", "nonce"),
+    # Correctly signed, but the flow was started in another browser
+    (signer.sign("attacker-nonce:alice"), "victim-nonce"),
+    # No nonce cookie at all
+    (signer.sign("nonce:alice"), None),
+])
+def test_oauth_callback_rejects_state_not_issued_to_this_browser(client, state, nonce):
+    if nonce:
+        client.cookies.set(OAUTH_NONCE_COOKIE, nonce)
+    try:
+        response = client.get("/oauth2callback", params={"code": "code", "state": state})
+    finally:
+        client.cookies.clear()
+    assert response.status_code == 400
+
+def test_chat_request_ignores_user_id_in_body():
+    from backend.main import ChatRequest
+
+    request = ChatRequest(query="hi", user_id="victim")
+    assert not hasattr(request, "user_id")
@@ -0,0 +1,90 @@
+import asyncio
+from datetime import datetime, timedelta, timezone
+
+import httpx
+import pytest
+from fastapi import FastAPI, Request
+
+from backend import availability
+from backend.availability import FreeBusyCache, first_free_slot, query_busy_intervals
+
+START = datetime(2028, 3, 7, 9, tzinfo=timezone.utc)
+END = START + timedelta(hours=8)
+
+
+def calendar_api(requests):
+    """Local stand-in for the Calendar free/busy REST endpoint."""
+    app = FastAPI()
+
+    @app.post("/calendar/v3/freeBusy")
+    async def freebusy(request: Request):
+        body = await request.json()
+        requests.append((request.headers["Authorization"], body))
+        return {"calendars": {
+            "primary": {"busy": [{"start": "2028-03-07T09:00:00Z", "end": "2028-03-07T10:30:00Z"}]},
+            "investor@example.com": {"errors": [{"domain": "global", "reason": "notFound"}]},
+        }}
+
+    return app
+
+
+@pytest.fixture
+def calendar_requests(monkeypatch):
+    requests = []
+    client = httpx.AsyncClient(transport=httpx.ASGITransport(app=calendar_api(requests)), base_url="http://calendar.test")
+    monkeypatch.setattr(availability, "get_http_client", lambda: client)
+    monkeypatch.setattr(availability, "GOOGLE_FREEBUSY_API_ENDPOINT", "http://calendar.test/calendar/v3/freeBusy")
+    monkeypatch.setattr(availability, "freebusy_cache", FreeBusyCache(ttl_seconds=60, max_users=10))
+    return requests
+
+
+def test_queries_all_calendars_in_one_request(calendar_requests):
+    calendars = ["primary", "investor@example.com"]
+    busy = asyncio.run(query_busy_intervals("alice", "token", calendars, START, END))
+
+    assert busy == [(START, START + timedelta(minutes=90))]
+    assert len(calendar_requests) == 1
+    authorization, body = calendar_requests[0]
+    assert authorization == "Bearer token"
+    assert body == {"timeMin": "2028-03-07T09:00:00Z", "timeMax": "2028-03-07T17:00:00Z", "items": [{"id": c} for c in calendars]}
+
+
+def test_queries_inside_a_cached_range_reuse_it(calendar_requests):
+    async def scenario():
+        await query_busy_intervals("alice", "token", ["primary"], START, END)
+        await query_busy_intervals("alice", "token", ["primary"], START + timedelta(hours=1), END - timedelta(hours=1))
+        await query_busy_intervals("bob", "token", ["primary"], START, END)
+
+    asyncio.run(scenario())
+    assert len(calendar_requests) == 2
+
+
+def test_first_free_slot_skips_busy_intervals():
+    slots = [(START + timedelta(hours=h), START + timedelta(hours=h + 1)) for h in range(3)]
+    busy = [(START, START + timedelta(minutes=90))]
+    assert first_free_slot(slots, busy) == slots[2]
+    assert first_free_slot(slots[:1], busy) is None
+
+
+def test_cache_is_bounded_by_users():
+    cache = FreeBusyCache(ttl_seconds=60, max_users=2)
+    for user_id in ("a", "b", "c"):
+        cache.set(user_id, START, END, ["primary"], [])
+    assert len(cache) == 2
+    assert cache.get("a", START, END, ["primary"]) is None
+    assert cache.get("c", START, END, ["primary"]) == []
+
+
+def test_cache_drops_users_without_live_entries():
+    cache = FreeBusyCache(ttl_seconds=0, max_users=10)
+    cache.set("a", START, END, ["primary"], [])
+    assert cache.get("a", START, END, ["primary"]) is None
+    assert len(cache) == 0
+
+
+def test_cache_caps_entries_per_user():
+    cache = FreeBusyCache(ttl_seconds=60, max_users=10, max_entries_per_user=2)
+    for hours in range(3):
+        cache.set("a", START + timedelta(hours=hours), END, ["primary"], [])
+    assert cache.get("a", START, END, ["primary"]) is None
+    assert cache.get("a", START + timedelta(hours=2), END, ["primary"]) == []
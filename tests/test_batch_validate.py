@@ -0,0 +1,53 @@
+import json
+import os
+import subprocess
+import sys
+
+import pytest
+from fastapi.testclient import TestClient
+
+from backend import main
+from backend.admission import AdmissionRejected
+from backend.auth import SESSION_COOKIE, signer
+
+
+@pytest.fixture
+def client(monkeypatch):
+    async def fake_validator(idea, detailed_feedback=False):
+        return {"status": "valid", "feedback": f"ok: {idea}"}
+
+    monkeypatch.setattr(main, "get_validator", fake_validator)
+    return TestClient(main.app)
+
+
+def test_batch_checks_the_session_user(client, monkeypatch):
+    checked = []
+    monkeypatch.setattr(main.admission, "check_user", checked.append)
+    client.cookies.set(SESSION_COOKIE, signer.sign("alice"))
+
+    response = client.post("/validate/batch", json={"ideas": ["a", "b"]})
+
+    assert response.status_code == 200
+    lines = [json.loads(line) for line in response.text.splitlines()]
+    assert lines[-1]["summary"]["status_counts"] == {"valid": 2}
+    assert checked == ["alice"]
+
+
+def test_batch_is_rejected_when_user_rate_is_exceeded(client, monkeypatch):
+    def reject(user_id):
+        raise AdmissionRejected("user_rate", "Too many requests, please slow down.", 3)
+
+    monkeypatch.setattr(main.admission, "check_user", reject)
+
+    response = client.post("/validate/batch", json={"ideas": ["a"]})
+
+    assert response.status_code == 429
+    assert response.headers["Retry-After"] == "3"
+
+
+@pytest.mark.parametrize("name", ["BATCH_VALIDATE_RATE_PER_SECOND", "BATCH_VALIDATE_CONCURRENCY"])
+def test_config_rejects_batch_limits_that_would_hang(name):
+    env = {**os.environ, name: "0"}
+    result = subprocess.run([sys.executable, "-c", "import backend.config"], env=env, capture_output=True, text=True)
+    assert result.returncode != 0
+    assert "ValueError" in result.stderr
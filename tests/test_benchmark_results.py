@@ -0,0 +1,51 @@
+from benchmarks.results import compare, histogram_delta, latency_summary, parse_histograms, percentile
+
+METRICS_BEFORE = """
+va_tool_duration_seconds_bucket{tool="get_research",le="0.1"} 1
+va_tool_duration_seconds_bucket{tool="get_research",le="1.0"} 2
+va_tool_duration_seconds_bucket{tool="get_research",le="+Inf"} 2
+va_tool_duration_seconds_sum{tool="get_research"} 0.6
+va_tool_duration_seconds_count{tool="get_research"} 2
+"""
+
+METRICS_AFTER = """
+va_tool_duration_seconds_bucket{tool="get_research",le="0.1"} 1
+va_tool_duration_seconds_bucket{tool="get_research",le="1.0"} 6
+va_tool_duration_seconds_bucket{tool="get_research",le="+Inf"} 6
+va_tool_duration_seconds_sum{tool="get_research"} 2.6
+va_tool_duration_seconds_count{tool="get_research"} 6
+"""
+
+
+def test_percentile_is_nearest_rank():
+    values = list(range(1, 101))
+    assert percentile(values, 50) == 50
+    assert percentile(values, 99) == 99
+    assert percentile([], 50) is None
+
+
+def test_latency_summary_in_milliseconds():
+    summary = latency_summary([0.1, 0.2, 0.3])
+    assert summary["count"] == 3
+    assert summary["p50_ms"] == 200
+    assert summary["max_ms"] == 300
+    assert latency_summary([]) == {"count": 0}
+
+
+def test_histogram_delta_covers_only_new_observations():
+    delta = histogram_delta(
+        parse_histograms(METRICS_BEFORE, "va_tool_duration_seconds", "tool"),
+        parse_histograms(METRICS_AFTER, "va_tool_duration_seconds", "tool"),
+    )
+    entry = delta["get_research"]
+    assert entry["count"] == 4
+    assert entry["mean_ms"] == 500
+    # All four new observations fall in the (0.1, 1.0] bucket
+    assert 100 < entry["p50_ms"] <= 1000
+
+
+def test_compare_flags_slowdowns_above_threshold():
+    baseline = {"throughput_turns_per_s": 10.0, "latency": {"p50_ms": 100, "p95_ms": 200, "p99_ms": 300}}
+    current = {"throughput_turns_per_s": 9.5, "latency": {"p50_ms": 105, "p95_ms": 260, "p99_ms": 310}}
+    _, regressions = compare(baseline, current, threshold=0.10)
+    assert regressions == ["turn latency p95_ms"]
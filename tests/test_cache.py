@@ -0,0 +1,130 @@
+import asyncio
+import sqlite3
+
+from fastapi.testclient import TestClient
+
+from backend import auth, main
+from backend.cache import LLMCache, ACCESS_FLUSH_BATCH, normalize_input
+
+
+def make_cache(tmp_path, memory=8, disk=10, ttl=3600):
+    return LLMCache(str(tmp_path / "cache.sqlite3"), memory, disk, ttl)
+
+
+def disk_rows(tmp_path):
+    conn = sqlite3.connect(str(tmp_path / "cache.sqlite3"))
+    try:
+        return dict(conn.execute("SELECT key, accessed_at FROM llm_cache").fetchall())
+    finally:
+        conn.close()
+
+
+def test_normalize_input_ignores_case_and_whitespace():
+    assert normalize_input("  An   Idea\n") == normalize_input("an idea")
+
+
+def test_round_trip_through_disk(tmp_path):
+    async def scenario():
+        cache = make_cache(tmp_path)
+        await cache.set("k", "research", {"summary": "ok"})
+        fresh = make_cache(tmp_path)
+        return await fresh.get("k")
+
+    assert asyncio.run(scenario()) == {"summary": "ok"}
+
+
+def test_expired_entries_are_not_returned(tmp_path):
+    async def scenario():
+        cache = make_cache(tmp_path, ttl=0)
+        await cache.set("k", "research", "stale")
+        return await cache.get("k"), await make_cache(tmp_path, ttl=0).get("k")
+
+    assert asyncio.run(scenario()) == (None, None)
+    assert disk_rows(tmp_path) == {}
+
+
+def test_memory_tier_is_lru_bounded(tmp_path):
+    async def scenario():
+        cache = make_cache(tmp_path, memory=2)
+        for key in ("a", "b", "c"):
+            await cache.set(key, "ns", key)
+        return list(cache._memory)
+
+    assert asyncio.run(scenario()) == ["b", "c"]
+
+
+def test_disk_is_trimmed_only_when_over_capacity(tmp_path):
+    async def scenario():
+        cache = make_cache(tmp_path, disk=10)
+        for i in range(11):
+            await cache.set(f"k{i}", "ns", i)
+        # Within the slack: nothing evicted yet
+        before = len(disk_rows(tmp_path))
+        await cache.set("k11", "ns", 11)
+        return before
+
+    assert asyncio.run(scenario()) == 11
+    rows = disk_rows(tmp_path)
+    assert len(rows) == 10
+    assert "k0" not in rows and "k1" not in rows and "k11" in rows
+
+
+def test_disk_hits_write_access_times_in_batches(tmp_path):
+    async def scenario():
+        cache = make_cache(tmp_path, memory=1)
+        await cache.set("a", "ns", "a")
+        await cache.set("b", "ns", "b")  # pushes "a" out of memory
+        written = disk_rows(tmp_path)["a"]
+        assert await cache.get("a") == "a"
+        unchanged = disk_rows(tmp_path)["a"] == written
+        await cache.set("c", "ns", "c")
+        return unchanged, disk_rows(tmp_path)["a"] > written
+
+    assert asyncio.run(scenario()) == (True, True)
+
+
+def test_access_times_flush_when_batch_is_full(tmp_path):
+    async def scenario():
+        cache = make_cache(tmp_path, memory=1, disk=ACCESS_FLUSH_BATCH * 2)
+        for i in range(ACCESS_FLUSH_BATCH + 1):
+            await cache.set(f"k{i}", "ns", i)
+        for i in range(ACCESS_FLUSH_BATCH):
+            await cache.get(f"k{i}")
+        return cache._touched
+
+    assert asyncio.run(scenario()) == {}
+
+
+def test_invalidate_by_namespace(tmp_path):
+    async def scenario():
+        cache = make_cache(tmp_path)
+        await cache.set("r", "research", "r")
+        await cache.set("v", "validator", "v")
+        removed = await cache.invalidate(namespace="research")
+        return removed, await cache.get("r"), await cache.get("v")
+
+    assert asyncio.run(scenario()) == (1, None, "v")
+
+
+def test_invalidate_endpoint_requires_the_admin_token(monkeypatch):
+    cleared = []
+
+    async def invalidate(namespace=None, key=None):
+        cleared.append(namespace)
+        return 3
+
+    monkeypatch.setattr(main.llm_cache, "invalidate", invalidate)
+    client = TestClient(main.app)
+
+    monkeypatch.setattr(auth, "AUTH_ADMIN_TOKEN", "")
+    assert client.delete("/cache").status_code == 403
+
+    monkeypatch.setattr(auth, "AUTH_ADMIN_TOKEN", "admin-secret")
+    assert client.delete("/cache").status_code == 401
+    assert client.delete("/cache", headers={"Authorization": "Bearer wrong"}).status_code == 401
+    assert cleared == []
+
+    response = client.delete("/cache?namespace=research", headers={"Authorization": "Bearer admin-secret"})
+    assert response.status_code == 200
+    assert response.json() == {"removed": 3, "namespace": "research"}
+    assert cleared == ["research"]
@@ -0,0 +1,80 @@
+import asyncio
+
+from backend import tools
+from backend.tools import _split_into_chunks
+
+
+def flatten(chunks):
+    return "".join(chunk.replace("\n\n", "").replace(" ", "") for chunk in chunks)
+
+
+def test_short_content_is_one_chunk():
+    assert _split_into_chunks("One paragraph.\n\nAnother.", 100) == ["One paragraph.\n\nAnother."]
+
+
+def test_chunks_respect_max_chars():
+    content = "\n\n".join(f"Paragraph {i} has a few words in it." for i in range(20))
+    chunks = _split_into_chunks(content, 80)
+    assert len(chunks) > 1
+    assert all(len(chunk) <= 80 for chunk in chunks)
+
+
+def test_headings_start_new_blocks():
+    assert _split_into_chunks("# Market\nBig.\n# Team\nSmall.", 20) == ["# Market\nBig.", "# Team\nSmall."]
+
+
+def test_hard_cut_keeps_text_in_order():
+    content = "First sentence. " + "X" * 25
+    chunks = _split_into_chunks(content, 10)
+    assert all(len(chunk) <= 10 for chunk in chunks)
+    assert flatten(chunks) == content.replace(" ", "")
+    assert chunks[0].startswith("First")
+
+
+def make_summarizer(shrink_by):
+    """Stub model that 'summarizes' by echoing its input minus `shrink_by` characters."""
+    prompts = []
+
+    async def summarize(prompt):
+        prompts.append(prompt)
+        text = prompt.split("to summarize:\n", 1)[1]
+        return text[:max(1, len(text) - shrink_by)]
+
+    return summarize, prompts
+
+
+def long_document(paragraphs=40):
+    return "\n\n".join(f"Paragraph {i} " + "word " * 40 for i in range(paragraphs))
+
+
+def test_non_shrinking_summaries_are_cut_instead_of_recursing(monkeypatch):
+    summarize, prompts = make_summarizer(shrink_by=0)
+    monkeypatch.setattr(tools, "_generate_summary", summarize)
+    monkeypatch.setattr(tools, "SUMMARY_CHUNK_CHARS", 1000)
+    monkeypatch.setattr(tools, "SUMMARY_CHUNK_THRESHOLD_CHARS", 2000)
+    content = long_document()
+
+    asyncio.run(tools._map_reduce_summary(content))
+
+    chunks = tools._split_into_chunks(content, 1000)
+    # One map round, then a single merge of summaries cut to fit
+    assert len(prompts) == len(chunks) + 1
+    merged = prompts[-1].split("Content to summarize:\n", 1)[1]
+    assert len(merged) <= 2000
+    # Every part keeps its share of the merge
+    assert all(chunk[:20] in merged for chunk in chunks)
+
+
+def test_reduce_rounds_are_capped(monkeypatch):
+    summarize, prompts = make_summarizer(shrink_by=300)
+    monkeypatch.setattr(tools, "_generate_summary", summarize)
+    monkeypatch.setattr(tools, "SUMMARY_CHUNK_CHARS", 1000)
+    monkeypatch.setattr(tools, "SUMMARY_CHUNK_THRESHOLD_CHARS", 2000)
+    monkeypatch.setattr(tools, "SUMMARY_MAX_REDUCE_ROUNDS", 3)
+
+    asyncio.run(tools._map_reduce_summary(long_document()))
+
+    map_prompts = [prompt for prompt in prompts if "Part to summarize:" in prompt]
+    rounds = sum(1 for prompt in map_prompts if prompt.startswith("The following is part 1 of"))
+    assert rounds == 3
+    assert len(prompts[-1].split("Content to summarize:\n", 1)[1]) <= 2000
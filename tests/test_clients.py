@@ -0,0 +1,67 @@
+import asyncio
+import threading
+
+import httpx
+
+from backend import clients, metrics
+
+
+def test_http_client_is_shared_and_rebuilt_after_close():
+    async def scenario():
+        first = clients.get_http_client()
+        assert clients.get_http_client() is first
+        await clients.close_http_client()
+        assert first.is_closed
+        second = clients.get_http_client()
+        assert second is not first
+        await clients.close_http_client()
+
+    asyncio.run(scenario())
+
+
+def test_run_blocking_runs_on_the_pool_and_passes_arguments():
+    def blocking(a, b=0):
+        return threading.current_thread().name, a + b
+
+    async def scenario():
+        return await clients.run_blocking(blocking, 1, b=2)
+
+    thread_name, total = asyncio.run(scenario())
+    assert thread_name.startswith("blocking-io")
+    assert total == 3
+
+
+def test_pooled_requests_are_measured_per_api(monkeypatch):
+    async def handler(request):
+        return httpx.Response(404 if "missing" in request.url.path else 200)
+
+    # Swap only the network layer; the instrumented wrapper stays in place
+    monkeypatch.setattr(httpx.AsyncHTTPTransport, "handle_async_request", lambda self, request: handler(request))
+    errors = metrics.UPSTREAM_ERRORS
+
+    async def scenario():
+        async with httpx.AsyncClient(transport=clients._InstrumentedTransport()) as client:
+            assert (await client.get("https://www.googleapis.com/drive/v3/files")).status_code == 200
+            assert (await client.get("https://www.googleapis.com/drive/v3/missing")).status_code == 404
+
+    before = errors._values.get(("drive", "GET", "404"), 0)
+    asyncio.run(scenario())
+    assert errors._values[("drive", "GET", "404")] == before + 1
+
+
+def test_gemini_client_and_google_services_are_built_once(monkeypatch):
+    monkeypatch.setattr(clients, "_genai_client", None)
+    monkeypatch.setattr(clients, "_services", {})
+    assert clients.get_genai_client() is clients.get_genai_client()
+    slides = clients.get_google_service("slides", "v1")
+    assert clients.get_google_service("slides", "v1") is slides
+    assert list(clients._services) == [("slides", "v1")]
+
+
+def test_agents_use_plain_model_names_unless_gemini_is_redirected(monkeypatch):
+    monkeypatch.setattr(clients, "GEMINI_API_BASE_URL", "")
+    assert clients.agent_model("gemini-2.5-flash") == "gemini-2.5-flash"
+    monkeypatch.setattr(clients, "GEMINI_API_BASE_URL", "http://gemini.test")
+    model = clients.agent_model("gemini-2.5-flash")
+    assert model.model == "gemini-2.5-flash"
+    assert isinstance(model, clients._ConfiguredGemini)
@@ -0,0 +1,109 @@
+import asyncio
+from types import SimpleNamespace
+
+import pytest
+from google.adk.models import LlmRequest
+from google.genai.types import Content, FunctionCall, FunctionResponse, Part
+
+from backend import compaction
+
+
+def user(text):
+    return Content(role="user", parts=[Part(text=text)])
+
+
+def model(text):
+    return Content(role="model", parts=[Part(text=text)])
+
+
+def tool_call(name):
+    return Content(role="model", parts=[Part(function_call=FunctionCall(id=f"call_{name}", name=name, args={}))])
+
+
+def tool_result(name, response):
+    return Content(role="user", parts=[Part(function_response=FunctionResponse(id=f"call_{name}", name=name, response=response))])
+
+
+def conversation(turns):
+    contents = []
+    for index in range(turns):
+        contents += [user(f"question {index}"), model(f"answer {index}")]
+    return contents
+
+
+@pytest.fixture
+def summaries(monkeypatch):
+    calls = []
+
+    async def summarize(previous, contents):
+        calls.append((previous, len(contents)))
+        return f"summary {len(calls)}"
+
+    monkeypatch.setattr(compaction, "COMPACTION_KEEP_RECENT", 4)
+    monkeypatch.setattr(compaction, "COMPACTION_MAX_CONTENTS", 8)
+    monkeypatch.setattr(compaction, "COMPACTION_TOKEN_BUDGET", 100_000)
+    monkeypatch.setattr(compaction, "COMPACTION_TOOL_PAYLOAD_MAX_CHARS", 50)
+    monkeypatch.setattr(compaction, "_summarize", summarize)
+    return calls
+
+
+def compact(state, contents):
+    context = SimpleNamespace(state=state, agent_name="coordinator")
+    request = LlmRequest(contents=contents)
+    asyncio.run(compaction.compact_history(context, request))
+    return request.contents
+
+
+def test_split_never_separates_a_tool_result_from_its_call(summaries):
+    contents = [user("hi"), tool_call("get_research"), tool_result("get_research", {"ok": 1}), model("done"), user("next")]
+    # Four from the end lands on the tool call; the split moves back to the user message
+    assert compaction._find_split(contents) == 0
+    contents += [model("answer"), user("more"), model("again")]
+    assert compaction._find_split(contents) == 4
+
+
+def test_short_histories_are_left_alone(summaries):
+    contents = conversation(3)
+    assert [c.parts[0].text for c in compact({}, list(contents))] == [c.parts[0].text for c in contents]
+    assert summaries == []
+
+
+def test_large_tool_payloads_in_older_history_are_replaced_by_references(summaries):
+    contents = [user("research"), tool_call("get_research"), tool_result("get_research", {"report": "x" * 500})]
+    contents += conversation(2)
+    compacted = compact({}, contents)
+
+    response = compacted[2].parts[0].function_response.response
+    assert response["omitted"] is True
+    assert response["ref"] == "tool_call:call_get_research"
+    assert len(response["preview"]) <= compaction.PREVIEW_CHARS
+
+
+def test_long_histories_are_folded_into_a_reused_rolling_summary(summaries):
+    state = {}
+    compacted = compact(state, conversation(6))
+    assert summaries == [(None, 8)]
+    assert compacted[0].parts[0].text == "Summary of the earlier conversation:\nsummary 1"
+    assert [c.parts[0].text for c in compacted[1:]] == ["question 4", "answer 4", "question 5", "answer 5"]
+    assert state[compaction.SUMMARY_STATE_KEY] == {"covered": 8, "summary": "summary 1"}
+
+    # Still under budget with the summary in place: reused without a new call
+    compacted = compact(state, conversation(7))
+    assert len(summaries) == 1
+    assert [c.parts[0].text for c in compacted[1:3]] == ["question 4", "answer 4"]
+
+    # Over budget again: only the uncovered part is folded into the previous summary
+    compact(state, conversation(11))
+    assert summaries[-1] == ("summary 1", 10)
+    assert state[compaction.SUMMARY_STATE_KEY]["covered"] == 18
+
+
+def test_failed_summary_sends_the_history_uncompacted(summaries, monkeypatch):
+    async def failing(previous, contents):
+        raise RuntimeError("quota")
+
+    monkeypatch.setattr(compaction, "_summarize", failing)
+    state = {}
+    compacted = compact(state, conversation(6))
+    assert len(compacted) == 12
+    assert compaction.SUMMARY_STATE_KEY not in state
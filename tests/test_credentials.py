@@ -0,0 +1,116 @@
+import asyncio
+from datetime import datetime, timedelta
+
+import pytest
+from google.auth.exceptions import RefreshError
+from google.oauth2.credentials import Credentials
+
+from backend.credentials import CredentialManager, credentials_to_dict
+from backend.storage import MemoryTokenStore
+
+
+def tokens(token, refresh_token, expires_in):
+    expiry = datetime.utcnow() + timedelta(seconds=expires_in)
+    return credentials_to_dict(Credentials(token=token, refresh_token=refresh_token, expiry=expiry))
+
+
+def make_manager(store, idle_seconds=3600):
+    return CredentialManager(store, refresh_margin_seconds=60, check_interval_seconds=30, idle_seconds=idle_seconds)
+
+
+class FakeRefresh:
+    def __init__(self):
+        self.calls = []
+        self.handler = lambda credentials: None
+
+    def __call__(self, credentials, request):
+        self.calls.append(credentials.refresh_token)
+        self.handler(credentials)
+
+
+@pytest.fixture
+def fake_refresh(monkeypatch):
+    fake = FakeRefresh()
+    monkeypatch.setattr(Credentials, "refresh", lambda credentials, request: fake(credentials, request))
+    return fake
+
+
+def test_uses_tokens_another_worker_refreshed(fake_refresh):
+    store = MemoryTokenStore()
+    manager = make_manager(store)
+
+    async def scenario():
+        await store.save("alice", tokens("old", "r1", expires_in=3600))
+        await manager.get_credentials("alice")
+        # Cached copy goes stale while another worker refreshes
+        manager._credentials["alice"].expiry = datetime.utcnow()
+        await store.save("alice", tokens("new", "r1", expires_in=3600))
+        return await manager.get_token("alice")
+
+    assert asyncio.run(scenario()) == "new"
+    assert fake_refresh.calls == []
+
+
+def test_rejected_refresh_forgets_tokens(fake_refresh):
+    store = MemoryTokenStore()
+    manager = make_manager(store)
+
+    def reject(credentials):
+        raise RefreshError("invalid_grant")
+
+    fake_refresh.handler = reject
+
+    async def scenario():
+        await store.save("alice", tokens("old", "r1", expires_in=0))
+        return await manager.get_credentials("alice")
+
+    assert asyncio.run(scenario()) is None
+    assert "alice" not in store
+    assert "alice" not in manager._credentials
+
+
+def test_rejected_refresh_keeps_tokens_stored_meanwhile(fake_refresh):
+    store = MemoryTokenStore()
+    manager = make_manager(store)
+
+    def reject_after_reauthorization(credentials):
+        # The user re-authorizes through another worker while this refresh is in flight
+        store["alice"] = tokens("fresh", "r2", expires_in=3600)
+        raise RefreshError("invalid_grant")
+
+    fake_refresh.handler = reject_after_reauthorization
+
+    async def scenario():
+        await store.save("alice", tokens("old", "r1", expires_in=0))
+        return await manager.get_token("alice")
+
+    assert asyncio.run(scenario()) == "fresh"
+    assert store["alice"]["refresh_token"] == "r2"
+
+
+def test_idle_users_are_untracked():
+    store = MemoryTokenStore()
+    manager = make_manager(store, idle_seconds=0)
+
+    async def scenario():
+        await store.save("alice", tokens("t", "r1", expires_in=3600))
+        await manager.get_credentials("alice")
+        tracked = "alice" in manager._credentials
+        await manager._refresh_due()
+        return tracked, "alice" in manager._credentials, await manager.get_token("alice")
+
+    assert asyncio.run(scenario()) == (True, False, "t")
+
+
+def test_sqlite_discard_compares_refresh_token(tmp_path):
+    from backend.storage import SQLiteConnectionPool, SQLiteTokenStore
+
+    store = SQLiteTokenStore(SQLiteConnectionPool(str(tmp_path / "state.sqlite3"), 2))
+
+    async def scenario():
+        await store.save("alice", tokens("t", "r2", expires_in=3600))
+        stale = await store.discard("alice", refresh_token="r1")
+        current = await store.discard("alice", refresh_token="r2")
+        return stale, current, await store.load("alice")
+
+    assert asyncio.run(scenario()) == (False, True, None)
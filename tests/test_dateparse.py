@@ -0,0 +1,63 @@
+from datetime import datetime, timezone
+
+from backend.dateparse import parse_meeting_slots
+
+# A Sunday, after Feb 29 in a leap year
+NOW = datetime(2028, 3, 5, 10, 0, tzinfo=timezone.utc)
+
+
+def starts(phrase, now=NOW, max_slots=3):
+    slots = parse_meeting_slots(phrase, now=now, max_slots=max_slots)
+    return [start for start, _ in slots] if slots else slots
+
+
+def test_passed_feb_29_rolls_to_next_leap_year():
+    assert starts("Feb 29 at 3pm UTC") == [datetime(2032, 2, 29, 15, tzinfo=timezone.utc)]
+
+
+def test_feb_29_in_a_common_year_resolves_to_next_leap_year():
+    now = datetime(2027, 6, 1, tzinfo=timezone.utc)
+    assert starts("29th of February at 10:00 UTC", now=now) == [datetime(2028, 2, 29, 10, tzinfo=timezone.utc)]
+
+
+def test_passed_date_rolls_to_next_year():
+    assert starts("January 10th at 9am UTC") == [datetime(2029, 1, 10, 9, tzinfo=timezone.utc)]
+
+
+def test_relative_day_and_part_of_day():
+    assert starts("next Tuesday afternoon UTC", max_slots=2) == [
+        datetime(2028, 3, 7, 13, tzinfo=timezone.utc),
+        datetime(2028, 3, 7, 14, tzinfo=timezone.utc),
+    ]
+
+
+def test_timezone_abbreviation_is_converted_to_utc():
+    assert starts("tomorrow at 3pm PST") == [datetime(2028, 3, 6, 23, tzinfo=timezone.utc)]
+
+
+def test_slots_are_in_the_future():
+    assert all(start > NOW for start in starts("today UTC", max_slots=10))
+
+
+def test_unrecognized_phrase_returns_none():
+    assert parse_meeting_slots("whenever works", now=NOW) is None
+
+
+def test_todays_weekday_means_today_while_the_time_is_ahead():
+    friday_morning = datetime(2028, 3, 10, 9, 0, tzinfo=timezone.utc)
+    assert starts("this friday at 3pm UTC", now=friday_morning) == [datetime(2028, 3, 10, 15, tzinfo=timezone.utc)]
+    assert starts("friday at 3pm UTC", now=friday_morning) == [datetime(2028, 3, 10, 15, tzinfo=timezone.utc)]
+
+
+def test_todays_weekday_rolls_a_week_once_the_time_has_passed():
+    friday_evening = datetime(2028, 3, 10, 18, 0, tzinfo=timezone.utc)
+    assert starts("friday at 3pm UTC", now=friday_evening) == [datetime(2028, 3, 17, 15, tzinfo=timezone.utc)]
+
+
+def test_next_weekday_skips_today():
+    friday_morning = datetime(2028, 3, 10, 9, 0, tzinfo=timezone.utc)
+    assert starts("next friday at 3pm UTC", now=friday_morning) == [datetime(2028, 3, 17, 15, tzinfo=timezone.utc)]
+    # Early in the week "next" means the following week
+    monday = datetime(2028, 3, 6, 9, 0, tzinfo=timezone.utc)
+    assert starts("next friday at 3pm UTC", now=monday) == [datetime(2028, 3, 17, 15, tzinfo=timezone.utc)]
+    assert starts("friday at 3pm UTC", now=monday) == [datetime(2028, 3, 10, 15, tzinfo=timezone.utc)]
@@ -0,0 +1,109 @@
+import asyncio
+
+import httpx
+import pytest
+from fastapi import FastAPI
+from fastapi.responses import JSONResponse
+
+from backend import drive
+from backend.drive import DriveUploader
+from backend.storage import SQLiteConnectionPool, get_state_pool
+
+
+class DriveAPI:
+    """Local stand-in for the Drive upload and files endpoints."""
+
+    def __init__(self):
+        self.uploads = 0
+        self.failing = False
+        self.app = FastAPI()
+
+        @self.app.post("/upload/drive/v3/files")
+        async def upload():
+            await asyncio.sleep(0.05)
+            if self.failing:
+                return JSONResponse({"error": "unavailable"}, status_code=503)
+            self.uploads += 1
+            return {"id": f"file_{self.uploads}"}
+
+        @self.app.get("/drive/v3/files/{file_id}")
+        async def get_file(file_id: str):
+            return {"id": file_id, "trashed": False}
+
+
+class FakeCredentials:
+    async def get_token(self, user_id):
+        return "token"
+
+
+@pytest.fixture
+def drive_api(monkeypatch):
+    api = DriveAPI()
+    client = httpx.AsyncClient(transport=httpx.ASGITransport(app=api.app))
+    monkeypatch.setattr(drive, "get_http_client", lambda: client)
+    monkeypatch.setattr(drive, "GOOGLE_DRIVE_UPLOAD_ENDPOINT", "http://drive.test/upload/drive/v3/files")
+    monkeypatch.setattr(drive, "GOOGLE_DRIVE_FILES_ENDPOINT", "http://drive.test/drive/v3/files")
+    monkeypatch.setattr(drive, "credential_manager", FakeCredentials())
+    return api
+
+
+def make_uploader(pool):
+    return DriveUploader(
+        lambda: pool, resumable_threshold=1024 * 1024, chunk_bytes=256 * 1024,
+        poll_seconds=1, base_delay_seconds=0, max_delay_seconds=0, max_attempts=3
+    )
+
+
+@pytest.fixture
+def pool(tmp_path):
+    return SQLiteConnectionPool(str(tmp_path / "state.sqlite3"), 4)
+
+
+def test_concurrent_saves_of_the_same_content_upload_once(drive_api, pool):
+    uploader = make_uploader(pool)
+
+    async def scenario():
+        results = await asyncio.gather(*(uploader.save("alice", "token", "notes.txt", "same content") for _ in range(3)))
+        again = await uploader.save("alice", "token", "notes.txt", "same content")
+        return results, again
+
+    results, again = asyncio.run(scenario())
+    assert drive_api.uploads == 1
+    assert {result["file_id"] for result in results} == {"file_1"}
+    assert again == {"status": "existing", "file_id": "file_1"}
+
+
+def test_failed_upload_is_flushed_from_the_outbox(drive_api, pool):
+    uploader = make_uploader(pool)
+
+    async def scenario():
+        drive_api.failing = True
+        queued = await uploader.save("alice", "token", "notes.txt", "content")
+        pending = await uploader.pending("alice")
+        drive_api.failing = False
+        await uploader.flush_due()
+        return queued, pending, await uploader.pending(), await uploader.save("alice", "token", "notes.txt", "content")
+
+    queued, pending, remaining, again = asyncio.run(scenario())
+    assert queued == {"status": "queued", "file_id": None}
+    assert pending == 1
+    assert remaining == 0
+    assert again == {"status": "existing", "file_id": "file_1"}
+
+
+def test_each_outbox_entry_is_flushed_by_one_worker(drive_api, pool):
+    first, second = make_uploader(pool), make_uploader(pool)
+
+    async def scenario():
+        drive_api.failing = True
+        await first.save("alice", "token", "notes.txt", "content")
+        drive_api.failing = False
+        await asyncio.gather(first.flush_due(), second.flush_due())
+
+    asyncio.run(scenario())
+    assert drive_api.uploads == 1
+
+
+def test_memory_backend_keeps_drive_state_in_memory():
+    # conftest sets STATE_BACKEND=memory
+    assert get_state_pool()._path == ":memory:"
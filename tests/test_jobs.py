@@ -0,0 +1,175 @@
+import asyncio
+import time
+from contextlib import asynccontextmanager
+from dataclasses import asdict
+
+import pytest
+
+from backend.admission import AdmissionRejected
+from backend.jobs import JOB_FAILED, JOB_RUNNING, JOB_STALE_SECONDS, JOB_SUCCEEDED, Job, JobManager
+from backend.storage import MemoryJobStore, SQLiteConnectionPool, SQLiteJobStore
+
+
+async def echo_turn(user_id, session_id, query):
+    yield "session", {"session_id": session_id}
+    yield "final", {"response": f"done: {query}"}
+
+
+class Slots:
+    """Stand-in for admission.turn_slot that counts entries and can reject the first ones."""
+
+    def __init__(self, rejections=0):
+        self.entered = 0
+        self.rejections = rejections
+
+    @asynccontextmanager
+    async def __call__(self):
+        if self.rejections:
+            self.rejections -= 1
+            raise AdmissionRejected("overloaded", "busy", 0)
+        self.entered += 1
+        yield
+
+
+def make_manager(store, slots, run_turn=echo_turn):
+    return JobManager(
+        run_turn=run_turn, store=store, turn_slot=slots,
+        workers=1, queue_size=10, retention_seconds=3600, max_progress_events=50
+    )
+
+
+async def wait_finished(manager, job_id):
+    for _ in range(200):
+        job = await manager.get(job_id)
+        if job.finished:
+            return job
+        await asyncio.sleep(0.01)
+    raise AssertionError("job did not finish")
+
+
+@pytest.fixture
+def sqlite_store(tmp_path):
+    return SQLiteJobStore(SQLiteConnectionPool(str(tmp_path / "state.sqlite3"), 2))
+
+
+def test_job_state_is_visible_to_other_workers(sqlite_store):
+    slots = Slots()
+
+    async def scenario():
+        owner = make_manager(sqlite_store, slots)
+        owner.start()
+        try:
+            job = await owner.submit("alice", "s1", "hello")
+            await wait_finished(owner, job.id)
+        finally:
+            await owner.stop()
+        return await make_manager(sqlite_store, Slots()).get(job.id)
+
+    job = asyncio.run(scenario())
+    assert job.status == JOB_SUCCEEDED
+    assert job.result == "done: hello"
+    assert [event["type"] for event in job.progress] == ["session", "final"]
+    assert slots.entered == 1
+
+
+def test_job_waits_for_an_admission_slot():
+    slots = Slots(rejections=2)
+
+    async def scenario():
+        manager = make_manager(MemoryJobStore(), slots)
+        manager.start()
+        try:
+            job = await manager.submit("alice", "s1", "hello")
+            return await wait_finished(manager, job.id)
+        finally:
+            await manager.stop()
+
+    assert asyncio.run(scenario()).status == JOB_SUCCEEDED
+    assert slots.entered == 1
+
+
+def test_stale_jobs_are_taken_over(sqlite_store):
+    long_ago = time.time() - JOB_STALE_SECONDS - 1
+    queued = Job(id="queued", user_id="alice", session_id="s1", query="hello")
+    running = Job(id="running", user_id="alice", session_id="s2", query="hi", status=JOB_RUNNING)
+
+    async def scenario():
+        await sqlite_store.save(asdict(queued), long_ago)
+        await sqlite_store.save(asdict(running), long_ago)
+        manager = make_manager(sqlite_store, Slots())
+        manager.start()
+        try:
+            await manager._sweep()
+            return await wait_finished(manager, "queued"), await manager.get("running")
+        finally:
+            await manager.stop()
+
+    recovered, interrupted = asyncio.run(scenario())
+    assert recovered.status == JOB_SUCCEEDED
+    assert interrupted.status == JOB_FAILED
+
+
+def test_fresh_jobs_of_live_workers_are_left_alone(sqlite_store):
+    async def scenario():
+        await sqlite_store.save(asdict(Job(id="live", user_id="alice", session_id="s1", query="hello")), time.time())
+        manager = make_manager(sqlite_store, Slots())
+        await manager._sweep()
+        return manager._queue.qsize()
+
+    assert asyncio.run(scenario()) == 0
+
+
+class CountingStore(MemoryJobStore):
+    def __init__(self):
+        super().__init__()
+        self.saves = 0
+        self.appended = []
+
+    async def save(self, record, now):
+        assert "progress" not in record
+        self.saves += 1
+        await super().save(record, now)
+
+    async def append_event(self, job_id, seq, event):
+        self.appended.append(seq)
+        await super().append_event(job_id, seq, event)
+
+
+def test_progress_events_are_appended_without_rewriting_the_job():
+    async def chatty_turn(user_id, session_id, query):
+        for index in range(20):
+            yield "tool_start", {"tool": f"tool_{index}"}
+        yield "final", {"response": "done"}
+
+    store = CountingStore()
+
+    async def scenario():
+        manager = make_manager(store, Slots(), run_turn=chatty_turn)
+        manager.start()
+        try:
+            job = await manager.submit("alice", "s1", "hello")
+            await wait_finished(manager, job.id)
+        finally:
+            await manager.stop()
+        return await store.load(job.id)
+
+    record = asyncio.run(scenario())
+    # Queued, running and finished: the snapshot is only written on state transitions
+    assert store.saves == 3
+    assert store.appended == list(range(21))
+    assert [event["type"] for event in record["progress"]] == ["tool_start"] * 20 + ["final"]
+
+
+def test_expired_jobs_take_their_events_with_them(sqlite_store):
+    finished = Job(id="old", user_id="alice", session_id="s1", query="hello", status=JOB_SUCCEEDED, finished_at=1.0)
+
+    async def scenario():
+        await sqlite_store.save(asdict(finished), 1.0)
+        await sqlite_store.append_event("old", 0, {"type": "final"})
+        before = (await sqlite_store.load("old"))["progress"]
+        removed = await sqlite_store.delete_finished(time.time())
+        with sqlite_store._pool.connection() as conn:
+            events_left = conn.execute("SELECT COUNT(*) FROM job_events").fetchone()[0]
+        return before, removed, events_left, await sqlite_store.load("old")
+
+    assert asyncio.run(scenario()) == ([{"type": "final"}], 1, 0, None)
@@ -0,0 +1,96 @@
+import asyncio
+
+import pytest
+
+from backend import limits
+from backend.limits import TokenBucket
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 1000.0
+
+    def __call__(self):
+        return self.now
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    clock = FakeClock()
+    monkeypatch.setattr(limits.time, "monotonic", clock)
+    return clock
+
+
+def test_try_acquire_spends_up_to_capacity(clock):
+    bucket = TokenBucket(rate=1, capacity=3)
+    assert [bucket.try_acquire() for _ in range(4)] == [True, True, True, False]
+
+
+def test_tokens_refill_at_rate_and_cap_at_capacity(clock):
+    bucket = TokenBucket(rate=2, capacity=2)
+    assert bucket.try_acquire(2)
+    assert bucket.time_until_available() == pytest.approx(0.5)
+
+    clock.now += 0.5
+    assert bucket.time_until_available() == 0.0
+    assert bucket.try_acquire()
+    assert not bucket.try_acquire()
+
+    clock.now += 60
+    assert bucket.try_acquire(2)
+    assert not bucket.try_acquire()
+
+
+def test_time_until_available_counts_missing_tokens(clock):
+    bucket = TokenBucket(rate=4, capacity=4)
+    assert bucket.try_acquire(4)
+    assert bucket.time_until_available(2) == pytest.approx(0.5)
+    assert bucket.time_until_available(4) == pytest.approx(1.0)
+
+
+def test_acquire_waits_for_a_token():
+    bucket = TokenBucket(rate=50, capacity=1)
+    assert bucket.try_acquire()
+
+    async def scenario():
+        loop = asyncio.get_running_loop()
+        started = loop.time()
+        acquired = await bucket.acquire(timeout=1.0)
+        return acquired, loop.time() - started
+
+    acquired, waited = asyncio.run(scenario())
+    assert acquired
+    assert 0.01 <= waited < 0.5
+
+
+def test_acquire_gives_up_when_the_wait_exceeds_the_timeout():
+    bucket = TokenBucket(rate=1, capacity=1)
+    assert bucket.try_acquire()
+
+    async def scenario():
+        loop = asyncio.get_running_loop()
+        started = loop.time()
+        acquired = await bucket.acquire(timeout=0.05)
+        return acquired, loop.time() - started
+
+    acquired, waited = asyncio.run(scenario())
+    assert not acquired
+    assert waited < 0.05
+    # The rejected waiter took nothing
+    assert bucket.time_until_available() <= 1.0
+
+
+def test_waiters_are_served_in_order():
+    bucket = TokenBucket(rate=100, capacity=1)
+    assert bucket.try_acquire()
+    served = []
+
+    async def waiter(name):
+        await bucket.acquire()
+        served.append(name)
+
+    async def scenario():
+        await asyncio.gather(*(waiter(name) for name in "abc"))
+
+    asyncio.run(scenario())
+    assert served == ["a", "b", "c"]
@@ -0,0 +1,52 @@
+from backend.metrics import MetricsRegistry, upstream_api
+
+
+def test_counter_renders_labels_in_prometheus_format():
+    registry = MetricsRegistry()
+    errors = registry.counter("errors_total", "Errors.", ["tool"])
+    errors.inc("get_research")
+    errors.inc("get_research", amount=2)
+    errors.inc('say "hi"\n')
+
+    assert registry.render().splitlines() == [
+        "# HELP errors_total Errors.",
+        "# TYPE errors_total counter",
+        'errors_total{tool="get_research"} 3',
+        'errors_total{tool="say \\"hi\\"\\n"} 1',
+    ]
+
+
+def test_histogram_buckets_are_cumulative():
+    registry = MetricsRegistry()
+    latency = registry.histogram("latency_seconds", "Latency.", ["api"], buckets=(0.1, 1.0))
+    for value in (0.05, 0.1, 0.5, 3.0):
+        latency.observe(value, "drive")
+
+    lines = registry.render().splitlines()
+    assert lines[2:] == [
+        'latency_seconds_bucket{api="drive",le="0.1"} 2',
+        'latency_seconds_bucket{api="drive",le="1"} 3',
+        'latency_seconds_bucket{api="drive",le="+Inf"} 4',
+        'latency_seconds_sum{api="drive"} 3.65',
+        'latency_seconds_count{api="drive"} 4',
+    ]
+
+
+def test_metrics_without_labels_or_samples():
+    registry = MetricsRegistry()
+    registry.counter("turns_total", "Turns.").inc()
+    registry.histogram("idle_seconds", "Idle.")
+    assert registry.render() == (
+        "# HELP turns_total Turns.\n"
+        "# TYPE turns_total counter\n"
+        "turns_total 1\n"
+        "# HELP idle_seconds Idle.\n"
+        "# TYPE idle_seconds histogram\n"
+    )
+
+
+def test_upstream_api_labels_request_paths():
+    assert upstream_api("/upload/drive/v3/files") == "drive"
+    assert upstream_api("/calendar/v3/freeBusy") == "calendar"
+    assert upstream_api("/oauth2/v3/userinfo") == "oauth2"
+    assert upstream_api("/token") == "other"
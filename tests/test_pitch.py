@@ -0,0 +1,34 @@
+import asyncio
+from types import SimpleNamespace
+
+from backend import tools
+
+
+def test_sections_keep_the_requested_order_with_bounded_concurrency(monkeypatch):
+    running = {"now": 0, "peak": 0}
+    # Earlier sections take longer, so they finish last
+    delays = {"Problem": 0.04, "Solution": 0.03, "Market": 0.02, "Team": 0.01}
+
+    async def fake_generate(model_name, prompt):
+        section = next(name for name in delays if f"'{name}'" in prompt)
+        running["now"] += 1
+        running["peak"] = max(running["peak"], running["now"])
+        await asyncio.sleep(delays[section])
+        running["now"] -= 1
+        if section == "Market":
+            raise RuntimeError("quota")
+        return SimpleNamespace(text=f"{section} text")
+
+    monkeypatch.setattr(tools, "generate_content", fake_generate)
+    monkeypatch.setattr(tools, "PITCH_SECTION_CONCURRENCY", 2)
+
+    sections = asyncio.run(tools.generate_pitch_sections("pet food delivery"))
+
+    assert [section["title"] for section in sections] == ["Problem", "Solution", "Market", "Team"]
+    assert sections[0] == {"title": "Problem", "content": "Problem text", "error": None}
+    assert sections[2] == {"title": "Market", "content": None, "error": "quota"}
+    assert running["peak"] == 2
+
+    markdown = tools._format_pitch_markdown("pet food delivery", sections)
+    assert markdown.index("## Problem") < markdown.index("## Solution") < markdown.index("## Market") < markdown.index("## Team")
+    assert "⚠️ Failed to generate this section: quota" in markdown
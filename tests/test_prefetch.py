@@ -0,0 +1,128 @@
+import asyncio
+
+import pytest
+
+from backend import tools
+from backend.config import MODEL_GEMINI_PRO
+from backend.prefetch import PrefetchEngine, _coverage, _terms
+from backend.sessions import STATE_SESSION_ID, STATE_USER_ID
+
+IDEA = "A telehealth app that connects pet owners with licensed vets over video calls"
+SESSION = ("alice", "s1")
+
+
+def make_engine(**overrides):
+    settings = dict(
+        enabled=True, ttl=60, idle_seconds=60, max_per_session=4, max_concurrent=2,
+        rate_per_minute=60, delay=0, match_threshold=0.6,
+    )
+    settings.update(overrides)
+    return PrefetchEngine(**settings)
+
+
+def research_for(text, calls):
+    async def fetch():
+        calls.append(text)
+        return {"status": "success", "summary": f"research on {text}", "topic": text}
+    return fetch
+
+
+def test_terms_drop_filler_words_and_plurals():
+    assert _terms("The pet telehealth market") == {"pet", "telehealth"}
+    assert _coverage(_terms("Pets telehealth industry"), _terms(IDEA)) == 1.0
+
+
+def test_topic_about_the_idea_hits_the_idea_prefetch():
+    engine, calls = make_engine(), []
+
+    async def scenario():
+        engine.schedule(SESSION, "get_research", IDEA, MODEL_GEMINI_PRO, research_for(IDEA, calls))
+        return await engine.take(SESSION, "get_research", "pet telehealth market", related=IDEA)
+
+    result = asyncio.run(scenario())
+    assert result["topic"] == IDEA
+    assert calls == [IDEA]
+
+
+def test_unrelated_topic_misses():
+    engine, calls = make_engine(), []
+
+    async def scenario():
+        engine.schedule(SESSION, "get_research", IDEA, MODEL_GEMINI_PRO, research_for(IDEA, calls))
+        return await engine.take(SESSION, "get_research", "electric vehicle batteries", related=IDEA)
+
+    assert asyncio.run(scenario()) is None
+
+
+def test_topic_alone_does_not_match_a_long_idea():
+    engine, calls = make_engine(), []
+
+    async def scenario():
+        engine.schedule(SESSION, "get_research", IDEA, MODEL_GEMINI_PRO, research_for(IDEA, calls))
+        return await engine.take(SESSION, "get_research", "pet telehealth market")
+
+    assert asyncio.run(scenario()) is None
+
+
+def test_duplicate_schedules_are_skipped_and_budget_is_enforced():
+    engine, calls = make_engine(max_per_session=2), []
+
+    async def scenario():
+        engine.schedule(SESSION, "get_research", IDEA, MODEL_GEMINI_PRO, research_for(IDEA, calls))
+        engine.schedule(SESSION, "get_research", IDEA.upper(), MODEL_GEMINI_PRO, research_for(IDEA, calls))
+        engine.schedule(SESSION, "get_research", "solar roof tiles", MODEL_GEMINI_PRO, research_for("solar", calls))
+        engine.schedule(SESSION, "get_research", "drone deliveries", MODEL_GEMINI_PRO, research_for("drone", calls))
+        await asyncio.sleep(0.01)
+
+    asyncio.run(scenario())
+    assert calls == [IDEA, "solar"]
+
+
+class FakeToolContext:
+    def __init__(self, user_id, session_id):
+        self.state = {STATE_USER_ID: user_id, STATE_SESSION_ID: session_id}
+
+
+def test_get_research_serves_the_idea_prefetch_without_relabelling(monkeypatch):
+    engine, calls = make_engine(), []
+    monkeypatch.setattr(tools, "prefetcher", engine)
+
+    async def no_model_call(*args, **kwargs):
+        raise AssertionError("research should have been served from the prefetch")
+
+    monkeypatch.setattr(tools, "generate_content", no_model_call)
+
+    async def scenario():
+        engine.remember(SESSION, "idea", IDEA)
+        engine.schedule(SESSION, "get_research", IDEA, MODEL_GEMINI_PRO, research_for(IDEA, calls))
+        return await tools.get_research("Pet telehealth industry", tool_context=FakeToolContext(*SESSION))
+
+    result = asyncio.run(scenario())
+    assert result == {"status": "success", "summary": f"research on {IDEA}", "topic": IDEA}
+
+
+def test_idle_session_cancels_the_upstream_model_call(monkeypatch):
+    engine = make_engine(idle_seconds=0)
+    upstream = {"started": None, "cancelled": False}
+
+    async def slow_model_call(*args, **kwargs):
+        upstream["started"].set()
+        try:
+            await asyncio.sleep(10)
+        except asyncio.CancelledError:
+            upstream["cancelled"] = True
+            raise
+
+    monkeypatch.setattr(tools, "generate_content", slow_model_call)
+
+    async def scenario():
+        upstream["started"] = asyncio.Event()
+        engine.schedule(SESSION, "get_research", IDEA, MODEL_GEMINI_PRO, lambda: tools._prefetch_research(IDEA))
+        await upstream["started"].wait()
+        engine._sweep()
+        for _ in range(5):
+            await asyncio.sleep(0)
+        return tools._llm_flights.in_flight()
+
+    assert asyncio.run(scenario()) == 0
+    assert upstream["cancelled"]
@@ -0,0 +1,130 @@
+import asyncio
+
+import pytest
+
+from backend.resilience import CircuitBreaker, CircuitOpenError, ResilientCaller
+
+
+def make_caller(**overrides):
+    settings = dict(
+        attempt_timeout=0.1, deadline=2.0, max_attempts=3, base_delay=0.0, max_delay=0.0,
+        hedging_enabled=False, hedge_quantile=0.9, hedge_min_samples=3, hedge_min_delay=0.0,
+        latency_window=20, failure_threshold=2, cooldown=60.0,
+    )
+    settings.update(overrides)
+    return ResilientCaller(**settings)
+
+
+def test_breaker_opens_after_threshold_and_probes_after_cooldown():
+    breaker = CircuitBreaker("model", failure_threshold=2, cooldown=0.05)
+    breaker.record_failure()
+    assert breaker.state == "closed"
+    breaker.record_failure()
+    assert breaker.state == "open"
+    with pytest.raises(CircuitOpenError):
+        breaker.before_call()
+
+    asyncio.run(asyncio.sleep(0.06))
+    assert breaker.state == "half_open"
+    breaker.before_call()  # the probe
+    with pytest.raises(CircuitOpenError):
+        breaker.before_call()  # only one probe at a time
+    breaker.record_success()
+    assert breaker.state == "closed"
+
+
+def test_timeouts_are_retried():
+    caller = make_caller()
+    calls = []
+
+    async def send(hedge=False):
+        calls.append(hedge)
+        if len(calls) == 1:
+            await asyncio.sleep(1)
+        return "ok"
+
+    assert asyncio.run(caller.call("model", send)) == "ok"
+    assert len(calls) == 2
+
+
+def test_non_retryable_errors_are_raised_at_once():
+    caller = make_caller()
+    calls = []
+
+    async def send(hedge=False):
+        calls.append(hedge)
+        raise ValueError("bad request")
+
+    with pytest.raises(ValueError):
+        asyncio.run(caller.call("model", send))
+    assert len(calls) == 1
+
+
+def test_pacing_wait_is_outside_the_attempt_timeout_and_latency_window():
+    caller = make_caller(attempt_timeout=0.1)
+    paced = []
+
+    async def pace(model):
+        paced.append(model)
+        await asyncio.sleep(0.2)
+
+    async def send(hedge=False):
+        await asyncio.sleep(0.01)
+        return "ok"
+
+    assert asyncio.run(caller.call("model", send, pace=pace)) == "ok"
+    assert paced == ["model"]
+    assert caller._window("model").quantile(1.0, 1) < 0.1
+
+
+def test_rejected_pacing_releases_the_probe():
+    caller = make_caller(failure_threshold=1, cooldown=0.0)
+    caller.breaker("model").record_failure()
+
+    async def reject(model):
+        raise RuntimeError("shed")
+
+    async def send(hedge=False):
+        return "ok"
+
+    with pytest.raises(RuntimeError):
+        asyncio.run(caller.call("model", send, pace=reject))
+    # The next call can still probe the half-open circuit
+    assert asyncio.run(caller.call("model", send)) == "ok"
+
+
+def test_cancelled_probe_releases_the_circuit():
+    caller = make_caller(failure_threshold=1, cooldown=0.0, attempt_timeout=5.0)
+    caller.breaker("model").record_failure()
+    started = asyncio.Event()
+
+    async def hang(hedge=False):
+        started.set()
+        await asyncio.sleep(10)
+
+    async def send(hedge=False):
+        return "ok"
+
+    async def scenario():
+        probe = asyncio.create_task(caller.call("model", hang))
+        await started.wait()
+        probe.cancel()
+        with pytest.raises(asyncio.CancelledError):
+            await probe
+        assert caller.breaker("model").state == "half_open"
+        # The next call is admitted as the new probe and closes the circuit
+        return await caller.call("model", send)
+
+    assert asyncio.run(scenario()) == "ok"
+    assert caller.breaker("model").state == "closed"
+
+
+def test_slow_attempt_is_hedged():
+    caller = make_caller(attempt_timeout=1.0, hedging_enabled=True, hedge_min_samples=1)
+    caller._window("model").add(0.02)
+
+    async def send(hedge=False):
+        await asyncio.sleep(0.01 if hedge else 0.5)
+        return "hedge" if hedge else "primary"
+
+    assert asyncio.run(caller.call("model", send)) == "hedge"
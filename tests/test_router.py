@@ -0,0 +1,38 @@
+import pytest
+
+from backend.config import LOCAL_ROUTER_MIN_CONFIDENCE
+from backend.router import intent_router, tokenize
+
+
+def test_tokenize_drops_stop_words_and_punctuation():
+    assert tokenize("Validate MY idea, please!") == ["validate", "idea"]
+
+
+@pytest.mark.parametrize("query, agent", [
+    ("Please validate my idea: a marketplace for used climbing gear", "IdeaValidatorAgent"),
+    ("Who are the main competitors in plant-based protein?", "MarketResearcherAgent"),
+    ("Generate a pitch deck for a drone delivery startup", "PitchDeckGeneratorAgent"),
+    ("Save the summary to Google Drive", "SummarySaverAgent"),
+    ("Create a logo for a coffee subscription brand", "LogoCreatorAgent"),
+    ("Schedule a meeting with investor@example.com next Tuesday at 3pm", "MeetMakerAgent"),
+])
+def test_clear_requests_are_routed_confidently(query, agent):
+    route = intent_router.route(query)
+    assert route.agent_name == agent
+    assert route.confidence >= LOCAL_ROUTER_MIN_CONFIDENCE
+
+
+def test_an_email_makes_a_meeting_request_unambiguous():
+    route = intent_router.route("Book a call with bob@example.com to go over the pitch")
+    assert route.agent_name == "MeetMakerAgent"
+
+
+def test_several_intents_go_to_the_coordinator():
+    route = intent_router.route("Do market research on edtech and then create a pitch deck")
+    assert route.agent_name is None
+    assert route.confidence == 0.0
+
+
+def test_unrelated_chatter_is_not_routed_confidently():
+    route = intent_router.route("hello there, how are you today?")
+    assert route.confidence < LOCAL_ROUTER_MIN_CONFIDENCE
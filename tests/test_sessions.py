@@ -0,0 +1,49 @@
+# tests/test_sessions.py
+import asyncio
+
+from google.adk.sessions import InMemorySessionService
+
+from backend.sessions import STATE_SESSION_ID, STATE_USER_ID, SessionRouter
+
+def test_new_session_records_its_user_in_state():
+    service = InMemorySessionService()
+    router = SessionRouter(service, "app")
+
+    async def run():
+        async with router.turn("alice", "s1"):
+            pass
+        return await service.get_session(app_name="app", user_id="alice", session_id="s1")
+
+    session = asyncio.run(run())
+    assert session.state[STATE_USER_ID] == "alice"
+    assert session.state[STATE_SESSION_ID] == "s1"
+
+def test_existing_session_without_identity_gets_it_added():
+    service = InMemorySessionService()
+    router = SessionRouter(service, "app")
+
+    async def run():
+        await service.create_session(app_name="app", user_id="bob", session_id="old")
+        async with router.turn("bob", "old"):
+            pass
+        return await service.get_session(app_name="app", user_id="bob", session_id="old")
+
+    session = asyncio.run(run())
+    assert session.state[STATE_USER_ID] == "bob"
+    assert session.state[STATE_SESSION_ID] == "old"
+
+def test_turns_of_one_session_are_serialized():
+    router = SessionRouter(InMemorySessionService(), "app")
+    order = []
+
+    async def turn(name: str):
+        async with router.turn("alice", "s1"):
+            order.append(f"{name} start")
+            await asyncio.sleep(0.01)
+            order.append(f"{name} end")
+
+    async def run():
+        await asyncio.gather(turn("a"), turn("b"))
+
+    asyncio.run(run())
+    assert order == ["a start", "a end", "b start", "b end"]
@@ -0,0 +1,122 @@
+import asyncio
+
+import pytest
+
+from backend.singleflight import SingleFlight
+
+
+def test_concurrent_calls_with_one_key_share_the_work():
+    flights = SingleFlight()
+    calls = []
+
+    async def work():
+        calls.append(1)
+        await asyncio.sleep(0.01)
+        return "result"
+
+    async def scenario():
+        results = await asyncio.gather(*(flights.do("key", work) for _ in range(5)))
+        return results, flights.in_flight()
+
+    results, in_flight = asyncio.run(scenario())
+    assert results == ["result"] * 5
+    assert calls == [1]
+    assert in_flight == 0
+
+
+def test_different_keys_run_separately():
+    flights = SingleFlight()
+
+    async def scenario():
+        return await asyncio.gather(flights.do("a", lambda: asyncio.sleep(0, "a")), flights.do("b", lambda: asyncio.sleep(0, "b")))
+
+    assert asyncio.run(scenario()) == ["a", "b"]
+
+
+def test_errors_reach_every_waiter_and_release_the_key():
+    flights = SingleFlight()
+
+    async def fail():
+        await asyncio.sleep(0.01)
+        raise ValueError("upstream failed")
+
+    async def scenario():
+        results = await asyncio.gather(flights.do("key", fail), flights.do("key", fail), return_exceptions=True)
+        retried = await flights.do("key", lambda: asyncio.sleep(0, "ok"))
+        return results, retried
+
+    results, retried = asyncio.run(scenario())
+    assert all(isinstance(result, ValueError) for result in results)
+    assert retried == "ok"
+
+
+def test_a_cancelled_caller_does_not_cancel_the_shared_call():
+    flights = SingleFlight()
+
+    async def work():
+        await asyncio.sleep(0.05)
+        return "done"
+
+    async def scenario():
+        first = asyncio.ensure_future(flights.do("key", work))
+        second = asyncio.ensure_future(flights.do("key", work))
+        await asyncio.sleep(0.01)
+        first.cancel()
+        with pytest.raises(asyncio.CancelledError):
+            await first
+        return await second
+
+    assert asyncio.run(scenario()) == "done"
+
+
+def test_abandoned_call_is_cancelled_when_enabled():
+    flights = SingleFlight(cancel_abandoned=True)
+    upstream = {"started": asyncio.Event(), "cancelled": False, "calls": 0}
+
+    async def work():
+        upstream["calls"] += 1
+        upstream["started"].set()
+        try:
+            await asyncio.sleep(10)
+        except asyncio.CancelledError:
+            upstream["cancelled"] = True
+            raise
+
+    async def scenario():
+        first = asyncio.ensure_future(flights.do("key", work))
+        second = asyncio.ensure_future(flights.do("key", work))
+        await upstream["started"].wait()
+        first.cancel()
+        await asyncio.gather(first, return_exceptions=True)
+        await asyncio.sleep(0)
+        # Still awaited by the second caller
+        assert not upstream["cancelled"]
+        second.cancel()
+        await asyncio.gather(second, return_exceptions=True)
+        await asyncio.sleep(0)
+        assert upstream["cancelled"]
+        assert flights.in_flight() == 0
+        # A later caller starts a fresh call instead of joining the cancelled one
+        return await flights.do("key", lambda: asyncio.sleep(0, "fresh"))
+
+    assert asyncio.run(scenario()) == "fresh"
+    assert upstream["calls"] == 1
+
+
+def test_abandoned_call_keeps_running_by_default():
+    flights = SingleFlight()
+    finished = []
+
+    async def work():
+        await asyncio.sleep(0.02)
+        finished.append(True)
+
+    async def scenario():
+        caller = asyncio.ensure_future(flights.do("key", work))
+        await asyncio.sleep(0.005)
+        caller.cancel()
+        await asyncio.gather(caller, return_exceptions=True)
+        await asyncio.sleep(0.04)
+
+    asyncio.run(scenario())
+    assert finished == [True]
@@ -0,0 +1,48 @@
+from backend.slides import build_deck_requests, build_text_slide_requests, object_id
+
+
+def kinds(requests):
+    return [next(iter(request)) for request in requests]
+
+
+def test_object_ids_are_deterministic_valid_and_bounded():
+    assert object_id("Deck", "slide", 1) == object_id("Deck", "slide", 1)
+    assert object_id("Deck", "slide", 1) != object_id("Deck", "slide", 2)
+    assert object_id("Other deck", "slide", 1) != object_id("Deck", "slide", 1)
+    long_id = object_id("Deck", "a very long part with spaces!" * 5)
+    assert len(long_id) <= 50
+    assert all(char.isalnum() or char in "_-:" for char in long_id)
+
+
+def test_deck_is_one_batch_with_text_mapped_to_placeholders():
+    sections = [("Problem", "## Pain\n- **slow** onboarding"), ("Team", "")]
+    requests = build_deck_requests("Deck", sections, default_slide_ids=["p"])
+
+    assert kinds(requests) == [
+        "createSlide", "insertText",
+        "createSlide", "insertText", "insertText",
+        # The empty body gets no insertText, which the API would reject
+        "createSlide", "insertText",
+        "deleteObject",
+    ]
+    assert [r["createSlide"]["insertionIndex"] for r in requests if "createSlide" in r] == [0, 1, 2]
+
+    mapped = {
+        mapping["objectId"]
+        for request in requests if "createSlide" in request
+        for mapping in request["createSlide"]["placeholderIdMappings"]
+    }
+    assert {r["insertText"]["objectId"] for r in requests if "insertText" in r} <= mapped
+
+    problem_body = requests[4]["insertText"]["text"]
+    assert problem_body == "Pain\n• slow onboarding"
+    assert requests[-1] == {"deleteObject": {"objectId": "p"}}
+
+
+def test_text_slide_puts_a_text_box_on_a_blank_slide():
+    requests = build_text_slide_requests("seed", "Hello", default_slide_ids=["p1", "p2"])
+    assert kinds(requests) == ["createSlide", "createShape", "insertText", "deleteObject", "deleteObject"]
+    slide_id = requests[0]["createSlide"]["objectId"]
+    box_id = requests[1]["createShape"]["objectId"]
+    assert requests[1]["createShape"]["elementProperties"]["pageObjectId"] == slide_id
+    assert requests[2]["insertText"] == {"objectId": box_id, "insertionIndex": 0, "text": "Hello"}
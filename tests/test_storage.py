@@ -0,0 +1,61 @@
+import asyncio
+import threading
+
+from google.adk.events import Event, EventActions
+from google.genai.types import Content, Part
+from sqlalchemy import event
+
+from backend import storage
+from backend.storage import MemoryTokenStore, SQLiteConnectionPool, SQLiteTokenStore
+
+
+def exercise(store):
+    async def scenario():
+        await store.save("alice", {"token": "t1", "refresh_token": "r1"})
+        loaded = await store.load("alice")
+        await store.discard("alice")
+        await store.discard("alice")  # already gone: no error
+        return loaded, await store.load("alice")
+
+    return asyncio.run(scenario())
+
+
+def test_sqlite_token_store(tmp_path):
+    store = SQLiteTokenStore(SQLiteConnectionPool(str(tmp_path / "state.sqlite3"), 2))
+    assert exercise(store) == ({"token": "t1", "refresh_token": "r1"}, None)
+
+
+def test_sqlite_token_store_is_shared_between_instances(tmp_path):
+    pool = SQLiteConnectionPool(str(tmp_path / "state.sqlite3"), 2)
+    asyncio.run(SQLiteTokenStore(pool).save("bob", {"token": "t"}))
+    assert asyncio.run(SQLiteTokenStore(pool).load("bob")) == {"token": "t"}
+
+
+def test_memory_token_store():
+    assert exercise(MemoryTokenStore()) == ({"token": "t1", "refresh_token": "r1"}, None)
+
+
+def test_sqlite_session_service_runs_queries_off_the_event_loop(tmp_path, monkeypatch):
+    monkeypatch.setattr(storage, "STATE_BACKEND", "sqlite")
+    monkeypatch.setattr(storage, "STATE_DB_PATH", str(tmp_path / "state.sqlite3"))
+    service = storage.create_session_service()
+    query_threads = set()
+    event.listen(service.db_engine, "before_cursor_execute", lambda *args: query_threads.add(threading.current_thread().name))
+
+    async def scenario():
+        session = await service.create_session(app_name="app", user_id="alice", session_id="s1", state={"idea": "pets"})
+        await service.append_event(session, Event(
+            author="user", invocation_id="inv",
+            content=Content(role="user", parts=[Part(text="hello")]),
+            actions=EventActions(state_delta={"stage": "research"}),
+        ))
+        # Streamed chunks are not stored
+        await service.append_event(session, Event(author="agent", invocation_id="inv", partial=True))
+        listed = await service.list_sessions(app_name="app", user_id="alice")
+        return await service.get_session(app_name="app", user_id="alice", session_id="s1"), listed
+
+    session, listed = asyncio.run(scenario())
+    assert session.state == {"idea": "pets", "stage": "research"}
+    assert [stored.content.parts[0].text for stored in session.events] == ["hello"]
+    assert [listed_session.id for listed_session in listed.sessions] == ["s1"]
+    assert query_threads and all(name.startswith("blocking-io") for name in query_threads)
@@ -0,0 +1,53 @@
+import json
+
+from google.adk.events import Event, EventActions
+from google.genai.types import Content, FunctionCall, FunctionResponse, Part
+
+from backend import main
+
+
+def event(parts=None, partial=None, actions=None, author="VentureCoordinatorAgent"):
+    return Event(
+        author=author,
+        invocation_id="inv",
+        partial=partial,
+        content=Content(role="model", parts=parts) if parts else None,
+        actions=actions or EventActions(),
+    )
+
+
+def test_partial_text_is_streamed_as_text_chunks():
+    assert main._event_updates(event([Part(text="Hel"), Part(text="lo")], partial=True)) == [
+        ("text", {"agent": "VentureCoordinatorAgent", "text": "Hello"}),
+    ]
+
+
+def test_tool_calls_and_results_become_start_and_end_events():
+    call = event([Part(function_call=FunctionCall(name="get_research", args={"topic": "pets"}))])
+    result = event([Part(function_response=FunctionResponse(name="get_research", response={"status": "success"}))])
+
+    assert main._event_updates(call) == [
+        ("tool_start", {"agent": "VentureCoordinatorAgent", "tool": "get_research", "args": {"topic": "pets"}}),
+    ]
+    assert main._event_updates(result) == [
+        ("tool_end", {"agent": "VentureCoordinatorAgent", "tool": "get_research", "response": {"status": "success"}}),
+    ]
+
+
+def test_transfers_become_handoffs():
+    updates = main._event_updates(event(actions=EventActions(transfer_to_agent="MarketResearchAgent")))
+    assert ("handoff", {"from": "VentureCoordinatorAgent", "to": "MarketResearchAgent"}) in updates
+
+
+def test_complete_text_is_the_final_answer():
+    assert main._event_updates(event([Part(text="Done.")])) == [
+        ("final", {"agent": "VentureCoordinatorAgent", "response": "Done."}),
+    ]
+
+
+def test_sse_frames_carry_the_event_type_and_json_payload():
+    frame = main._format_sse("final", {"response": "ok", "count": 2})
+    assert frame.endswith("\n\n")
+    event_line, data_line = frame.strip().split("\n")
+    assert event_line == "event: final"
+    assert json.loads(data_line.removeprefix("data: ")) == {"response": "ok", "count": 2}
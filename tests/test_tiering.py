@@ -0,0 +1,90 @@
+import pytest
+
+from backend.admission import AdmissionController
+from backend.config import MODEL_GEMINI_FLASH, MODEL_GEMINI_PRO
+from backend.resilience import CircuitBreaker
+from backend import tiering as tiering_module
+from backend.tiering import ModelStats, TieringPolicy, TurnTier
+
+
+@pytest.fixture
+def policy():
+    return TieringPolicy(
+        enabled=True, max_pro_input_tokens=1000, pro_max_wait=2.0,
+        pro_max_error_rate=0.5, alpha=0.5, min_samples=2,
+    )
+
+
+def test_model_stats_track_ewma_latency_and_error_rate():
+    stats = ModelStats(alpha=0.5)
+    stats.observe(1.0, error=False)
+    assert stats.latency == 1.0 and stats.error_rate == 0.0
+    stats.observe(3.0, error=True)
+    assert stats.latency == pytest.approx(2.0)
+    assert stats.error_rate == pytest.approx(0.5)
+    assert stats.samples == 2
+
+
+def test_turn_tier_names_the_models_used():
+    turn = TurnTier()
+    assert turn.tier == "none"
+    turn.calls[MODEL_GEMINI_PRO] = 2
+    assert turn.tier == "pro"
+    turn.calls[MODEL_GEMINI_FLASH] = 1
+    assert turn.tier == "mixed"
+
+
+def test_flash_agents_and_disabled_policy_keep_their_model(policy):
+    assert policy.choose(MODEL_GEMINI_FLASH, 10_000) == (MODEL_GEMINI_FLASH, "configured")
+    policy.enabled = False
+    assert policy.choose(MODEL_GEMINI_PRO, 10_000) == (MODEL_GEMINI_PRO, "configured")
+
+
+def test_large_prompts_go_to_flash(policy):
+    assert policy.choose(MODEL_GEMINI_PRO, 1000) == (MODEL_GEMINI_PRO, "configured")
+    assert policy.choose(MODEL_GEMINI_PRO, 1001) == (MODEL_GEMINI_FLASH, "input_size")
+
+
+def test_pro_errors_only_count_after_enough_samples(policy):
+    policy.observe(MODEL_GEMINI_PRO, 1.0, error=True)
+    assert policy.choose(MODEL_GEMINI_PRO, 10) == (MODEL_GEMINI_PRO, "configured")
+    policy.observe(MODEL_GEMINI_PRO, 1.0, error=True)
+    assert policy.choose(MODEL_GEMINI_PRO, 10) == (MODEL_GEMINI_FLASH, "pro_errors")
+
+
+def test_open_circuit_and_long_rate_limit_waits_go_to_flash(policy, monkeypatch):
+    breaker = CircuitBreaker(MODEL_GEMINI_PRO, failure_threshold=1, cooldown=60)
+    monkeypatch.setattr(tiering_module.gemini_calls, "breaker", lambda model: breaker)
+    breaker.record_failure()
+    assert policy.choose(MODEL_GEMINI_PRO, 10) == (MODEL_GEMINI_FLASH, "pro_circuit_open")
+
+    breaker.record_success()
+    throttled = AdmissionController(
+        max_concurrent_turns=1, max_queued_turns=0, queue_timeout=1, user_turns_per_minute=0, user_burst=1,
+        tier_limits={MODEL_GEMINI_PRO: (0.1, 1)}, model_wait=1, max_tracked_users=1,
+    )
+    assert throttled.try_model_call(MODEL_GEMINI_PRO)
+    monkeypatch.setattr(tiering_module, "admission", throttled)
+    assert policy.choose(MODEL_GEMINI_PRO, 10) == (MODEL_GEMINI_FLASH, "pro_rate_limited")
+
+
+def test_latency_budget_moves_slow_pro_calls_to_flash(policy):
+    policy.observe(MODEL_GEMINI_PRO, 5.0, error=False)
+    policy.observe(MODEL_GEMINI_PRO, 5.0, error=False)
+    with policy.turn("chat", latency_budget_ms=60_000):
+        assert policy.choose(MODEL_GEMINI_PRO, 10) == (MODEL_GEMINI_PRO, "configured")
+    with policy.turn("chat", latency_budget_ms=1000):
+        assert policy.choose(MODEL_GEMINI_PRO, 10) == (MODEL_GEMINI_FLASH, "latency_budget")
+    # Outside a turn there is no budget
+    assert policy.current_turn() is None
+    assert policy.choose(MODEL_GEMINI_PRO, 10) == (MODEL_GEMINI_PRO, "configured")
+
+
+def test_failed_turn_records_its_open_calls_as_errors(policy):
+    with pytest.raises(RuntimeError):
+        with policy.turn("chat") as turn:
+            turn.calls[MODEL_GEMINI_PRO] = 1
+            turn.pending[("invocation", "agent")] = (MODEL_GEMINI_PRO, 0.0)
+            raise RuntimeError("boom")
+    policy.observe(MODEL_GEMINI_PRO, 1.0, error=True)
+    assert policy.choose(MODEL_GEMINI_PRO, 10) == (MODEL_GEMINI_FLASH, "pro_errors")
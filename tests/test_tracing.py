@@ -0,0 +1,114 @@
+import json
+
+import pytest
+from fastapi.testclient import TestClient
+
+from backend import auth, main
+from backend.auth import SESSION_COOKIE, signer
+from backend.tracing import KIND_CLIENT, Tracer, to_otlp
+
+
+def make_tracer(**overrides):
+    settings = dict(sample_rate=1.0, exporter="none", json_path="", otlp_endpoint="", max_traces=2)
+    settings.update(overrides)
+    return Tracer(**settings)
+
+
+def test_unsampled_turns_record_nothing():
+    tracer = make_tracer(sample_rate=0)
+    with tracer.trace("chat") as root:
+        assert root is None
+        with tracer.span("tool get_research") as span:
+            assert span is None
+    assert tracer.current_span() is None
+
+
+def test_spans_nest_into_a_waterfall():
+    tracer = make_tracer()
+    with tracer.trace("chat", endpoint="/chat") as root:
+        with tracer.span("agent coordinator"):
+            with tracer.span("HTTP GET drive", kind=KIND_CLIENT) as http:
+                assert http.traceparent == f"00-{root.trace.trace_id}-{http.span_id}-01"
+        assert tracer.current_span() is root
+    assert tracer.current_span() is None
+
+    waterfall = tracer.get(root.trace.trace_id).to_dict()
+    assert [(span["name"], span["depth"]) for span in waterfall["spans"]] == [
+        ("chat", 0), ("agent coordinator", 1), ("HTTP GET drive", 2),
+    ]
+    assert waterfall["spans"][0]["offset_ms"] == 0
+    assert all(span["end_ns"] is not None for span in waterfall["spans"])
+
+
+def test_errors_are_recorded_and_open_spans_closed_at_the_end_of_the_turn():
+    tracer = make_tracer()
+    with pytest.raises(ValueError):
+        with tracer.trace("chat") as root:
+            tracer.start_span("agent left open")
+            with tracer.span("tool get_summary"):
+                raise ValueError("bad input")
+
+    spans = {span.name: span for span in root.trace.spans}
+    assert spans["tool get_summary"].error == "ValueError: bad input"
+    assert spans["chat"].error == "ValueError"
+    assert spans["agent left open"].end_ns is not None
+    # A finished trace takes no more spans
+    assert tracer.start_span("late", parent=root) is None
+
+
+def test_only_the_latest_traces_are_kept():
+    tracer = make_tracer(max_traces=2)
+    trace_ids = []
+    for _ in range(3):
+        with tracer.trace("chat") as root:
+            trace_ids.append(root.trace.trace_id)
+    assert tracer.get(trace_ids[0]) is None
+    assert tracer.get(trace_ids[1]) is not None and tracer.get(trace_ids[2]) is not None
+
+
+def test_otlp_encoding_links_parents_and_types_attributes():
+    tracer = make_tracer()
+    with tracer.trace("chat") as root:
+        with tracer.span("llm", retries=2, hedged=True, latency=0.5, model="flash"):
+            pass
+
+    payload = to_otlp(root.trace)
+    json.dumps(payload)
+    spans = payload["resourceSpans"][0]["scopeSpans"][0]["spans"]
+    assert "parentSpanId" not in spans[0]
+    assert spans[1]["parentSpanId"] == spans[0]["spanId"]
+    assert {a["key"]: a["value"] for a in spans[1]["attributes"]} == {
+        "retries": {"intValue": "2"},
+        "hedged": {"boolValue": True},
+        "latency": {"doubleValue": 0.5},
+        "model": {"stringValue": "flash"},
+    }
+
+
+def test_unknown_exporter_is_rejected():
+    with pytest.raises(ValueError):
+        make_tracer(exporter="zipkin")
+
+
+def test_trace_endpoint_only_shows_the_callers_own_turns(monkeypatch):
+    tracer = make_tracer()
+    with tracer.trace("POST /chat", user_id="alice", session_id="s1") as root:
+        pass
+    trace_id = root.trace.trace_id
+    monkeypatch.setattr(main, "tracer", tracer)
+    monkeypatch.setattr(auth, "AUTH_ADMIN_TOKEN", "admin-secret")
+    client = TestClient(main.app)
+
+    assert client.get(f"/traces/{trace_id}").status_code == 401
+
+    client.cookies.set(SESSION_COOKIE, signer.sign("mallory"))
+    assert client.get(f"/traces/{trace_id}").status_code == 404
+
+    client.cookies.set(SESSION_COOKIE, signer.sign("alice"))
+    response = client.get(f"/traces/{trace_id}")
+    assert response.status_code == 200
+    assert response.json()["spans"][0]["attributes"]["user_id"] == "alice"
+
+    client.cookies.clear()
+    response = client.get(f"/traces/{trace_id}", headers={"Authorization": "Bearer admin-secret"})
+    assert response.status_code == 200